@@ -6,6 +6,7 @@ from sqlalchemy.orm import selectinload
 from starlette.requests import Request
 from starlette.responses import RedirectResponse
 
+from app.core.catalog_cache import catalog_cache
 from app.core.type_vars import T
 from app.database.crud.mixines import GetBackNextIdMixin
 from app.database import db_helper
@@ -14,6 +15,14 @@ from app.database import db_helper
 class CustomModelView(ModelView, Generic[T]):
     repo_type: Type[GetBackNextIdMixin[T]]
     detail_columns_counts: dict[str, dict[str, int]] = {}
+    # справочники API (см. catalog_cache), которые устаревают при правке модели
+    catalogs: tuple[str, ...] = ()
+
+    async def after_model_change(self, data, model, is_created, request) -> None:
+        await catalog_cache.bump(*self.catalogs)
+
+    async def after_model_delete(self, model, request) -> None:
+        await catalog_cache.bump(*self.catalogs)
 
     @action(name="back", label="< Назад", add_in_detail=True, add_in_list=False)
     async def back_record(self, request: Request) -> RedirectResponse:
@@ -55,7 +64,7 @@ class CustomModelView(ModelView, Generic[T]):
         return referer
 
     async def get_count_items(self, request: Request) -> int | None:
-        async for session in db_helper.get_session():
+        async for session in db_helper.get_read_session():
             repo = self.repo_type(session)
             user = request.session.get("user")
             conditions = []
@@ -84,8 +93,10 @@ class CustomModelView(ModelView, Generic[T]):
 
         # поиск уже учтён, если вызвали из list со stmt
         count_stmt = select(func.count()).select_from(stmt.subquery())
-        rows = await self._run_query(count_stmt)
-        return rows[0]
+        # подсчёт для списков админки — на реплике, если она настроена
+        async for session in db_helper.get_read_session():
+            return await session.scalar(count_stmt) or 0
+        return 0
 
 
     async def get_item_position(self, request: Request) -> dict[str, int | Any]:
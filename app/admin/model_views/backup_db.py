@@ -10,9 +10,9 @@ from app.database import db_helper
 from app.database.backup_db import restore_database_from_dump
 from app.database.crud.backup_db import BackupDbRepository
 from app.database.models.backup_db import BackupDb
-from app.celery_worker import check_job_status
+from app.celery_worker import check_job_status, get_job_progress
 from app.tasks.create_backup import run_process_backup, backup_task
-from core.redis import redis_client
+from app.core.redis import redis_helper
 
 
 class BackupDbAdmin(
@@ -24,9 +24,13 @@ class BackupDbAdmin(
     name = "Резервная копия"
     icon = "fa-solid fa-box-archive"
 
-    column_list = ("name",)
+    column_list = ("name", "kind")
     column_labels = {
         "name": "Имя копии",
+        "kind": "Формат",
+    }
+    column_formatters = {
+        "kind": lambda m, a: m.kind.label,
     }
     can_edit = False
     can_delete = True
@@ -64,19 +68,17 @@ class BackupDbAdmin(
 
     @staticmethod
     async def create_backup() -> str | None:
-        task = check_job_status(backup_task.name)
-
-        # Если нет задачи или задача завершилась успешно — запускаем новый бэкап
-        if not task or task.status == "SUCCESS":
-            new_task = run_process_backup.delay()
-            redis_client.set(backup_task.name, new_task.id)
-            return None
+        # незавершённая задача; завершённую check_job_status уже сбросил
+        if await check_job_status(backup_task.name):
+            progress = await get_job_progress(backup_task.name)
+            if progress and progress.get("sent"):
+                return (
+                    "Предыдущий бэкап не закончен: выгружено "
+                    f"{progress['sent'] / 1024 / 1024:.0f} МБ..."
+                )
+            return "Предыдущий бэкап не закончен..."
 
-        # Если задача завершилась неудачно — можно очистить ключ
-        if task.status == "FAILURE":
-            redis_client.delete(backup_task.name)
-            # Вывести информацию об ошибке
-            info = f"{type(getattr(task, 'result', None))}, {task.status}"
-            return f"Ошибка: {info}"
-
-        return "Предыдущий бэкап не закончен..."
+        # публикация в брокер синхронная — не держим на ней event loop
+        new_task = await asyncio.to_thread(run_process_backup.delay)
+        await redis_helper.client.set(backup_task.name, new_task.id)
+        return None
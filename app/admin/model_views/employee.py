@@ -6,6 +6,7 @@ from starlette.requests import Request
 from starlette.responses import RedirectResponse
 
 from app.admin.custom_model_view import CustomModelView
+from app.core.auth.token_cache import token_cache
 from app.core.auth.user_manager_helper import UserManagerHelper
 from app.database import Employee, db_helper
 from app.database.crud.employees import EmployeeRepository
@@ -16,6 +17,7 @@ class EmployeeAdmin(
     model=Employee,
 ):
     repo_type = EmployeeRepository
+    catalogs = ("employees",)
     name_plural = "Сотрудники"
     name = "Сотрудник"
     category = "Пользователи"
@@ -41,6 +43,15 @@ class EmployeeAdmin(
         "device_id",
     )
 
+    # неограниченные коллекции не грузим в форму редактирования
+    form_excluded_columns = (
+        "plans",
+        "product_steps_performed",
+        "product_steps_accepted",
+        "packaging_performed",
+        "inventory",
+    )
+
     form_rules = [
         "name",
         "role",
@@ -53,6 +64,21 @@ class EmployeeAdmin(
 
     action_in_header = ["generate-qr"]
 
+    async def on_model_change(self, data, model, is_created, request) -> None:
+        # пользователь, к которому сотрудник был привязан до правки
+        request.state.old_user_id = model.user_id
+
+    async def after_model_change(self, data, model, is_created, request) -> None:
+        await super().after_model_change(data, model, is_created, request)
+        # роль и профиль сотрудника кэшируются по токену
+        await token_cache.invalidate_user(
+            getattr(request.state, "old_user_id", None), model.user_id
+        )
+
+    async def after_model_delete(self, model, request) -> None:
+        await super().after_model_delete(model, request)
+        await token_cache.invalidate_user(model.user_id)
+
     @action(
         name="generate-qr",
         label="QR-код",
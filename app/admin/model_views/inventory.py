@@ -20,7 +20,7 @@ class InventoryAdmin(
         "created_by_id",
     )
 
-    form_excluded_columns = ("created_at",)
+    form_excluded_columns = ("created_at", "items")
 
     column_labels = {
         "created_by": "Создал (ID сотрудника)",
@@ -13,7 +13,8 @@ class OrderAdmin(
     category = "Отгрузки"
 
     column_list = ("contract_number", "contract_date", "planned_shipment_date")
-    column_details_exclude_list = ("id", "shipment_by_id")
+    column_details_exclude_list = ("id", "shipment_by_id", "change_id")
+    form_excluded_columns = ("change_id",)
 
     column_searchable_list = ("contract_number",)
 
@@ -26,7 +26,13 @@ class PackagingAdmin(
 
     column_list = ("id", "serial_number")
 
-    column_details_exclude_list = ["performed_by_id", "shipment_by_id", "order_id"]
+    column_details_exclude_list = [
+        "performed_by_id",
+        "shipment_by_id",
+        "order_id",
+        "change_id",
+    ]
+    form_excluded_columns = ("change_id",)
 
     can_edit = True
     can_delete = True
@@ -3,6 +3,7 @@ from starlette.requests import Request
 from starlette.responses import RedirectResponse
 
 from app.admin.custom_model_view import CustomModelView
+from app.core.catalog_cache import catalog_cache
 from app.database import Process, db_helper
 from app.database.crud.processes import ProcessRepository
 
@@ -12,6 +13,7 @@ class ProcessAdmin(
     model=Process,
 ):
     repo_type = ProcessRepository
+    catalogs = ("processes", "step_definitions")
     name_plural = "Процессы"
     name = "Процесс"
     category = "Раздел процессов"
@@ -33,6 +35,9 @@ class ProcessAdmin(
         "steps",
     )
 
+    # неограниченные коллекции не грузим в форму редактирования
+    form_excluded_columns = ("products", "order_items")
+
     form_rules = [
         "name",
         "size_type",
@@ -57,5 +62,6 @@ class ProcessAdmin(
             async for session in db_helper.get_session():
                 repo = self.repo_type(session)
                 await repo.copy_process(process_id=int(pks))
+            await catalog_cache.bump(*self.catalogs)
 
         return RedirectResponse(request.url_for("admin:list", identity=self.identity))
@@ -1,7 +1,11 @@
 from app.admin.custom_model_view import CustomModelView
 from app.admin.filters.process import ProcessNameFilter
 from app.admin.utils import format_datetime
-from app.database import Product
+from app.core.result_cache import CacheTag, result_cache
+from app.database import Product, db_helper
+from app.database.crud.daily_finished_counters import DailyFinishedCounterRepository
+from app.database.crud.daily_step_counters import DailyStepCounterRepository
+from app.database.crud.product_progress import ProductProgressRepository
 from app.database.crud.products import ProductRepository
 
 
@@ -43,6 +47,8 @@ class ProductAdmin(
         "packaging": "Упаковка",
     }
 
+    form_excluded_columns = ("change_id",)
+
     form_rules = [
         "serial_number",
         "created_at",
@@ -60,3 +66,34 @@ class ProductAdmin(
     column_formatters = {
         "created_at": format_datetime,
     }
+
+    async def after_model_change(self, data, model, is_created, request) -> None:
+        await super().after_model_change(data, model, is_created, request)
+        # смена статуса меняет учёт изделия в статистике завершённых
+        async for session in db_helper.get_session():
+            await ProductProgressRepository(session).refresh(model.id)
+            await session.commit()
+        await result_cache.invalidate(CacheTag.progress, CacheTag.statistics)
+
+    async def on_model_delete(self, model, request) -> None:
+        # после удаления прогресс и этапы изделия пропадут — запоминаем,
+        # в какие дневные счётчики оно засчитано
+        async for session in db_helper.get_session():
+            request.state.finished_key = await ProductProgressRepository(
+                session
+            ).finished_key(model.id)
+        request.state.step_counter_keys = [
+            DailyStepCounterRepository.key_for(step) for step in model.steps
+        ]
+
+    async def after_model_delete(self, model, request) -> None:
+        await super().after_model_delete(model, request)
+        async for session in db_helper.get_session():
+            finished_key = getattr(request.state, "finished_key", None)
+            if finished_key is not None:
+                await DailyFinishedCounterRepository(session).add(finished_key, -1)
+            await DailyStepCounterRepository(session).recount(
+                *getattr(request.state, "step_counter_keys", [])
+            )
+            await session.commit()
+        await result_cache.invalidate(CacheTag.progress, CacheTag.statistics)
@@ -8,7 +8,10 @@ from app.admin.filters.product_step import (
     ProductStepStatusFilter,
 )
 from app.admin.utils import format_datetime
-from app.database import ProductStep, StepDefinition
+from app.core.result_cache import CacheTag, result_cache
+from app.database import ProductStep, StepDefinition, db_helper
+from app.database.crud.daily_step_counters import DailyStepCounterRepository
+from app.database.crud.product_progress import ProductProgressRepository
 from app.database.crud.products_steps import ProductStepRepository
 
 
@@ -45,6 +48,8 @@ class ProductStepAdmin(
 
     column_filters = [ProductStepPerformerFilter(), ProductStepStatusFilter()]
 
+    form_excluded_columns = ("change_id",)
+
     can_edit = True
     can_delete = True
     can_export = False
@@ -70,3 +75,30 @@ class ProductStepAdmin(
             )
         )
         return await self._get_object_by_pk(stmt)
+
+    async def on_model_change(self, data, model, is_created, request) -> None:
+        # запоминаем счётчик, в который этап был засчитан до правки
+        request.state.old_counter_key = DailyStepCounterRepository.key_for(model)
+
+    async def after_model_change(self, data, model, is_created, request) -> None:
+        await super().after_model_change(data, model, is_created, request)
+        # правка этапа из админки должна отражаться в product_progress
+        # и daily_step_counters
+        async for session in db_helper.get_session():
+            await ProductProgressRepository(session).refresh(model.product_id)
+            await DailyStepCounterRepository(session).recount(
+                getattr(request.state, "old_counter_key", None),
+                DailyStepCounterRepository.key_for(model),
+            )
+            await session.commit()
+        await result_cache.invalidate(CacheTag.progress, CacheTag.statistics)
+
+    async def after_model_delete(self, model, request) -> None:
+        await super().after_model_delete(model, request)
+        async for session in db_helper.get_session():
+            await ProductProgressRepository(session).refresh(model.product_id)
+            await DailyStepCounterRepository(session).recount(
+                DailyStepCounterRepository.key_for(model)
+            )
+            await session.commit()
+        await result_cache.invalidate(CacheTag.progress, CacheTag.statistics)
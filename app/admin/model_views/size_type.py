@@ -8,6 +8,7 @@ class SizeTypeAdmin(
     model=SizeType,
 ):
     repo_type = SizeTypeRepository
+    catalogs = ("processes",)
     name_plural = "Типоразмеры"
     name = "Типоразмер"
     category = "Раздел процессов"
@@ -21,6 +22,8 @@ class SizeTypeAdmin(
         "packaging_count": "Количество в упаковке",
     }
 
+    form_excluded_columns = ("work_process",)
+
     form_create_rules = [
         "name",
         "packaging_count",
@@ -8,6 +8,7 @@ class StepDefinitionAdmin(
     model=StepDefinition,
 ):
     repo_type = StepDefinitionRepository
+    catalogs = ("processes", "step_definitions")
     name_plural = "Этапы"
     name = "Этап"
     category = "Раздел процессов"
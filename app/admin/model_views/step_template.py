@@ -8,6 +8,7 @@ class StepTemplateAdmin(
     model=StepTemplate,
 ):
     repo_type = StepTemplateRepository
+    catalogs = ("processes", "step_definitions")
     name_plural = "Шаблоны этапов"
     name = "Шаблон этапа"
     category = "Раздел процессов"
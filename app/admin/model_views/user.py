@@ -2,6 +2,7 @@ from starlette.requests import Request
 
 from app.admin.custom_model_view import CustomModelView
 from app.admin.utils import check_superuser
+from app.core.auth.token_cache import token_cache
 from app.database.crud.users import UsersRepository
 from app.database.models import User
 
@@ -11,6 +12,7 @@ class UserAdmin(
     model=User,
 ):
     repo_type = UsersRepository
+    catalogs = ("employees",)
     name_plural = "Пользователи"
     name = "Пользователь"
     category = "Пользователи"
@@ -40,6 +42,14 @@ class UserAdmin(
     can_export = False
     can_create = False
 
+    async def after_model_change(self, data, model, is_created, request) -> None:
+        await super().after_model_change(data, model, is_created, request)
+        await token_cache.invalidate_user(model.id)
+
+    async def after_model_delete(self, model, request) -> None:
+        await super().after_model_delete(model, request)
+        await token_cache.invalidate_user(model.id)
+
     def is_visible(self, request: Request) -> bool:
         return check_superuser(request)
 
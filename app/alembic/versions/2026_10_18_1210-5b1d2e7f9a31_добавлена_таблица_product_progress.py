@@ -0,0 +1,94 @@
+"""добавлена таблица product_progress
+
+Revision ID: 5b1d2e7f9a31
+Revises: 83124da12c46
+Create Date: 2026-10-18 12:10:42.518304
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5b1d2e7f9a31"
+down_revision: Union[str, None] = "83124da12c46"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "product_progress",
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("last_done_step_definition_id", sa.Integer(), nullable=True),
+        sa.Column("last_done_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("done_count", sa.Integer(), nullable=False),
+        sa.Column("total_count", sa.Integer(), nullable=False),
+        sa.Column("is_finished", sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["product_id"],
+            ["products.id"],
+            name=op.f("fk_product_progress_product_id_products"),
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["last_done_step_definition_id"],
+            ["step_definitions.id"],
+            name=op.f(
+                "fk_product_progress_last_done_step_definition_id_step_definitions"
+            ),
+            ondelete="SET NULL",
+        ),
+        sa.PrimaryKeyConstraint("product_id", name=op.f("pk_product_progress")),
+    )
+
+    # первичное заполнение по истории этапов
+    op.execute(
+        """
+        INSERT INTO product_progress (
+            product_id,
+            last_done_step_definition_id,
+            last_done_at,
+            done_count,
+            total_count,
+            is_finished
+        )
+        SELECT
+            p.id,
+            last_done.step_definition_id,
+            counts.last_done_at,
+            COALESCE(counts.done_count, 0),
+            COALESCE(counts.total_count, 0),
+            COALESCE(counts.done_count, 0) = COALESCE(counts.total_count, 0)
+        FROM products p
+        LEFT JOIN (
+            SELECT
+                product_id,
+                count(id) AS total_count,
+                count(id) FILTER (WHERE status = 'done') AS done_count,
+                max(performed_at) FILTER (WHERE status = 'done') AS last_done_at
+            FROM product_steps
+            GROUP BY product_id
+        ) counts ON counts.product_id = p.id
+        LEFT JOIN (
+            SELECT DISTINCT ON (ps.product_id)
+                ps.product_id,
+                ps.step_definition_id
+            FROM product_steps ps
+            JOIN step_definitions sd ON sd.id = ps.step_definition_id
+            WHERE ps.status = 'done'
+            ORDER BY
+                ps.product_id,
+                sd."order" DESC,
+                ps.performed_at DESC NULLS LAST,
+                ps.id DESC
+        ) last_done ON last_done.product_id = p.id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("product_progress")
@@ -0,0 +1,75 @@
+"""добавлена таблица daily_step_counters
+
+Revision ID: 9c4e0a7d2b18
+Revises: 5b1d2e7f9a31
+Create Date: 2026-10-18 13:40:05.771920
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9c4e0a7d2b18"
+down_revision: Union[str, None] = "5b1d2e7f9a31"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "daily_step_counters",
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("employee_id", sa.Integer(), nullable=False),
+        sa.Column("step_definition_id", sa.Integer(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["employee_id"],
+            ["employees.id"],
+            name=op.f("fk_daily_step_counters_employee_id_employees"),
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["step_definition_id"],
+            ["step_definitions.id"],
+            name=op.f(
+                "fk_daily_step_counters_step_definition_id_step_definitions"
+            ),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint(
+            "date",
+            "employee_id",
+            "step_definition_id",
+            name=op.f("pk_daily_step_counters"),
+        ),
+    )
+
+    # первичное заполнение по истории этапов (дата — по Москве)
+    op.execute(
+        """
+        INSERT INTO daily_step_counters (
+            date, employee_id, step_definition_id, count
+        )
+        SELECT
+            date(timezone('Europe/Moscow', performed_at)),
+            performed_by_id,
+            step_definition_id,
+            count(id)
+        FROM product_steps
+        WHERE status = 'done'
+          AND performed_at IS NOT NULL
+          AND performed_by_id IS NOT NULL
+        GROUP BY
+            date(timezone('Europe/Moscow', performed_at)),
+            performed_by_id,
+            step_definition_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("daily_step_counters")
@@ -0,0 +1,72 @@
+"""индексы product_steps
+
+Revision ID: e41f6c2a8d57
+Revises: 9c4e0a7d2b18
+Create Date: 2026-10-18 15:00:12.408311
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e41f6c2a8d57"
+down_revision: Union[str, None] = "9c4e0a7d2b18"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # product_steps — самая большая таблица: индексы строятся без блокировки
+    # записи, вне транзакции миграции
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_product_steps_product_id_status",
+            "product_steps",
+            ["product_id", "status"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_product_steps_step_def_performer_performed_at",
+            "product_steps",
+            ["step_definition_id", "performed_by_id", "performed_at"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_product_steps_performed_at",
+            "product_steps",
+            ["performed_at"],
+            unique=False,
+            postgresql_where=sa.text("performed_at IS NOT NULL"),
+            postgresql_include=[
+                "status",
+                "product_id",
+                "step_definition_id",
+                "performed_by_id",
+            ],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_product_steps_performed_at",
+            table_name="product_steps",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_product_steps_step_def_performer_performed_at",
+            table_name="product_steps",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_product_steps_product_id_status",
+            table_name="product_steps",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,127 @@
+"""синхронизация: change_id и sync_tombstones
+
+Revision ID: 3f8a1c9d0b72
+Revises: e41f6c2a8d57
+Create Date: 2026-10-18 16:30:41.117902
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3f8a1c9d0b72"
+down_revision: Union[str, None] = "e41f6c2a8d57"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SYNCED_TABLES = (
+    "products",
+    "product_steps",
+    "daily_plans",
+    "daily_plan_steps",
+    "packaging",
+    "orders",
+    "order_items",
+)
+CURRENT_CHANGE = sa.text("pg_current_xact_id()::text::bigint")
+
+# отметки об удалении пишет БД: так они появляются и при каскадном удалении
+# (ON DELETE CASCADE), и при массовом delete(), которые ORM не видит
+TOMBSTONE_FUNCTION = """
+CREATE FUNCTION sync_write_tombstones() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO sync_tombstones (entity, entity_id)
+    SELECT TG_TABLE_NAME, deleted.id FROM deleted;
+    RETURN NULL;
+END
+$$
+"""
+TOMBSTONE_TRIGGER = """
+CREATE TRIGGER trg_{table}_sync_tombstones
+AFTER DELETE ON {table}
+REFERENCING OLD TABLE AS deleted
+FOR EACH STATEMENT EXECUTE FUNCTION sync_write_tombstones()
+"""
+
+
+def upgrade() -> None:
+    for table in SYNCED_TABLES:
+        # существующие строки получают 0 (без перезаписи таблицы) и попадают
+        # в первую полную выгрузку; новые — номер своей транзакции
+        op.add_column(
+            table,
+            sa.Column(
+                "change_id",
+                sa.BigInteger(),
+                nullable=False,
+                server_default=sa.text("0"),
+            ),
+        )
+        op.alter_column(table, "change_id", server_default=CURRENT_CHANGE)
+
+    op.create_table(
+        "sync_tombstones",
+        sa.Column("entity", sa.String(), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "change_id",
+            sa.BigInteger(),
+            server_default=CURRENT_CHANGE,
+            nullable=False,
+        ),
+        sa.Column(
+            "deleted_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_sync_tombstones")),
+    )
+    op.create_index(
+        op.f("ix_sync_tombstones_change_id"),
+        "sync_tombstones",
+        ["change_id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_sync_tombstones_id"), "sync_tombstones", ["id"], unique=True
+    )
+
+    op.execute(TOMBSTONE_FUNCTION)
+    for table in SYNCED_TABLES:
+        op.execute(TOMBSTONE_TRIGGER.format(table=table))
+
+    # индексы больших таблиц строятся без блокировки записи
+    with op.get_context().autocommit_block():
+        for table in SYNCED_TABLES:
+            op.create_index(
+                op.f(f"ix_{table}_change_id"),
+                table,
+                ["change_id"],
+                unique=False,
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table in reversed(SYNCED_TABLES):
+            op.drop_index(
+                op.f(f"ix_{table}_change_id"),
+                table_name=table,
+                postgresql_concurrently=True,
+            )
+    for table in reversed(SYNCED_TABLES):
+        op.execute(f"DROP TRIGGER trg_{table}_sync_tombstones ON {table}")
+    op.execute("DROP FUNCTION sync_write_tombstones()")
+    op.drop_index(op.f("ix_sync_tombstones_id"), table_name="sync_tombstones")
+    op.drop_index(op.f("ix_sync_tombstones_change_id"), table_name="sync_tombstones")
+    op.drop_table("sync_tombstones")
+    for table in reversed(SYNCED_TABLES):
+        op.drop_column(table, "change_id")
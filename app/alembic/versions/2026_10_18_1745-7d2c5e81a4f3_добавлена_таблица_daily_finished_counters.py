@@ -0,0 +1,84 @@
+"""добавлена таблица daily_finished_counters
+
+Revision ID: 7d2c5e81a4f3
+Revises: 3f8a1c9d0b72
+Create Date: 2026-10-18 17:45:08.532190
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7d2c5e81a4f3"
+down_revision: Union[str, None] = "3f8a1c9d0b72"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "product_progress", sa.Column("finished_on", sa.Date(), nullable=True)
+    )
+    op.add_column(
+        "product_progress",
+        sa.Column("finished_process_id", sa.Integer(), nullable=True),
+    )
+    op.create_table(
+        "daily_finished_counters",
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("process_id", sa.Integer(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["process_id"],
+            ["processes.id"],
+            name=op.f("fk_daily_finished_counters_process_id_processes"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint(
+            "date",
+            "process_id",
+            name=op.f("pk_daily_finished_counters"),
+        ),
+    )
+
+    # ключ учёта завершённых изделий: дата (по Москве) закрытия последнего
+    # по порядку этапа и техпроцесс, только для изделий в статусе normal
+    op.execute(
+        """
+        UPDATE product_progress pp
+        SET finished_on = date(timezone('Europe/Moscow', last_step.performed_at)),
+            finished_process_id = p.process_id
+        FROM products p,
+        LATERAL (
+            SELECT ps.performed_at
+            FROM product_steps ps
+            JOIN step_definitions sd ON sd.id = ps.step_definition_id
+            WHERE ps.product_id = p.id AND ps.status = 'done'
+            ORDER BY sd."order" DESC, ps.performed_at DESC NULLS LAST, ps.id DESC
+            LIMIT 1
+        ) last_step
+        WHERE p.id = pp.product_id
+          AND pp.is_finished
+          AND p.status = 'normal'
+          AND last_step.performed_at IS NOT NULL
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO daily_finished_counters (date, process_id, count)
+        SELECT finished_on, finished_process_id, count(product_id)
+        FROM product_progress
+        WHERE finished_on IS NOT NULL
+        GROUP BY finished_on, finished_process_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("daily_finished_counters")
+    op.drop_column("product_progress", "finished_process_id")
+    op.drop_column("product_progress", "finished_on")
@@ -0,0 +1,55 @@
+"""формат резервных копий
+
+Revision ID: b41e6f0c2a95
+Revises: 7d2c5e81a4f3
+Create Date: 2026-10-18 19:00:41.117305
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "b41e6f0c2a95"
+down_revision: Union[str, None] = "7d2c5e81a4f3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+backup_kind_enum = postgresql.ENUM("custom", "directory", name="backup_kind_enum")
+
+
+def upgrade() -> None:
+    backup_kind_enum.create(op.get_bind(), checkfirst=True)
+
+    op.add_column(
+        "backups",
+        sa.Column(
+            "kind",
+            backup_kind_enum,
+            nullable=False,
+            server_default="custom",
+        ),
+    )
+    op.alter_column(
+        "backups",
+        "name",
+        existing_type=sa.String(length=50),
+        type_=sa.String(length=100),
+        existing_nullable=False,
+    )
+
+
+def downgrade() -> None:
+    op.alter_column(
+        "backups",
+        "name",
+        existing_type=sa.String(length=100),
+        type_=sa.String(length=50),
+        existing_nullable=False,
+    )
+    op.drop_column("backups", "kind")
+    backup_kind_enum.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,55 @@
+"""change_id дневных счётчиков
+
+Revision ID: 5a9d3e7c1f24
+Revises: b41e6f0c2a95
+Create Date: 2026-10-18 20:00:12.504318
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5a9d3e7c1f24"
+down_revision: Union[str, None] = "b41e6f0c2a95"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CURRENT_CHANGE = sa.text("pg_current_xact_id()::text::bigint")
+
+
+def upgrade() -> None:
+    # существующие строки получают 0 (без перезаписи таблицы): их этапы
+    # плана уже отданы /sync с прежним change_id
+    op.add_column(
+        "daily_step_counters",
+        sa.Column(
+            "change_id",
+            sa.BigInteger(),
+            nullable=False,
+            server_default=sa.text("0"),
+        ),
+    )
+    op.alter_column("daily_step_counters", "change_id", server_default=CURRENT_CHANGE)
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f("ix_daily_step_counters_change_id"),
+            "daily_step_counters",
+            ["change_id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            op.f("ix_daily_step_counters_change_id"),
+            table_name="daily_step_counters",
+            postgresql_concurrently=True,
+        )
+    op.drop_column("daily_step_counters", "change_id")
@@ -1,6 +1,9 @@
 from fastapi import APIRouter
+from starlette.responses import PlainTextResponse
 
 from app.core import settings
+from app.database import db_helper
+from app.database.sql_metrics import sql_metrics
 
 from .api_v1 import router as router_api_v1
 
@@ -15,3 +18,12 @@ router.include_router(
 @router.get("/health", status_code=200)
 async def health_check() -> dict[str, str]:
     return {"status": "ok", "service": "calendar-api"}
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> PlainTextResponse:
+    # формат экспозиции Prometheus
+    return PlainTextResponse(
+        sql_metrics.render(db_helper.pool_status()),
+        media_type="text/plain; version=0.0.4",
+    )
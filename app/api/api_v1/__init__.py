@@ -14,6 +14,8 @@ from .step_definitions import router as step_definitions_router
 from .orders import router as orders_router
 from .update import router as updates_router
 from .inventory import router as inventory_router
+from .progress import router as progress_router
+from .sync import router as sync_router
 
 http_bearer = HTTPBearer(auto_error=False)
 
@@ -36,3 +38,5 @@ router.include_router(router=step_definitions_router)
 router.include_router(router=orders_router)
 router.include_router(router=updates_router)
 router.include_router(router=inventory_router)
+router.include_router(router=progress_router)
+router.include_router(router=sync_router)
@@ -1,25 +1,101 @@
-from typing import Annotated
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Annotated, Any
 
 from fastapi import HTTPException, Depends
+from fastapi_users.exceptions import UserNotExists
 from starlette import status
 
-from app.api.api_v1.fastapi_users import current_user
+from app.api.dependencies.access_tokens import get_access_token_db
+from app.api.dependencies.user_manager import get_user_manager
+from app.core import settings
+from app.core.auth.token_cache import token_cache
+from app.core.auth.transport import bearer_transport
+from app.core.auth.user_manager import UserManager
 from app.database.crud.employees import EmployeeRepository, get_employee_repo
-from app.database.models import User
 from app.database.models.employee import Role
 from app.database.schemas.employee import EmployeeRead
+from app.database.schemas.user import UserRead
+
+if TYPE_CHECKING:
+    from app.database.models import User
+
+
+async def _verified_user(
+    token: str, access_token_db: Any, user_manager: UserManager
+) -> tuple[Any, "User"]:
+    """Токен и пользователь из БД — проверки `current_user`."""
+    max_age = datetime.now(tz=timezone.utc) - timedelta(
+        seconds=settings.access_token.lifetime_seconds
+    )
+    access_token = await access_token_db.get_by_token(token, max_age)
+    if access_token is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    try:
+        user = await user_manager.get(access_token.user_id)
+    except UserNotExists:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    if not user.is_active:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    if not user.is_verified:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+    return access_token, user
+
+
+async def get_current_user(
+    token: Annotated[str | None, Depends(bearer_transport.scheme)],
+    access_token_db: Annotated[Any, Depends(get_access_token_db)],
+    user_manager: Annotated[UserManager, Depends(get_user_manager)],
+) -> UserRead:
+    """
+    Активный верифицированный пользователь по bearer-токену.
+
+    То же, что `current_user`, но через кэш токенов: профиль сотрудника не
+    требуется (справочники доступны любому пользователю), а при попадании
+    в кэш запросов к БД нет.
+    """
+    if token is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+
+    if user := await token_cache.get_user(token):
+        return user
+
+    access_token, user = await _verified_user(token, access_token_db, user_manager)
+    user_read = UserRead.model_validate(user, from_attributes=True)
+    await token_cache.set_user(
+        token, user_read, ttl=token_cache.ttl_for(access_token.created_at)
+    )
+    return user_read
 
 
 async def get_current_employee(
-    user: Annotated[User, Depends(current_user)],
+    token: Annotated[str | None, Depends(bearer_transport.scheme)],
+    access_token_db: Annotated[Any, Depends(get_access_token_db)],
+    user_manager: Annotated[UserManager, Depends(get_user_manager)],
     employee_repo: Annotated[EmployeeRepository, Depends(get_employee_repo)],
 ) -> EmployeeRead:
+    """
+    Сотрудник по bearer-токену.
+
+    Сначала смотрит в кэш Redis; при промахе делает те же проверки, что и
+    `current_user` (токен жив, пользователь активен и верифицирован), и
+    кладёт результат в кэш.
+    """
+    if token is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+
+    if employee := await token_cache.get(token):
+        return employee
+
+    access_token, user = await _verified_user(token, access_token_db, user_manager)
     employee = await employee_repo.get_by_user_id(user.id)
     if employee is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Профиль сотрудника для данного пользователя не найден",
         )
+    await token_cache.set(
+        token, employee, ttl=token_cache.ttl_for(access_token.created_at)
+    )
     return employee
 
 
@@ -1,10 +1,14 @@
 from typing import List, Annotated
 
+import orjson
 from fastapi import APIRouter, HTTPException, Depends
 from starlette import status
+from starlette.requests import Request
+from starlette.responses import Response
 
 from app.api.api_v1.dependencies import get_current_employee
 from app.core import settings
+from app.core.catalog_cache import catalog_cache
 from app.database.crud.employees import EmployeeRepository, get_employee_repo
 from app.database.schemas.employee import EmployeeRead
 from database.models.employee import Role
@@ -21,15 +25,23 @@ router = APIRouter(
     status_code=status.HTTP_200_OK,
 )
 async def get_employees(
+    request: Request,
     repo: Annotated[EmployeeRepository, Depends(get_employee_repo)],
     employee: Annotated[EmployeeRead, Depends(get_current_employee)],
-) -> List[EmployeeRead]:
-    try:
+) -> Response:
+    async def build() -> bytes:
         if employee.role == Role.master:
             employees = await repo.get_all()
         else:
             employees = [await repo.get_by_id(employee.id)]
-        return [EmployeeRead.model_validate(e) for e in employees]
+        return orjson.dumps(
+            [EmployeeRead.model_validate(e).model_dump(mode="json") for e in employees]
+        )
+
+    # мастер видит всех, остальные — только себя
+    variant = "all" if employee.role == Role.master else f"employee-{employee.id}"
+    try:
+        return await catalog_cache.response(request, "employees", build, variant)
 
     except HTTPException as exc:
         raise exc
@@ -1,18 +1,29 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException
 from starlette import status
+from starlette.responses import StreamingResponse
 
 from app.api.api_v1.dependencies import require_admin_or_master
+from app.api.api_v1.pagination import (
+    CursorQuery,
+    LimitQuery,
+    DEFAULT_PAGE_SIZE,
+    ndjson_export,
+)
 from app.core import settings
 from app.database.crud.inventory import InventoryRepository, get_inventory_repo
 from app.database.schemas.employee import EmployeeRead
+from app.database.schemas.page import Page
 from app.database.schemas.inventory import (
     InventoryRead,
     InventoryItemRead,
     InventoryCompareResultRead,
     InventoryListItemOut,
     AddInventoryItemRequest,
+    InventoryItemBatchIn,
+    InventoryItemBatchResultRead,
+    INVENTORY_BATCH_MAX_ITEMS,
 )
 
 router = APIRouter(
@@ -131,6 +142,32 @@ async def add_inventory_item(
         )
 
 
+@router.post(
+    "/{inventory_id}/items/batch",
+    response_model=list[InventoryItemBatchResultRead],
+    status_code=status.HTTP_200_OK,
+)
+async def add_inventory_items_batch(
+    inventory_id: int,
+    items: Annotated[
+        list[InventoryItemBatchIn], Body(max_length=INVENTORY_BATCH_MAX_ITEMS)
+    ],
+    repo: Annotated[InventoryRepository, Depends(get_inventory_repo)],
+    employee: Annotated[EmployeeRead, Depends(require_admin_or_master)],
+) -> list[InventoryItemBatchResultRead]:
+    """Пакет сканов с устройства; повторная отправка того же пакета безопасна."""
+    try:
+        results = await repo.add_items_batch(inventory_id=inventory_id, items=items)
+        return [InventoryItemBatchResultRead.model_validate(r) for r in results]
+    except HTTPException:
+        raise
+    except Exception:
+        raise HTTPException(
+            status_code=500,
+            detail="Произошла внутренняя ошибка при добавлении позиций",
+        )
+
+
 @router.delete(
     "/{inventory_id}/items/{serial_number}",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -177,6 +214,52 @@ async def get_inventory_items(
         )
 
 
+@router.get(
+    "/{inventory_id}/items/page",
+    response_model=Page[InventoryItemRead],
+    status_code=status.HTTP_200_OK,
+)
+async def get_inventory_items_page(
+    inventory_id: int,
+    repo: Annotated[InventoryRepository, Depends(get_inventory_repo)],
+    employee: Annotated[EmployeeRead, Depends(require_admin_or_master)],
+    limit: LimitQuery = DEFAULT_PAGE_SIZE,
+    cursor: CursorQuery = None,
+) -> Page[InventoryItemRead]:
+    try:
+        items, next_cursor = await repo.get_items_page(
+            inventory_id, cursor=cursor, limit=limit
+        )
+        return Page[InventoryItemRead](
+            items=[InventoryItemRead.model_validate(i) for i in items],
+            next_cursor=next_cursor,
+        )
+    except HTTPException:
+        raise
+    except Exception:
+        raise HTTPException(
+            status_code=500,
+            detail="Произошла внутренняя ошибка при получении позиций инвентаризации",
+        )
+
+
+@router.get("/{inventory_id}/items/export", status_code=status.HTTP_200_OK)
+async def export_inventory_items(
+    inventory_id: int,
+    repo: Annotated[InventoryRepository, Depends(get_inventory_repo)],
+    employee: Annotated[EmployeeRead, Depends(require_admin_or_master)],
+) -> StreamingResponse:
+    # после начала потока статус уже не поменять: 404 — до выгрузки
+    await repo.get_inventory_by_id(inventory_id)
+
+    async def load_page(session, cursor, limit):
+        return await InventoryRepository(session).get_items_page(
+            inventory_id, cursor=cursor, limit=limit
+        )
+
+    return ndjson_export(load_page, InventoryItemRead)
+
+
 # ---------- Compare ----------
 
 
@@ -200,3 +283,33 @@ async def compare_inventory(
             status_code=500,
             detail="Произошла внутренняя ошибка при сравнении инвентаризации",
         )
+
+
+@router.post(
+    "/{inventory_id}/compare/page",
+    response_model=Page[InventoryCompareResultRead],
+    status_code=status.HTTP_200_OK,
+)
+async def compare_inventory_page(
+    inventory_id: int,
+    repo: Annotated[InventoryRepository, Depends(get_inventory_repo)],
+    employee: Annotated[EmployeeRead, Depends(require_admin_or_master)],
+    limit: LimitQuery = DEFAULT_PAGE_SIZE,
+    cursor: CursorQuery = None,
+) -> Page[InventoryCompareResultRead]:
+    """Сверка порциями: одна страница — `limit` этапов (step_definition)."""
+    try:
+        raw_results, next_cursor = await repo.compare_page(
+            inventory_id, cursor=cursor, limit=limit
+        )
+        return Page[InventoryCompareResultRead](
+            items=[InventoryCompareResultRead.model_validate(i) for i in raw_results],
+            next_cursor=next_cursor,
+        )
+    except HTTPException:
+        raise
+    except Exception:
+        raise HTTPException(
+            status_code=500,
+            detail="Произошла внутренняя ошибка при сравнении инвентаризации",
+        )
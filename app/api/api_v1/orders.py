@@ -2,6 +2,8 @@ from typing import Annotated
 
 from fastapi import APIRouter, HTTPException, Depends
 from starlette import status
+from fastapi.responses import ORJSONResponse
+from starlette.responses import StreamingResponse
 
 from app.core import settings
 from app.database.crud.orders import OrderRepository, get_order_repo
@@ -10,11 +12,20 @@ from app.database.schemas.order import (
     OrderCreate,
     OrderUpdate,
     OrderItemCreate,
-    OrderClose
+    OrderClose,
+    OrderViewRead,
 )
 from app.database.schemas.employee import EmployeeRead
+from app.database.schemas.page import Page
+from app.database.schemas.read_view import ReadView
 
 from app.api.api_v1.dependencies import get_current_employee, require_admin_or_master
+from app.api.api_v1.pagination import (
+    CursorQuery,
+    LimitQuery,
+    DEFAULT_PAGE_SIZE,
+    ndjson_export,
+)
 
 
 router = APIRouter(
@@ -25,15 +36,18 @@ router = APIRouter(
 
 @router.get(
     "/get_all_orders",
-    response_model=list[OrderRead],
+    response_model=list[OrderViewRead],
     status_code=status.HTTP_200_OK,
 )
 async def get_all_orders(
         repo: Annotated[OrderRepository, Depends(get_order_repo)],
         employee: Annotated[EmployeeRead, Depends(get_current_employee)],
-) -> list[OrderRead]:
+        view: ReadView = ReadView.full,
+) -> list[OrderRead] | ORJSONResponse:
     try:
-        orders = await repo.get_all()
+        orders = await repo.get_all(view=view)
+        if view != ReadView.full:
+            return ORJSONResponse(orders)
         return [OrderRead.model_validate(p) for p in orders]
     except HTTPException as exc:
         raise exc
@@ -44,6 +58,42 @@ async def get_all_orders(
         )
 
 
+@router.get(
+    "/page",
+    response_model=Page[OrderRead],
+    status_code=status.HTTP_200_OK,
+)
+async def get_orders_page(
+        repo: Annotated[OrderRepository, Depends(get_order_repo)],
+        employee: Annotated[EmployeeRead, Depends(get_current_employee)],
+        limit: LimitQuery = DEFAULT_PAGE_SIZE,
+        cursor: CursorQuery = None,
+) -> Page[OrderRead]:
+    try:
+        orders, next_cursor = await repo.get_page(cursor=cursor, limit=limit)
+        return Page[OrderRead](
+            items=[OrderRead.model_validate(p) for p in orders],
+            next_cursor=next_cursor,
+        )
+    except HTTPException as exc:
+        raise exc
+    except Exception:
+        raise HTTPException(
+            status_code=500,
+            detail="Произошла внутренняя ошибка при получении заказов",
+        )
+
+
+@router.get("/export", status_code=status.HTTP_200_OK)
+async def export_orders(
+        employee: Annotated[EmployeeRead, Depends(get_current_employee)],
+) -> StreamingResponse:
+    async def load_page(session, cursor, limit):
+        return await OrderRepository(session).get_page(cursor=cursor, limit=limit)
+
+    return ndjson_export(load_page, OrderRead)
+
+
 @router.post(
     "",
     response_model=OrderRead,
@@ -138,15 +188,18 @@ async def close_order(
 
 @router.get(
     "/{order_id}",
-    response_model=OrderRead,
+    response_model=OrderViewRead,
     status_code=status.HTTP_200_OK,
 )
 async def get_order(
         order_id: int,
         repo: Annotated[OrderRepository, Depends(get_order_repo)],
         employee: Annotated[EmployeeRead, Depends(get_current_employee)],
-) -> OrderRead:
+        view: ReadView = ReadView.full,
+) -> OrderRead | ORJSONResponse:
     try:
+        if view != ReadView.full:
+            return ORJSONResponse(await repo.get_view(view, order_id))
         order = await repo.get_by_id(obj_id=order_id)
         return OrderRead.model_validate(order)
     except HTTPException as exc:
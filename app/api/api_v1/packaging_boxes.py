@@ -2,16 +2,27 @@ from typing import Annotated, List
 
 from fastapi import APIRouter, HTTPException, Depends
 from starlette import status
+from fastapi.responses import ORJSONResponse
+from starlette.responses import StreamingResponse
 
 from app.api.api_v1.dependencies import get_current_employee, require_admin_or_master
+from app.api.api_v1.pagination import (
+    CursorQuery,
+    LimitQuery,
+    DEFAULT_PAGE_SIZE,
+    ndjson_export,
+)
 from app.core import settings
 from app.database.crud.packaging_box import get_packaging_repo, PackagingRepository
 from app.database.models import Packaging
 from app.database.schemas.employee import EmployeeRead
+from app.database.schemas.page import Page
+from app.database.schemas.read_view import ReadView
 from app.database.schemas.packaging_box import (
     PackagingRead,
     PackagingCreate,
     PackagingCreateWithProducts,
+    PackagingViewRead,
 )
 
 router = APIRouter(
@@ -50,15 +61,20 @@ async def create_packaging(
 
 @router.get(
     "/by_serial/{serial_number}",
-    response_model=PackagingRead,
+    response_model=PackagingViewRead,
     status_code=status.HTTP_200_OK,
 )
 async def get_packaging(
     serial_number: str,
     repo: Annotated[PackagingRepository, Depends(get_packaging_repo)],
     employee: Annotated[EmployeeRead, Depends(get_current_employee)],
-) -> PackagingRead:
+    view: ReadView = ReadView.full,
+) -> PackagingRead | ORJSONResponse:
     try:
+        if view != ReadView.full:
+            return ORJSONResponse(
+                await repo.get_view(view, serial_number=serial_number)
+            )
         packaging = await repo.get(serial_number=serial_number)
         return PackagingRead.model_validate(packaging)
     except HTTPException as exc:
@@ -72,15 +88,18 @@ async def get_packaging(
 
 @router.get(
     "/get_in_storage",
-    response_model=list[PackagingRead],
+    response_model=list[PackagingViewRead],
     status_code=status.HTTP_200_OK,
 )
 async def get_all_in_storage(
     repo: Annotated[PackagingRepository, Depends(get_packaging_repo)],
     employee: Annotated[EmployeeRead, Depends(get_current_employee)],
-) -> list[PackagingRead]:
+    view: ReadView = ReadView.full,
+) -> list[PackagingRead] | ORJSONResponse:
     try:
-        packaging_boxes = await repo.get_all_excluding_closed_orders()
+        packaging_boxes = await repo.get_all_excluding_closed_orders(view=view)
+        if view != ReadView.full:
+            return ORJSONResponse(packaging_boxes)
         return [PackagingRead.model_validate(p) for p in packaging_boxes]
     except HTTPException as exc:
         raise exc
@@ -91,6 +110,46 @@ async def get_all_in_storage(
         )
 
 
+@router.get(
+    "/get_in_storage/page",
+    response_model=Page[PackagingRead],
+    status_code=status.HTTP_200_OK,
+)
+async def get_in_storage_page(
+    repo: Annotated[PackagingRepository, Depends(get_packaging_repo)],
+    employee: Annotated[EmployeeRead, Depends(get_current_employee)],
+    limit: LimitQuery = DEFAULT_PAGE_SIZE,
+    cursor: CursorQuery = None,
+) -> Page[PackagingRead]:
+    try:
+        packaging_boxes, next_cursor = await repo.get_excluding_closed_orders_page(
+            cursor=cursor, limit=limit
+        )
+        return Page[PackagingRead](
+            items=[PackagingRead.model_validate(p) for p in packaging_boxes],
+            next_cursor=next_cursor,
+        )
+    except HTTPException as exc:
+        raise exc
+    except Exception:
+        raise HTTPException(
+            status_code=500,
+            detail="Произошла внутренняя ошибка при получении списка упаковок",
+        )
+
+
+@router.get("/get_in_storage/export", status_code=status.HTTP_200_OK)
+async def export_in_storage(
+    employee: Annotated[EmployeeRead, Depends(get_current_employee)],
+) -> StreamingResponse:
+    async def load_page(session, cursor, limit):
+        return await PackagingRepository(session).get_excluding_closed_orders_page(
+            cursor=cursor, limit=limit
+        )
+
+    return ndjson_export(load_page, PackagingRead)
+
+
 @router.get(
     "/get_all_shipped",
     response_model=list[PackagingRead],
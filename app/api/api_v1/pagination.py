@@ -0,0 +1,53 @@
+from typing import Annotated, Any, Awaitable, Callable, AsyncIterator
+
+import orjson
+from fastapi import Query
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.responses import StreamingResponse
+
+from app.database import db_helper
+from app.database.sql_metrics import restart_sql_budget
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+EXPORT_CHUNK_SIZE = 200
+
+LimitQuery = Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)]
+CursorQuery = Annotated[str | None, Query()]
+
+# (session, cursor, limit) -> (объекты страницы, next_cursor)
+PageLoader = Callable[
+    [AsyncSession, str | None, int], Awaitable[tuple[list[Any], str | None]]
+]
+
+
+async def _iter_ndjson(
+    load_page: PageLoader,
+    schema: type[BaseModel],
+) -> AsyncIterator[bytes]:
+    cursor = None
+    while True:
+        # бюджет БД считается на порцию, а не на всю выгрузку
+        restart_sql_budget()
+        # своя сессия на каждую порцию: сессия из зависимости к моменту
+        # отправки тела ответа уже закрыта, а соединение не держим между порциями
+        async for session in db_helper.get_session():
+            items, cursor = await load_page(session, cursor, EXPORT_CHUNK_SIZE)
+            chunk = b"".join(
+                orjson.dumps(schema.model_validate(item).model_dump(mode="json"))
+                + b"\n"
+                for item in items
+            )
+        if chunk:
+            yield chunk
+        if cursor is None:
+            break
+
+
+def ndjson_export(load_page: PageLoader, schema: type[BaseModel]) -> StreamingResponse:
+    """Выгрузка в NDJSON порциями по keyset-курсору: память не растёт с таблицей."""
+    return StreamingResponse(
+        _iter_ndjson(load_page, schema),
+        media_type="application/x-ndjson",
+    )
@@ -1,14 +1,17 @@
-from typing import List, Annotated, Sequence
+from typing import List, Annotated
 
+import orjson
 from fastapi import APIRouter, HTTPException, Depends
 from starlette import status
+from starlette.requests import Request
+from starlette.responses import Response
 
-from app.api.api_v1.fastapi_users import current_user
+from app.api.api_v1.dependencies import get_current_user
 from app.core import settings
-from app.database import Process
+from app.core.catalog_cache import catalog_cache
 from app.database.crud.processes import ProcessRepository, get_process_repo
-from app.database.models import User
 from app.database.schemas.detailed import ProcessRead
+from app.database.schemas.user import UserRead
 
 router = APIRouter(
     tags=["Processes"],
@@ -22,11 +25,18 @@ router = APIRouter(
     status_code=status.HTTP_200_OK,
 )
 async def get_processes(
+    request: Request,
     repo: Annotated[ProcessRepository, Depends(get_process_repo)],
-    user: Annotated[User, Depends(current_user)],
-) -> Sequence[Process]:
+    user: Annotated[UserRead, Depends(get_current_user)],
+) -> Response:
+    async def build() -> bytes:
+        processes = await repo.get_catalog()
+        return orjson.dumps(
+            [ProcessRead.model_validate(p).model_dump(mode="json") for p in processes]
+        )
+
     try:
-        return await repo.get_all()
+        return await catalog_cache.response(request, "processes", build)
     except HTTPException as exc:
         # пробрасываем 404 и другие осознанные HTTP-ошибки
         raise exc
@@ -5,8 +5,16 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.exc import IntegrityError
 from starlette import status
+from fastapi.responses import ORJSONResponse
+from starlette.responses import StreamingResponse
 
 from app.api.api_v1.dependencies import get_current_employee, require_admin_or_master
+from app.api.api_v1.pagination import (
+    CursorQuery,
+    LimitQuery,
+    DEFAULT_PAGE_SIZE,
+    ndjson_export,
+)
 from app.core import settings
 from app.database.crud.daily_plans import DailyPlanRepository, get_daily_plan_repo
 from app.database.crud.processes import ProcessRepository, get_process_repo
@@ -14,11 +22,15 @@ from app.database.crud.products import ProductRepository, get_product_repo
 from app.database.models.employee import Role
 from app.database.models.product import ProductStatus
 from app.database.schemas.employee import EmployeeRead
+from app.database.schemas.page import Page
+from app.database.schemas.read_view import ReadView
 from app.database.schemas.product import (
     ProductRead,
     ProductCreate,
     ProductsCountByLastStepRead,
     ProductShortRead,
+    ProductShortViewRead,
+    ProductViewRead,
 )
 from app.database.schemas.statistics import (
     PeriodStatisticsRead,
@@ -94,15 +106,20 @@ async def create_product(
 
 @router.get(
     "/by-serial/{serial_number}",
-    response_model=ProductRead,
+    response_model=ProductViewRead,
     status_code=status.HTTP_200_OK,
 )
 async def get_product(
     serial_number: str,
     repo: Annotated[ProductRepository, Depends(get_product_repo)],
     employee: Annotated[EmployeeRead, Depends(get_current_employee)],
-) -> ProductRead:
+    view: ReadView = ReadView.full,
+) -> ProductRead | ORJSONResponse:
     try:
+        if view != ReadView.full:
+            return ORJSONResponse(
+                await repo.get_view(view, serial_number=serial_number)
+            )
         product = await repo.get(serial_number=serial_number)
         return ProductRead.model_validate(product)
     except HTTPException as exc:
@@ -137,19 +154,22 @@ async def get_products_stats_by_last_done_step(
 
 @router.get(
     "/finished",
-    response_model=list[ProductShortRead],
+    response_model=list[ProductShortViewRead],
     status_code=status.HTTP_200_OK,
 )
 async def get_finished_products(
     repo: Annotated[ProductRepository, Depends(get_product_repo)],
     employee: Annotated[EmployeeRead, Depends(get_current_employee)],
-) -> list[ProductShortRead]:
+    view: ReadView = ReadView.full,
+) -> list[ProductShortRead] | ORJSONResponse:
     try:
         employee_id = None
         if employee.role not in [Role.admin, Role.master]:
             employee_id = employee.id
 
-        products = await repo.get_finished_products(employee_id=employee_id)
+        products = await repo.get_finished_products(employee_id=employee_id, view=view)
+        if view != ReadView.full:
+            return ORJSONResponse(products)
         return [ProductShortRead.model_validate(p) for p in products]
     except HTTPException as exc:
         raise exc
@@ -160,6 +180,54 @@ async def get_finished_products(
         )
 
 
+@router.get(
+    "/finished/page",
+    response_model=Page[ProductShortRead],
+    status_code=status.HTTP_200_OK,
+)
+async def get_finished_products_page(
+    repo: Annotated[ProductRepository, Depends(get_product_repo)],
+    employee: Annotated[EmployeeRead, Depends(get_current_employee)],
+    limit: LimitQuery = DEFAULT_PAGE_SIZE,
+    cursor: CursorQuery = None,
+) -> Page[ProductShortRead]:
+    try:
+        employee_id = None
+        if employee.role not in [Role.admin, Role.master]:
+            employee_id = employee.id
+
+        products, next_cursor = await repo.get_finished_products_page(
+            employee_id=employee_id, cursor=cursor, limit=limit
+        )
+        return Page[ProductShortRead](
+            items=[ProductShortRead.model_validate(p) for p in products],
+            next_cursor=next_cursor,
+        )
+    except HTTPException as exc:
+        raise exc
+    except Exception:
+        raise HTTPException(
+            status_code=500,
+            detail="Произошла внутренняя ошибка при получении списка завершённых продуктов",
+        )
+
+
+@router.get("/finished/export", status_code=status.HTTP_200_OK)
+async def export_finished_products(
+    employee: Annotated[EmployeeRead, Depends(get_current_employee)],
+) -> StreamingResponse:
+    employee_id = None
+    if employee.role not in [Role.admin, Role.master]:
+        employee_id = employee.id
+
+    async def load_page(session, cursor, limit):
+        return await ProductRepository(session).get_finished_products_page(
+            employee_id=employee_id, cursor=cursor, limit=limit
+        )
+
+    return ndjson_export(load_page, ProductShortRead)
+
+
 @router.get(
     "/statistics/period",
     response_model=PeriodStatisticsRead,
@@ -201,7 +269,7 @@ async def get_period_statistics(
 
 @router.get(
     "/by-step-employee-day",
-    response_model=list[ProductRead],
+    response_model=list[ProductViewRead],
     status_code=status.HTTP_200_OK,
 )
 async def get_products_by_step_employee_day(
@@ -210,7 +278,8 @@ async def get_products_by_step_employee_day(
     repo: Annotated[ProductRepository, Depends(get_product_repo)],
     employee: Annotated[EmployeeRead, Depends(get_current_employee)],
     employee_id: int | None = None,
-) -> list[ProductRead]:
+    view: ReadView = ReadView.full,
+) -> list[ProductRead] | ORJSONResponse:
     try:
         if employee.role not in [Role.admin, Role.master]:
             effective_employee_id = employee.id
@@ -221,7 +290,10 @@ async def get_products_by_step_employee_day(
             step_definition_id=step_definition_id,
             employee_id=effective_employee_id,
             day=day,
+            view=view,
         )
+        if view != ReadView.full:
+            return ORJSONResponse(products)
         return [ProductRead.model_validate(p) for p in products]
 
     except HTTPException as exc:
@@ -283,7 +355,7 @@ async def change_product_status(
 
 @router.get(
     "/by-last-completed-step",
-    response_model=list[ProductRead],
+    response_model=list[ProductViewRead],
     status_code=status.HTTP_200_OK,
 )
 async def get_products_by_last_completed_step(
@@ -291,12 +363,16 @@ async def get_products_by_last_completed_step(
     step_definition_id: int,
     repo: Annotated[ProductRepository, Depends(get_product_repo)],
     employee: Annotated[EmployeeRead, Depends(get_current_employee)],
-) -> list[ProductRead]:
+    view: ReadView = ReadView.full,
+) -> list[ProductRead] | ORJSONResponse:
     try:
         products = await repo.list_by_process_and_last_completed_step(
             process_id=process_id,
             step_definition_id=step_definition_id,
+            view=view,
         )
+        if view != ReadView.full:
+            return ORJSONResponse(products)
         return [ProductRead.model_validate(item) for item in products]
     except HTTPException as exc:
         raise exc
@@ -307,17 +383,72 @@ async def get_products_by_last_completed_step(
         )
 
 
+@router.get(
+    "/by-last-completed-step/page",
+    response_model=Page[ProductRead],
+    status_code=status.HTTP_200_OK,
+)
+async def get_products_by_last_completed_step_page(
+    process_id: int,
+    step_definition_id: int,
+    repo: Annotated[ProductRepository, Depends(get_product_repo)],
+    employee: Annotated[EmployeeRead, Depends(get_current_employee)],
+    limit: LimitQuery = DEFAULT_PAGE_SIZE,
+    cursor: CursorQuery = None,
+) -> Page[ProductRead]:
+    try:
+        products, next_cursor = await repo.list_by_process_and_last_completed_step_page(
+            process_id=process_id,
+            step_definition_id=step_definition_id,
+            cursor=cursor,
+            limit=limit,
+        )
+        return Page[ProductRead](
+            items=[ProductRead.model_validate(item) for item in products],
+            next_cursor=next_cursor,
+        )
+    except HTTPException as exc:
+        raise exc
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Произошла внутренняя ошибка при получении продуктов",
+        )
+
+
+@router.get("/by-last-completed-step/export", status_code=status.HTTP_200_OK)
+async def export_products_by_last_completed_step(
+    process_id: int,
+    step_definition_id: int,
+    employee: Annotated[EmployeeRead, Depends(get_current_employee)],
+) -> StreamingResponse:
+    async def load_page(session, cursor, limit):
+        return await ProductRepository(
+            session
+        ).list_by_process_and_last_completed_step_page(
+            process_id=process_id,
+            step_definition_id=step_definition_id,
+            cursor=cursor,
+            limit=limit,
+        )
+
+    return ndjson_export(load_page, ProductRead)
+
+
 @router.get(
     "/not-normal",
-    response_model=list[ProductRead],
+    response_model=list[ProductViewRead],
     status_code=status.HTTP_200_OK,
 )
 async def get_products_not_normal(
     repo: Annotated[ProductRepository, Depends(get_product_repo)],
     employee: Annotated[EmployeeRead, Depends(get_current_employee)],
-) -> list[ProductRead]:
+    view: ReadView = ReadView.full,
+) -> list[ProductRead] | ORJSONResponse:
     try:
-        products = await repo.get_products_not_normal()
+        products = await repo.get_products_not_normal(view=view)
+        if view != ReadView.full:
+            return ORJSONResponse(products)
         return [ProductRead.model_validate(p) for p in products]
     except HTTPException as exc:
         raise exc
@@ -326,3 +457,43 @@ async def get_products_not_normal(
             status_code=500,
             detail="Произошла внутренняя ошибка при получении списка проблемных продуктов",
         )
+
+
+@router.get(
+    "/not-normal/page",
+    response_model=Page[ProductRead],
+    status_code=status.HTTP_200_OK,
+)
+async def get_products_not_normal_page(
+    repo: Annotated[ProductRepository, Depends(get_product_repo)],
+    employee: Annotated[EmployeeRead, Depends(get_current_employee)],
+    limit: LimitQuery = DEFAULT_PAGE_SIZE,
+    cursor: CursorQuery = None,
+) -> Page[ProductRead]:
+    try:
+        products, next_cursor = await repo.get_products_not_normal_page(
+            cursor=cursor, limit=limit
+        )
+        return Page[ProductRead](
+            items=[ProductRead.model_validate(p) for p in products],
+            next_cursor=next_cursor,
+        )
+    except HTTPException as exc:
+        raise exc
+    except Exception:
+        raise HTTPException(
+            status_code=500,
+            detail="Произошла внутренняя ошибка при получении списка проблемных продуктов",
+        )
+
+
+@router.get("/not-normal/export", status_code=status.HTTP_200_OK)
+async def export_products_not_normal(
+    employee: Annotated[EmployeeRead, Depends(get_current_employee)],
+) -> StreamingResponse:
+    async def load_page(session, cursor, limit):
+        return await ProductRepository(session).get_products_not_normal_page(
+            cursor=cursor, limit=limit
+        )
+
+    return ndjson_export(load_page, ProductRead)
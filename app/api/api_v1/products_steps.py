@@ -15,7 +15,8 @@ from app.database.crud.products_steps import (
 from app.database.models.employee import Role
 from app.database.models.product_step import StepStatus
 from app.database.schemas.employee import EmployeeRead
-from app.database.schemas.product import ProductRead
+from app.database.schemas.product import ProductRead, ProductStepBatchResultRead
+from app.database.schemas.product_step import ProductStepBatchAccept
 
 router = APIRouter(
     tags=["Products_Steps"],
@@ -67,6 +68,49 @@ async def accept_step(
         raise HTTPException(status_code=500, detail=f"Произошла внутренняя ошибка {e}")
 
 
+@router.post(
+    "/batch",
+    response_model=list[ProductStepBatchResultRead],
+    status_code=status.HTTP_200_OK,
+)
+async def accept_steps_batch(
+    data: ProductStepBatchAccept,
+    repo: Annotated[ProductStepRepository, Depends(get_products_steps_repo)],
+    product_repo: Annotated[ProductRepository, Depends(get_product_repo)],
+    employee: Annotated[EmployeeRead, Depends(get_current_employee)],
+) -> list[ProductStepBatchResultRead]:
+    """Закрыть сразу несколько этапов (например, весь лоток изделий)."""
+    try:
+        plan_date = None
+        if employee.role not in [Role.admin, Role.master]:
+            plan_date = data.plan_date or date.today()
+
+        results = await repo.accept_steps_batch(
+            data.step_ids, employee.id, plan_date=plan_date
+        )
+
+        if data.include_product:
+            done_product_ids = {
+                r["product_id"] for r in results if r["result"] == "done"
+            }
+            products = {}
+            if done_product_ids:
+                products = {
+                    p.id: ProductRead.model_validate(p)
+                    for p in await product_repo.get_many(done_product_ids)
+                }
+            for r in results:
+                if r["result"] == "done":
+                    r["product"] = products.get(r["product_id"])
+
+        return [ProductStepBatchResultRead.model_validate(r) for r in results]
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Произошла внутренняя ошибка {e}")
+
+
 @router.post(
     "/change_performer",
     response_model=ProductRead | None,  # Разрешаем возврат None
@@ -0,0 +1,81 @@
+import asyncio
+from typing import Annotated, AsyncIterator
+
+from fastapi import APIRouter, Depends
+from sqlalchemy import text
+from starlette.responses import StreamingResponse
+
+from app.api.api_v1.dependencies import require_admin_or_master
+from app.core import settings
+from app.core.progress_events import XactSnapshot, progress_events, sse_frame
+from app.database import db_helper
+from app.database.crud.products import ProductRepository
+from app.database.models.employee import Employee
+from app.database.schemas.product import ProductsCountByLastStepRead
+
+# комментарий-пинг, чтобы nginx и клиент не закрывали молчащее соединение
+HEARTBEAT_SECONDS = 15
+
+router = APIRouter(
+    tags=["Progress"],
+    prefix=settings.api.v1.progress,
+)
+
+
+async def _snapshot() -> tuple[XactSnapshot, bytes]:
+    # своя сессия основной БД (не реплика и не кэш результатов): соединение
+    # не держим всё время жизни потока
+    async with db_helper.async_session() as session:
+        # REPEATABLE READ: сводка и pg_current_snapshot() — один снимок
+        await session.connection(
+            execution_options={"isolation_level": "REPEATABLE READ"}
+        )
+        snapshot = XactSnapshot.parse(
+            await session.scalar(text("SELECT pg_current_snapshot()::text"))
+        )
+        counts = ProductRepository.get_counts_by_last_done_step.__wrapped__
+        data = await counts(ProductRepository(session))
+    return snapshot, sse_frame(
+        "snapshot",
+        [ProductsCountByLastStepRead(**item).model_dump(mode="json") for item in data],
+    )
+
+
+async def _iter_events() -> AsyncIterator[bytes]:
+    async with progress_events.subscribe() as queue:
+        # подписка уже действует (subscribe дожидается её); события
+        # транзакций, видимых снимку, в нём учтены и клиенту не отправляются
+        snapshot, frame = await _snapshot()
+        yield frame
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": ping\n\n"
+                continue
+            if item is None:
+                # клиент не успевал читать или потеряна подписка на Redis —
+                # закрываем поток, он переподключится за новым снимком
+                return
+            xact_id, frame = item
+            if not snapshot.sees(xact_id):
+                yield frame
+
+
+@router.get("/stream")
+async def stream_progress(
+    employee: Annotated[Employee, Depends(require_admin_or_master)],
+) -> StreamingResponse:
+    """
+    Поток SSE для дашбордов мастера вместо периодического опроса.
+
+    Первым приходит событие `snapshot` — сводка изделий по последнему
+    закрытому этапу (как `/products/stats/by-last-done-step`), затем
+    дельты: `last_done_step`, `daily_counter` (факт дневных планов),
+    `packaging`, `product_status`, `order_closed`.
+    """
+    return StreamingResponse(
+        _iter_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,17 +1,20 @@
-from typing import List, Annotated, Sequence
+from typing import List, Annotated
 
+import orjson
 from fastapi import APIRouter, HTTPException, Depends
 from starlette import status
+from starlette.requests import Request
+from starlette.responses import Response
 
-from app.api.api_v1.fastapi_users import current_user
+from app.api.api_v1.dependencies import get_current_user
 from app.core import settings
-from app.database import StepDefinition
+from app.core.catalog_cache import catalog_cache
 from app.database.crud.step_definitions import (
     StepDefinitionRepository,
     get_step_definition_repo,
 )
-from app.database.models import User
 from app.database.schemas.step_definition import StepDefinitionRead
+from app.database.schemas.user import UserRead
 
 router = APIRouter(
     tags=["Step definitions"],
@@ -25,11 +28,21 @@ router = APIRouter(
     status_code=status.HTTP_200_OK,
 )
 async def get_step_definitions(
+    request: Request,
     repo: Annotated[StepDefinitionRepository, Depends(get_step_definition_repo)],
-    user: Annotated[User, Depends(current_user)],
-) -> Sequence[StepDefinition]:
+    user: Annotated[UserRead, Depends(get_current_user)],
+) -> Response:
+    async def build() -> bytes:
+        step_definitions = await repo.get_catalog()
+        return orjson.dumps(
+            [
+                StepDefinitionRead.model_validate(sd).model_dump(mode="json")
+                for sd in step_definitions
+            ]
+        )
+
     try:
-        return await repo.get_all()
+        return await catalog_cache.response(request, "step_definitions", build)
     except HTTPException as exc:
         # пробрасываем 404 и другие осознанные HTTP-ошибки
         raise exc
@@ -0,0 +1,61 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from starlette import status
+
+from app.api.api_v1.dependencies import get_current_employee
+from app.core import settings
+from app.database.crud.sync import (
+    SyncCursor,
+    SyncCursorError,
+    SyncCursorExpired,
+    SyncRepository,
+    get_sync_repo,
+)
+from app.database.models.employee import Employee
+from app.database.schemas.sync import SyncRead
+
+router = APIRouter(
+    tags=["Sync"],
+    prefix=settings.api.v1.sync,
+)
+
+
+@router.get(
+    "",
+    response_model=SyncRead,
+    status_code=status.HTTP_200_OK,
+)
+async def sync_changes(
+    repo: Annotated[SyncRepository, Depends(get_sync_repo)],
+    employee: Annotated[Employee, Depends(get_current_employee)],
+    since: Annotated[str | None, Query(description="Курсор из прошлого ответа")] = None,
+    limit: Annotated[
+        int, Query(ge=1, le=settings.sync.max_page_size)
+    ] = settings.sync.page_size,
+) -> SyncRead:
+    """
+    Изменения изделий, этапов, дневных планов, упаковок и заказов с курсора.
+
+    Без `since` отдаётся полная выгрузка. На устаревший курсор (старше срока
+    хранения отметок об удалении) отвечает 410 — клиенту нужно очистить
+    локальные данные и синхронизироваться заново без `since`.
+    """
+    try:
+        cursor = SyncCursor.decode(since)
+        if cursor.is_expired(settings.sync.tombstone_days):
+            raise SyncCursorExpired("Курсор синхронизации устарел")
+        rows, next_cursor, has_more = await repo.changes(cursor, limit)
+        return SyncRead(cursor=next_cursor.encode(), has_more=has_more, **rows)
+
+    except SyncCursorExpired as exc:
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail=str(exc))
+    except SyncCursorError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    except HTTPException as exc:
+        raise exc
+    except Exception:
+        raise HTTPException(
+            status_code=500,
+            detail="Произошла внутренняя ошибка при синхронизации",
+        )
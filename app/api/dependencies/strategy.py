@@ -7,20 +7,30 @@ from fastapi_users.authentication.strategy.db import (
 
 from app.api.dependencies.access_tokens import get_access_token_db
 from app.core import settings
+from app.core.auth.token_cache import token_cache
 
 if TYPE_CHECKING:
     from app.database import AccessToken
+    from app.database.models import User
     from fastapi_users.authentication.strategy import (
         AccessTokenDatabase,
     )
 
 
+class CachedDatabaseStrategy(DatabaseStrategy):
+    """DatabaseStrategy, сбрасывающая кэш токена при выходе."""
+
+    async def destroy_token(self, token: str, user: "User") -> None:
+        await super().destroy_token(token, user)
+        await token_cache.invalidate_token(token)
+
+
 def get_database_strategy(
     access_token_db: Annotated[
         "AccessTokenDatabase[AccessToken]", Depends(get_access_token_db)
     ],
 ) -> Any:
-    return DatabaseStrategy(
+    return CachedDatabaseStrategy(
         database=access_token_db,
         lifetime_seconds=settings.access_token.lifetime_seconds,
     )
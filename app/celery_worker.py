@@ -1,10 +1,14 @@
+import asyncio
+import logging
 from dataclasses import dataclass
 from typing import Callable, Any
 
+import orjson
 from celery import Celery, Task  # type: ignore
 from celery.result import AsyncResult  # type: ignore
+from redis.exceptions import RedisError
 
-from app.core.redis import REDIS_PATH, redis_client
+from app.core.redis import REDIS_PATH, redis_helper
 
 celery_app = Celery("fkapi", broker=REDIS_PATH, backend=REDIS_PATH)
 
@@ -12,17 +16,44 @@ celery_app.conf.result_expires = 3600
 
 celery_app.autodiscover_tasks(["app.tasks"])
 
+# ход задачи хранится не дольше суток, даже если воркер упал
+PROGRESS_TTL_SECONDS = 24 * 3600
 
-def check_job_status(name: str) -> AsyncResult | None:
-    task_id = redis_client.get(name)
+
+def job_progress_key(name: str) -> str:
+    # рядом с ключом задачи: в нём самом хранится id задачи Celery
+    return f"{name}:progress"
+
+
+async def set_job_progress(name: str, **progress: Any) -> None:
+    """Записать ход задачи `name` (этап, байты и т. п.) для админки."""
+    try:
+        await redis_helper.client.set(
+            job_progress_key(name), orjson.dumps(progress), ex=PROGRESS_TTL_SECONDS
+        )
+    except RedisError:
+        logging.exception("Не удалось записать ход задачи %s", name)
+
+
+async def get_job_progress(name: str) -> dict[str, Any] | None:
+    raw = await redis_helper.client.get(job_progress_key(name))
+    return orjson.loads(raw) if raw else None
+
+
+async def check_job_status(name: str) -> AsyncResult | None:
+    """Незавершённая задача, id которой записан в Redis под ключом `name`."""
+    task_id = await redis_helper.client.get(name)
     if not task_id:
         return None
 
-    task = AsyncResult(task_id)
+    task = AsyncResult(task_id.decode())
+    # статус читается из result backend синхронным клиентом Celery
+    status = await asyncio.to_thread(lambda: task.status)
     # Если задача в конечном статусе — удаляем ключ
-    if task.status in ("SUCCESS", "FAILURE"):
-        redis_client.delete(name)
-    return task if task.status not in ("SUCCESS", "FAILURE") else None
+    if status in ("SUCCESS", "FAILURE"):
+        await redis_helper.client.delete(name, job_progress_key(name))
+        return None
+    return task
 
 
 @dataclass
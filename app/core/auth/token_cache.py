@@ -0,0 +1,118 @@
+import hashlib
+import logging
+from datetime import datetime, timedelta, timezone
+
+import redis.asyncio as aioredis
+from pydantic import BaseModel
+from redis.exceptions import RedisError
+
+from app.core import settings
+from app.core.redis import RedisHelper, redis_helper
+from app.database.schemas.employee import EmployeeRead
+from app.database.schemas.user import UserRead
+
+logger = logging.getLogger(__name__)
+
+TOKEN_KEY = "auth:token:{}"
+# токен пользователя без профиля сотрудника -> пользователь
+TOKEN_USER_KEY = "auth:token-user:{}"
+USER_TOKENS_KEY = "auth:user:{}:tokens"
+
+
+def _token_hash(token: str) -> str:
+    # сам токен в Redis не храним — только его хеш
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _token_key(token: str) -> str:
+    return TOKEN_KEY.format(_token_hash(token))
+
+
+def _token_user_key(token: str) -> str:
+    return TOKEN_USER_KEY.format(_token_hash(token))
+
+
+class TokenCache:
+    """
+    Кэш токен -> сотрудник (вместе с пользователем и ролью) в Redis.
+
+    Для пользователей без профиля сотрудника (доступ к справочникам)
+    кэшируется только пользователь, отдельным ключом.
+
+    TTL записи не превышает оставшегося срока жизни токена. Ошибки Redis
+    не ломают аутентификацию: при них данные просто берутся из БД.
+    """
+
+    def __init__(self, redis: RedisHelper = redis_helper) -> None:
+        self.redis = redis
+
+    @property
+    def client(self) -> aioredis.Redis:
+        return self.redis.client
+
+    @staticmethod
+    def ttl_for(token_created_at: datetime) -> int:
+        expires_at = token_created_at + timedelta(
+            seconds=settings.access_token.lifetime_seconds
+        )
+        remaining = (expires_at - datetime.now(tz=timezone.utc)).total_seconds()
+        return int(min(settings.access_token.cache_ttl_seconds, remaining))
+
+    async def get(self, token: str) -> EmployeeRead | None:
+        try:
+            data = await self.client.get(_token_key(token))
+        except RedisError:
+            logger.exception("Не удалось прочитать кэш токена")
+            return None
+        return EmployeeRead.model_validate_json(data) if data else None
+
+    async def get_user(self, token: str) -> UserRead | None:
+        """Пользователь токена (из записи сотрудника или пользовательской)."""
+        try:
+            employee, user = await self.client.mget(
+                _token_key(token), _token_user_key(token)
+            )
+        except RedisError:
+            logger.exception("Не удалось прочитать кэш токена")
+            return None
+        if employee:
+            return EmployeeRead.model_validate_json(employee).user
+        return UserRead.model_validate_json(user) if user else None
+
+    async def set(self, token: str, employee: EmployeeRead, ttl: int) -> None:
+        await self._set(_token_key(token), employee, employee.user.id, ttl)
+
+    async def set_user(self, token: str, user: UserRead, ttl: int) -> None:
+        await self._set(_token_user_key(token), user, user.id, ttl)
+
+    async def _set(self, key: str, value: BaseModel, user_id: int, ttl: int) -> None:
+        if ttl <= 0:
+            return
+        user_key = USER_TOKENS_KEY.format(user_id)
+        try:
+            async with self.client.pipeline(transaction=True) as pipe:
+                pipe.set(key, value.model_dump_json(), ex=ttl)
+                pipe.sadd(user_key, key)
+                pipe.expire(user_key, settings.access_token.lifetime_seconds)
+                await pipe.execute()
+        except RedisError:
+            logger.exception("Не удалось записать кэш токена")
+
+    async def invalidate_token(self, token: str) -> None:
+        try:
+            await self.client.delete(_token_key(token), _token_user_key(token))
+        except RedisError:
+            logger.exception("Не удалось сбросить кэш токена")
+
+    async def invalidate_user(self, *user_ids: int | None) -> None:
+        """Сбросить кэш всех токенов пользователей (смена роли, правка сотрудника)."""
+        for user_id in {uid for uid in user_ids if uid is not None}:
+            user_key = USER_TOKENS_KEY.format(user_id)
+            try:
+                keys = await self.client.smembers(user_key)
+                await self.client.delete(user_key, *keys)
+            except RedisError:
+                logger.exception("Не удалось сбросить кэш токенов пользователя")
+
+
+token_cache = TokenCache()
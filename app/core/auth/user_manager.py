@@ -1,6 +1,6 @@
 import logging
 import re
-from typing import Optional, TYPE_CHECKING, Union
+from typing import Optional, TYPE_CHECKING, Union, Any
 
 from fastapi_users import (
     BaseUserManager,
@@ -10,6 +10,8 @@ from fastapi_users import (
 from fastapi_users.schemas import UC
 
 from app.core import settings, config
+from app.core.auth.token_cache import token_cache
+from app.core.catalog_cache import catalog_cache
 from app.database.models import User
 from app.tasks import run_process_mail
 from app.utils.qr_code_gentrator import generate_qr_code
@@ -31,6 +33,25 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
     ) -> None:
         logger.warning("User %r has registered.", user.id)
 
+    async def on_after_update(
+        self,
+        user: User,
+        update_dict: dict[str, Any],
+        request: Optional["Request"] = None,
+    ) -> None:
+        await token_cache.invalidate_user(user.id)
+        # EmployeeRead включает UserRead: справочник сотрудников устарел
+        await catalog_cache.bump("employees")
+
+    async def on_after_delete(
+        self,
+        user: User,
+        request: Optional["Request"] = None,
+    ) -> None:
+        await token_cache.invalidate_user(user.id)
+        # EmployeeRead включает UserRead: справочник сотрудников устарел
+        await catalog_cache.bump("employees")
+
     async def on_after_forgot_password(
         self,
         user: User,
@@ -0,0 +1,125 @@
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.core.redis import RedisHelper, redis_helper
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "catalog:version:{}"
+BODY_KEY = "catalog:body:{}:{}:{}"
+BODY_TTL_SECONDS = 24 * 3600
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    version: int
+    etag: str
+    body: bytes
+
+
+class CatalogCache:
+    """
+    Кэш редко меняющихся справочников (процессы, этапы, сотрудники).
+
+    У каждого справочника есть версия в Redis (INCR), её повышает админка
+    после правки. Тело ответа хранится в памяти процесса и в Redis под
+    текущей версией; ETag — хеш тела, поэтому совпадение ETag означает
+    совпадение содержимого даже после сброса Redis. Запрос с актуальным
+    If-None-Match получает 304 без обращения к БД.
+    """
+
+    def __init__(self, redis: RedisHelper = redis_helper) -> None:
+        self.redis = redis
+        self._local: dict[tuple[str, str], CatalogEntry] = {}
+
+    @property
+    def client(self) -> aioredis.Redis:
+        return self.redis.client
+
+    async def version(self, name: str) -> int:
+        try:
+            value = await self.client.get(VERSION_KEY.format(name))
+        except RedisError:
+            logger.exception("Не удалось прочитать версию справочника %s", name)
+            return -1
+        return int(value) if value else 0
+
+    async def bump(self, *names: str) -> None:
+        for name in names:
+            try:
+                await self.client.incr(VERSION_KEY.format(name))
+            except RedisError:
+                logger.exception("Не удалось повысить версию справочника %s", name)
+            # свой процесс сбрасываем сразу, остальные увидят новую версию
+            for key in [key for key in self._local if key[0] == name]:
+                del self._local[key]
+
+    async def _load(self, name: str, variant: str, version: int) -> CatalogEntry | None:
+        entry = self._local.get((name, variant))
+        if entry is not None and entry.version == version:
+            return entry
+        if version < 0:
+            return None
+        try:
+            data = await self.client.hgetall(BODY_KEY.format(name, variant, version))
+        except RedisError:
+            logger.exception("Не удалось прочитать справочник %s из Redis", name)
+            return None
+        if not data:
+            return None
+        entry = CatalogEntry(version, data[b"etag"].decode(), data[b"body"])
+        self._local[(name, variant)] = entry
+        return entry
+
+    async def _store(self, name: str, variant: str, version: int, body: bytes) -> CatalogEntry:
+        entry = CatalogEntry(
+            version=version,
+            etag='"' + hashlib.sha256(body).hexdigest()[:32] + '"',
+            body=body,
+        )
+        if version < 0:
+            return entry
+        self._local[(name, variant)] = entry
+        key = BODY_KEY.format(name, variant, version)
+        try:
+            async with self.client.pipeline(transaction=True) as pipe:
+                pipe.hset(key, mapping={"etag": entry.etag, "body": body})
+                pipe.expire(key, BODY_TTL_SECONDS)
+                await pipe.execute()
+        except RedisError:
+            logger.exception("Не удалось записать справочник %s в Redis", name)
+        return entry
+
+    async def response(
+        self,
+        request: Request,
+        name: str,
+        build: Callable[[], Awaitable[bytes]],
+        variant: str = "all",
+    ) -> Response:
+        """
+        Ответ справочника с ETag/If-None-Match.
+
+        `build` вызывается (и ходит в БД) только если для текущей версии
+        справочника ещё нет тела ни в памяти, ни в Redis.
+        """
+        version = await self.version(name)
+        entry = await self._load(name, variant, version)
+        if entry is None:
+            entry = await self._store(name, variant, version, await build())
+
+        headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+        if_none_match = request.headers.get("if-none-match", "")
+        if entry.etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+        return Response(entry.body, media_type="application/json", headers=headers)
+
+
+catalog_cache = CatalogCache()
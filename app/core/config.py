@@ -1,6 +1,7 @@
 import os
 from functools import lru_cache
 from pathlib import Path
+from typing import Literal
 
 from pydantic import BaseModel, PostgresDsn
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -31,6 +32,8 @@ class SuperUser(BaseModel):
 
 class AccessToken(BaseModel):
     lifetime_seconds: int = 3600
+    # сколько держать в Redis связку токен -> сотрудник (не дольше жизни токена)
+    cache_ttl_seconds: int = 300
     reset_password_token_secret: str
     verification_token_secret: str
 
@@ -54,6 +57,8 @@ class ApiV1Prefix(BaseModel):
     employees: str = "/employees"
     products_steps: str = "/products_steps"
     inventories: str = "/inventories"
+    progress: str = "/progress"
+    sync: str = "/sync"
 
 
 class ApiPrefix(BaseModel):
@@ -70,6 +75,41 @@ class ApiPrefix(BaseModel):
         return self.auth_url + "/login"
 
 
+class SyncSettings(BaseModel):
+    # строк каждой таблицы в одном ответе /sync
+    page_size: int = 1000
+    max_page_size: int = 5000
+    # сколько хранить отметки об удалении; более старый курсор требует
+    # полной синхронизации
+    tombstone_days: int = 30
+
+
+class BackupSettings(BaseModel):
+    # custom — один файл, потоком на Яндекс.Диск; directory — pg_dump -F d
+    # и pg_restore в `jobs` потоков, каталог упаковывается в .dir.tar
+    kind: Literal["custom", "directory"] = "custom"
+    jobs: int = 4
+    # сжатие внутри формата pg_dump (-Z): pg_restore читает его сам
+    compression: str = "zstd:3"
+    # порция чтения вывода pg_dump и выгрузки на Яндекс.Диск, байты
+    chunk_size: int = 4 * 1024 * 1024
+    # сколько порций может ждать выгрузки, пока pg_dump продолжает писать
+    queue_chunks: int = 8
+    # сохранять копию дампа в backups_dir параллельно с выгрузкой;
+    # без неё восстановление из админки недоступно
+    keep_local: bool = True
+    # повторы выгрузки файла на Яндекс.Диск: пауза растёт вдвое до максимума
+    upload_attempts: int = 5
+    upload_backoff_seconds: float = 2.0
+    upload_backoff_max_seconds: float = 60.0
+    # хранение копий после каждого бэкапа: последняя копия каждого из N
+    # последних дней, недель и месяцев (локально, на диске и в таблице backups);
+    # все нули — ничего не удалять
+    keep_daily: int = 7
+    keep_weekly: int = 4
+    keep_monthly: int = 12
+
+
 class EmailSettings(BaseModel):
     host: str
     port: int
@@ -91,7 +131,15 @@ class DbSettings(BaseSettings):
     database: str
     redis_host: str
     redis_db: str
+    redis_max_connections: int = 50
+    # TTL кэша агрегатов дашбордов (result_cache), секунды
+    result_cache_ttl_seconds: int = 30
     backups_dir: Path = ROOT / ".backups/"
+    # реплика для отчётов: сверка инвентаризации и подсчёты списков админки
+    # (те же учётные данные); кэшируемая статистика изделий читает основную
+    # БД. Без реплики запросы только для чтения идут в основную БД
+    replica_host: str | None = None
+    replica_port: int | None = None
 
     @property
     def url(self) -> PostgresDsn:
@@ -99,7 +147,37 @@ class DbSettings(BaseSettings):
             f"postgresql+asyncpg://{self.user}:{self.password}@{self.host}:{self.port}/{self.database}"
         )
 
+    @property
+    def replica_url(self) -> PostgresDsn | None:
+        if not self.replica_host:
+            return None
+        return PostgresDsn(
+            f"postgresql+asyncpg://{self.user}:{self.password}@{self.replica_host}:{self.replica_port or self.port}/{self.database}"
+        )
+
     echo: bool = False
+    # пул соединений: при начале смены все терминалы логинятся одновременно
+    pool_size: int = 10
+    max_overflow: int = 20
+    pool_timeout: int = 30
+    # пересоздавать соединения старше N секунд (-1 — не пересоздавать)
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    # кэш подготовленных запросов на соединение (0 — выключить, нужно за pgbouncer)
+    statement_cache_size: int = 100
+    # таймаут ответа сервера на стороне asyncpg, секунды
+    command_timeout: float | None = 60
+    # statement_timeout на стороне сервера по ролям подключений, мс (0 — без ограничения)
+    statement_timeout_ms: int = 30_000
+    maintenance_statement_timeout_ms: int = 0
+    # бюджет обращений к БД на один HTTP-запрос (0 — без ограничения)
+    max_statements_per_request: int = 0
+    max_rows_per_request: int = 0
+    max_db_time_ms_per_request: int = 0
+    # превышение бюджета — ошибка запроса (тесты, стенд), иначе запись в лог
+    strict_query_budget: bool = False
+    # ночная сверка дневных счётчиков статистики: за сколько последних дней
+    rollup_reconcile_days: int = 35
     naming_convention: dict[str, str] = {
         "ix": "ix_%(column_0_label)s",
         "uq": "uq_%(table_name)s_%(column_0_N_name)s",
@@ -122,6 +200,8 @@ class Settings(BaseSettings):
     sql_admin: SqlAdmin
     access_token: AccessToken
     app_update: AppUpdate = AppUpdate()
+    sync: SyncSettings = SyncSettings()
+    backup: BackupSettings = BackupSettings()
     db: DbSettings
     super_user: SuperUser
     email: EmailSettings
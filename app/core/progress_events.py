@@ -0,0 +1,185 @@
+import asyncio
+import logging
+from collections import Counter
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import date
+from typing import AsyncIterator
+
+import orjson
+from redis.exceptions import RedisError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.redis import RedisHelper, redis_helper
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "progress:events"
+# событий в очереди одного клиента; переполнивший очередь клиент отключается
+QUEUE_SIZE = 256
+RECONNECT_DELAY_SECONDS = 1
+# сколько новый клиент ждёт подписки воркера на канал
+SUBSCRIBE_TIMEOUT_SECONDS = 5
+
+# (id транзакции-источника, готовый SSE-кадр); None — клиента отключили
+QueueItem = tuple[int, bytes] | None
+
+
+def sse_frame(event: str, data: object) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+async def current_xact_id(session: AsyncSession) -> int:
+    """Id текущей транзакции; вызывается до коммита записи, публикующей событие."""
+    return await session.scalar(text("SELECT pg_current_xact_id()::text::bigint"))
+
+
+@dataclass(frozen=True)
+class XactSnapshot:
+    """
+    Снимок транзакций PostgreSQL (`pg_current_snapshot()`).
+
+    По нему SSE-поток решает, учтено ли событие в начальной сводке: событие
+    публикуется после коммита, и его транзакция видна снимку, только если
+    закоммичена до него.
+    """
+
+    xmin: int
+    xmax: int
+    xip: frozenset[int]
+
+    @classmethod
+    def parse(cls, value: str) -> "XactSnapshot":
+        xmin, xmax, xip = value.split(":")
+        return cls(int(xmin), int(xmax), frozenset(int(x) for x in xip.split(",") if x))
+
+    def sees(self, xact_id: int) -> bool:
+        return xact_id < self.xmin or (xact_id < self.xmax and xact_id not in self.xip)
+
+
+class ProgressEvents:
+    """
+    Публикация и раздача событий прогресса производства.
+
+    После коммита закрытия этапа, упаковки, смены статуса изделия или
+    отгрузки заказа в канал Redis публикуется небольшое событие-дельта с id
+    записавшей его транзакции (`current_xact_id`).
+    В каждом воркере uvicorn один подписчик на канал раскладывает события
+    по очередям SSE-клиентов этого воркера. Ошибки Redis не ломают запись:
+    событие теряется, клиент получит актуальный снимок при переподключении.
+    При потере подписки все клиенты воркера отключаются по той же причине.
+    """
+
+    def __init__(self, redis: RedisHelper = redis_helper) -> None:
+        self.redis = redis
+        self._queues: set[asyncio.Queue[QueueItem]] = set()
+        self._listener: asyncio.Task | None = None
+        # установлено, пока действует подписка на канал
+        self._subscribed = asyncio.Event()
+
+    async def publish(self, event: str, data: dict, xact_id: int) -> None:
+        message = orjson.dumps({"xid": xact_id, "event": event, "data": data})
+        try:
+            await self.redis.client.publish(CHANNEL, message)
+        except RedisError:
+            logger.exception("Не удалось опубликовать событие %s", event)
+
+    async def publish_last_done_step(
+        self,
+        before: Counter[tuple[int, int]],
+        after: Counter[tuple[int, int]],
+        xact_id: int,
+    ) -> None:
+        """Дельта сводки «изделия по последнему закрытому этапу»."""
+        deltas = [
+            {"process_id": process_id, "step_definition_id": step_id, "delta": delta}
+            for (process_id, step_id) in sorted(before.keys() | after.keys())
+            if (delta := after[(process_id, step_id)] - before[(process_id, step_id)])
+        ]
+        if deltas:
+            await self.publish("last_done_step", {"deltas": deltas}, xact_id)
+
+    async def publish_daily_counters(
+        self, deltas: Counter[tuple[date, int, int]], xact_id: int
+    ) -> None:
+        """Дельта фактического выполнения дневных планов."""
+        items = [
+            {
+                "date": day.isoformat(),
+                "employee_id": employee_id,
+                "step_definition_id": step_id,
+                "delta": delta,
+            }
+            for (day, employee_id, step_id), delta in sorted(deltas.items())
+            if delta
+        ]
+        if items:
+            await self.publish("daily_counter", {"deltas": items}, xact_id)
+
+    @asynccontextmanager
+    async def subscribe(self) -> AsyncIterator[asyncio.Queue[QueueItem]]:
+        """
+        Очередь событий нового клиента.
+
+        Отдаётся, когда подписка воркера на канал Redis уже действует: снимок,
+        взятый после этого, не пропустит событие, опубликованное между ним и
+        подпиской. Событие, разосланное до регистрации очереди, закоммичено
+        раньше снимка и в нём учтено.
+        """
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+        await asyncio.wait_for(self._subscribed.wait(), SUBSCRIBE_TIMEOUT_SECONDS)
+        queue: asyncio.Queue[QueueItem] = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self._queues.add(queue)
+        try:
+            yield queue
+        finally:
+            self._queues.discard(queue)
+
+    async def _listen(self) -> None:
+        try:
+            while True:
+                try:
+                    async with self.redis.client.pubsub() as pubsub:
+                        await pubsub.subscribe(CHANNEL)
+                        self._subscribed.set()
+                        async for message in pubsub.listen():
+                            if message["type"] == "message":
+                                self._dispatch(message["data"])
+                except RedisError:
+                    logger.exception("Подписка на события прогресса потеряна")
+                    # события без подписки потеряны: клиенты переподключаются
+                    # и получают свежий снимок
+                    self._subscribed.clear()
+                    for queue in list(self._queues):
+                        self._disconnect(queue)
+                    await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+        finally:
+            self._subscribed.clear()
+
+    def _dispatch(self, raw: bytes) -> None:
+        message = orjson.loads(raw)
+        item = (message["xid"], sse_frame(message["event"], message["data"]))
+        for queue in list(self._queues):
+            try:
+                queue.put_nowait(item)
+            except asyncio.QueueFull:
+                # клиент не успевает читать: отключаем, при переподключении
+                # он получит свежий снимок
+                self._disconnect(queue)
+
+    def _disconnect(self, queue: asyncio.Queue[QueueItem]) -> None:
+        """Закрыть поток клиента: очередь очищается, последним кладётся None."""
+        self._queues.discard(queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+
+
+progress_events = ProgressEvents()
@@ -1,4 +1,4 @@
-import redis
+import redis.asyncio as aioredis
 
 from app.core import settings
 
@@ -6,5 +6,42 @@ HOST = settings.db.redis_host
 PORT = 6379
 DB = settings.db.redis_db
 
-redis_client = redis.Redis(host=HOST, port=PORT, db=DB)
-REDIS_PATH = f"redis://{HOST}:{PORT}/{DB}"
\ No newline at end of file
+# брокер и бэкенд Celery
+REDIS_PATH = f"redis://{HOST}:{PORT}/{DB}"
+
+
+class RedisHelper:
+    """
+    Пул соединений `redis.asyncio`, общий для всего приложения.
+
+    В API пул создаётся и закрывается в lifespan FastAPI. Кэши, события и
+    фоновые корутины (в том числе задачи Celery, где lifespan нет) берут
+    клиент из `redis_helper.client` — пул при необходимости создаётся при
+    первом обращении.
+    """
+
+    def __init__(self, url: str, max_connections: int) -> None:
+        self.url = url
+        self.max_connections = max_connections
+        self.pool: aioredis.ConnectionPool | None = None
+
+    def connect(self) -> aioredis.ConnectionPool:
+        if self.pool is None:
+            self.pool = aioredis.ConnectionPool.from_url(
+                self.url,
+                max_connections=self.max_connections,
+            )
+        return self.pool
+
+    @property
+    def client(self) -> aioredis.Redis:
+        # клиент лёгкий: соединения берутся из общего пула
+        return aioredis.Redis(connection_pool=self.connect())
+
+    async def dispose(self) -> None:
+        if self.pool is not None:
+            await self.pool.aclose()
+            self.pool = None
+
+
+redis_helper = RedisHelper(REDIS_PATH, settings.db.redis_max_connections)
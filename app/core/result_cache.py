@@ -0,0 +1,195 @@
+import asyncio
+import hashlib
+import logging
+import time
+from enum import Enum
+from functools import wraps
+from typing import Any, Awaitable, Callable, ParamSpec, TypeVar
+
+import orjson
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.core import settings
+from app.core.redis import RedisHelper, redis_helper
+
+logger = logging.getLogger(__name__)
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+TAG_KEY = "result:tag:{}"
+RESULT_KEY = "result:{}:{}"
+LOCK_KEY = "result:lock:{}"
+# сколько другой воркер может считать результат, прежде чем мы посчитаем сами
+LOCK_SECONDS = 10
+POLL_SECONDS = 0.05
+
+
+class CacheTag(str, Enum):
+    """Группы данных, от которых зависят кэшированные результаты."""
+
+    # прогресс изделий: последний закрытый этап, статус, упаковка
+    progress = "progress"
+    # дневные счётчики закрытых этапов и завершённых изделий
+    statistics = "statistics"
+
+
+class ResultCache:
+    """
+    Кэш результатов агрегирующих запросов дашбордов в Redis.
+
+    Ключ — имя метода, его аргументы и текущие версии тегов. Запись,
+    меняющая данные, вызывает `invalidate(tag)` после коммита: версия тега
+    растёт, и следующие чтения идут мимо старых значений, а сами значения
+    истекают по TTL. Значение, посчитанное по данным до коммита, ложится под
+    старую версию и новым читателям не достаётся. Поэтому считать значение
+    нужно по основной БД: реплика может отставать от коммита и положить под
+    новую версию тега данные до него.
+
+    Одновременные промахи по одному ключу выполняют один запрос: внутри
+    процесса — общий Future, между воркерами — блокировка SET NX, остальные
+    ждут появления значения. Без Redis результат просто считается заново.
+    Результат должен переживать JSON без потерь (числа, строки, списки, словари).
+    """
+
+    def __init__(
+        self,
+        redis: RedisHelper = redis_helper,
+        ttl_seconds: int = settings.db.result_cache_ttl_seconds,
+    ) -> None:
+        self.redis = redis
+        self.ttl_seconds = ttl_seconds
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    @property
+    def client(self) -> aioredis.Redis:
+        return self.redis.client
+
+    async def invalidate(self, *tags: CacheTag) -> None:
+        for tag in tags:
+            try:
+                await self.client.incr(TAG_KEY.format(tag.value))
+            except RedisError:
+                logger.exception("Не удалось сбросить кэш по тегу %s", tag.value)
+
+    async def _key(self, name: str, tags: tuple[CacheTag, ...], args: Any) -> str | None:
+        try:
+            versions = await self.client.mget([TAG_KEY.format(t.value) for t in tags])
+        except RedisError:
+            logger.exception("Не удалось прочитать версии тегов кэша")
+            return None
+        payload = orjson.dumps(
+            [args, [int(v) if v else 0 for v in versions]],
+            option=orjson.OPT_SORT_KEYS,
+        )
+        return RESULT_KEY.format(name, hashlib.sha256(payload).hexdigest()[:32])
+
+    async def _get(self, key: str) -> Any | None:
+        try:
+            value = await self.client.get(key)
+        except RedisError:
+            logger.exception("Не удалось прочитать результат из кэша")
+            return None
+        return None if value is None else orjson.loads(value)
+
+    async def _fetch(self, key: str, compute: Callable[[], Awaitable[Any]], ttl: int) -> Any:
+        value = await self._get(key)
+        if value is not None:
+            return value
+
+        lock = LOCK_KEY.format(key)
+        try:
+            acquired = await self.client.set(lock, 1, nx=True, ex=LOCK_SECONDS)
+        except RedisError:
+            logger.exception("Не удалось взять блокировку кэша")
+            return await compute()
+
+        if not acquired:
+            # тот же результат уже считает другой воркер
+            deadline = time.monotonic() + LOCK_SECONDS
+            while time.monotonic() < deadline:
+                await asyncio.sleep(POLL_SECONDS)
+                value = await self._get(key)
+                if value is not None:
+                    return value
+            return await compute()
+
+        try:
+            value = await compute()
+            try:
+                await self.client.set(key, orjson.dumps(value), ex=ttl)
+            except RedisError:
+                logger.exception("Не удалось записать результат в кэш")
+            return value
+        finally:
+            try:
+                await self.client.delete(lock)
+            except RedisError:
+                logger.exception("Не удалось снять блокировку кэша")
+
+    async def get_or_compute(
+        self,
+        name: str,
+        tags: tuple[CacheTag, ...],
+        args: Any,
+        compute: Callable[[], Awaitable[R]],
+        ttl: int | None = None,
+    ) -> R:
+        key = await self._key(name, tags, args)
+        if key is None:
+            return await compute()
+
+        while (inflight := self._inflight.get(key)) is not None:
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # запрос, который считал результат, отменён — считаем сами
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await self._fetch(key, compute, ttl or self.ttl_seconds)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # ошибку получат ожидающие; если их нет, не предупреждать о ней
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            del self._inflight[key]
+
+    def cached(
+        self, name: str, *tags: CacheTag, ttl: int | None = None
+    ) -> Callable[[Callable[P, Awaitable[R]]], Callable[P, Awaitable[R]]]:
+        """
+        Кэшировать метод репозитория по аргументам (кроме `self`).
+
+        Метод читает основную БД (`self.session`), а не `read_session`:
+        промах после `invalidate` должен видеть закоммиченные данные.
+        """
+
+        def decorator(method: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+            @wraps(method)
+            async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+                return await self.get_or_compute(
+                    name,
+                    tags,
+                    [args[1:], kwargs],
+                    lambda: method(*args, **kwargs),
+                    ttl,
+                )
+
+            return wrapper
+
+        return decorator
+
+
+result_cache = ResultCache()
@@ -11,7 +11,7 @@ from .models import (
     StepDefinition,
     DailyPlan,
 )
-from .db import db_helper, SessionDep
+from .db import db_helper, SessionDep, ReadSessionDep
 
 
 from .schemas import (
@@ -31,6 +31,7 @@ __all__ = [
     "BackupDb",
     "db_helper",
     "SessionDep",
+    "ReadSessionDep",
     "AccessToken",
     "BaseSchema",
 ]
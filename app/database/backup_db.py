@@ -1,16 +1,26 @@
 import asyncio
+import hashlib
 import logging
 import os
+import shutil
 import subprocess
+import tarfile
+import tempfile
 from datetime import datetime
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable
 
+import aiohttp
+
+from app.celery_worker import job_progress_key, set_job_progress
 from app.core import settings
 from app.database import db_helper
+from app.database.backup_retention import prune_backups
+from app.database.crud.backup_db import BackupDbRepository
+from app.database.models.backup_db import BackupKind
 from app.database.crud.yandex_tokens import YandexTokensRepository
-from app.database.yandex_disk import create_yadisk_instance
-from app.core.redis import redis_client
+from app.database.yandex_disk import YaDiskUploadError, create_yadisk_instance
+from app.core.redis import redis_helper
 
 if TYPE_CHECKING:
     from app.core.config import DbSettings
@@ -18,9 +28,76 @@ if TYPE_CHECKING:
 # Настройка логгера для модуля
 
 
-def generate_dump_name(db_name: str) -> str:
+# манифест контрольных сумм внутри архива каталожного дампа
+CHECKSUMS_FILE = "SHA256SUMS"
+
+
+def generate_dump_name(db_name: str, kind: BackupKind = BackupKind.custom) -> str:
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    return f"{db_name}_backup_{timestamp}.dump"
+    return f"{db_name}_backup_{timestamp}{kind.suffix}"
+
+
+def _sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def pack_directory_dump(dump_dir: Path, tar_path: Path) -> None:
+    """
+    Записать SHA256SUMS и упаковать каталог дампа в tar.
+
+    Архив без сжатия: файлы данных уже сжаты pg_dump (-Z).
+    """
+    lines = [
+        f"{_sha256_file(path)}  {path.name}"
+        for path in sorted(dump_dir.iterdir())
+        if path.is_file() and path.name != CHECKSUMS_FILE
+    ]
+    (dump_dir / CHECKSUMS_FILE).write_text("\n".join(lines) + "\n")
+    part_path = tar_path.with_name(tar_path.name + ".part")
+    with tarfile.open(part_path, "w") as tar:
+        tar.add(dump_dir, arcname=dump_dir.name)
+    part_path.replace(tar_path)
+
+
+def unpack_directory_dump(tar_path: Path, target_dir: Path) -> Path:
+    """Распаковать архив каталожного дампа и сверить SHA256SUMS."""
+    with tarfile.open(tar_path) as tar:
+        tar.extractall(target_dir, filter="data")
+    dump_dir = next(path for path in target_dir.iterdir() if path.is_dir())
+
+    checksums_path = dump_dir / CHECKSUMS_FILE
+    if not checksums_path.exists():
+        raise ValueError(f"В архиве {tar_path.name} нет {CHECKSUMS_FILE}")
+    expected = {}
+    for line in checksums_path.read_text().splitlines():
+        if line:
+            checksum, name = line.split("  ", 1)
+            expected[name] = checksum
+    actual = {
+        path.name
+        for path in dump_dir.iterdir()
+        if path.is_file() and path.name != CHECKSUMS_FILE
+    }
+    if actual != set(expected):
+        raise ValueError(
+            f"Состав архива {tar_path.name} не совпадает с {CHECKSUMS_FILE}"
+        )
+    for name, checksum in expected.items():
+        if _sha256_file(dump_dir / name) != checksum:
+            raise ValueError(
+                f"Контрольная сумма {name} в архиве {tar_path.name} не совпадает"
+            )
+    return dump_dir
+
+
+def get_pgpass_path() -> str:
+    if os.name == "nt":  # Windows
+        return os.path.join(os.getenv("APPDATA", ""), "postgresql", "pgpass.conf")
+    return os.path.expanduser("~/.pgpass")  # Linux/macOS
 
 
 def create_pgpass_file(pgpass_path: str, db: "DbSettings") -> None:
@@ -84,11 +161,18 @@ async def run_command(cmd: list[str], pgpass_path: str) -> None:
         raise
 
 
-async def create_database_dump() -> str:
+async def create_database_dump(kind: BackupKind = BackupKind.custom) -> str:
+    """
+    Снять дамп в файл в backups_dir.
+
+    Для `BackupKind.directory` pg_dump пишет каталог в `settings.backup.jobs`
+    потоков, затем каталог упаковывается в .dir.tar с SHA256SUMS и удаляется.
+    """
     db = settings.db
-    file_name = generate_dump_name(db.database)
+    file_name = generate_dump_name(db.database, kind)
     backups_dir = db.backups_dir
     dump_file = os.path.join(backups_dir, file_name)
+    dump_dir = Path(dump_file).with_suffix("")  # name.dir.tar -> name.dir
 
     logging.info(f"Начало создания дампа базы данных {db.database} в файл {dump_file}")
 
@@ -100,12 +184,7 @@ async def create_database_dump() -> str:
         logging.error(f"Ошибка при создании директории для бэкапов {backups_dir}: {e}")
         raise
 
-    if os.name == "nt":  # Windows
-        pgpass_path = os.path.join(
-            os.getenv("APPDATA", ""), "postgresql", "pgpass.conf"
-        )
-    else:  # Linux/macOS
-        pgpass_path = os.path.expanduser("~/.pgpass")
+    pgpass_path = get_pgpass_path()
 
     logging.debug(f"Путь к pgpass файлу: {pgpass_path}")
 
@@ -120,14 +199,18 @@ async def create_database_dump() -> str:
             db.host,
             "-p",
             str(db.port),
-            "-F",
-            "c",
-            "-f",
-            dump_file,
-            db.database,
+            "-Z",
+            settings.backup.compression,
         ]
+        if kind == BackupKind.directory:
+            cmd += ["-F", "d", "-j", str(settings.backup.jobs), "-f", str(dump_dir)]
+        else:
+            cmd += ["-F", "c", "-f", dump_file]
+        cmd.append(db.database)
 
         await run_command(cmd, pgpass_path)
+        if kind == BackupKind.directory:
+            await asyncio.to_thread(pack_directory_dump, dump_dir, Path(dump_file))
         logging.info(f"Дамп базы данных успешно создан: {dump_file}")
 
     except subprocess.CalledProcessError as e:
@@ -147,10 +230,148 @@ async def create_database_dump() -> str:
         raise
     finally:
         remove_pgpass_file(pgpass_path)
+        if kind == BackupKind.directory and dump_dir.exists():
+            shutil.rmtree(dump_dir, ignore_errors=True)
 
     return file_name
 
 
+async def stream_database_dump(
+    file_name: str,
+    consumer: Callable[[AsyncIterator[bytes]], Awaitable[None]],
+) -> None:
+    """
+    Снять дамп потоком и передать его `consumer` (выгрузка на Яндекс.Диск).
+
+    pg_dump пишет custom-формат со сжатием zstd (`settings.backup.compression`)
+    в stdout; вывод читается порциями в ограниченную очередь, поэтому дамп и
+    выгрузка идут одновременно. При `keep_local` порции параллельно пишутся
+    в `backups_dir/file_name` (через `.part`, файл появляется только целиком).
+
+    Ошибка pg_dump или записи копии прерывает поток у `consumer`, чтобы
+    неполный дамп не был выгружен как успешный. Ошибка `consumer` при
+    `keep_local` не останавливает pg_dump: дамп дописывается в файл, затем
+    ошибка пробрасывается, и выгрузку можно повторить из копии. Без
+    локальной копии pg_dump останавливается.
+    """
+    db = settings.db
+    backup = settings.backup
+    local_path = Path(db.backups_dir) / file_name if backup.keep_local else None
+    part_path = local_path.with_name(file_name + ".part") if local_path else None
+
+    cmd = [
+        "pg_dump",
+        "-U",
+        db.user,
+        "-h",
+        db.host,
+        "-p",
+        str(db.port),
+        "-F",
+        "c",
+        "-Z",
+        backup.compression,
+        db.database,
+    ]
+    pgpass_path = get_pgpass_path()
+    env = os.environ.copy()
+    env["PGPASSFILE"] = pgpass_path
+
+    logging.info(f"Начало потокового дампа базы данных {db.database}: {file_name}")
+    if part_path:
+        part_path.parent.mkdir(parents=True, exist_ok=True)
+
+    create_pgpass_file(pgpass_path, db)
+    process = None
+    try:
+        logging.debug(f"Выполнение команды: {' '.join(cmd)}")
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=env,
+        )
+        # stderr читается отдельно, чтобы pg_dump не встал на полном буфере
+        stderr_task = asyncio.create_task(process.stderr.read())
+        queue: asyncio.Queue[bytes | Exception | None] = asyncio.Queue(
+            maxsize=backup.queue_chunks
+        )
+
+        async def produce() -> None:
+            local = open(part_path, "wb") if part_path else None
+            try:
+                while chunk := await process.stdout.read(backup.chunk_size):
+                    if local:
+                        await asyncio.to_thread(local.write, chunk)
+                    await queue.put(chunk)
+                returncode = await process.wait()
+                if returncode != 0:
+                    stderr = (await stderr_task).decode("utf-8", errors="ignore")
+                    raise subprocess.CalledProcessError(returncode, cmd, stderr)
+            except Exception as exc:
+                # отмена (consumer уже завершился с ошибкой) в очередь не кладётся
+                await queue.put(exc)
+                raise
+            finally:
+                if local:
+                    local.close()
+            await queue.put(None)
+
+        stream_done = False
+
+        async def chunks() -> AsyncIterator[bytes]:
+            nonlocal stream_done
+            while (item := await queue.get()) is not None:
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+            stream_done = True
+
+        producer = asyncio.create_task(produce())
+        upload_error = None
+        try:
+            try:
+                await consumer(chunks())
+            except Exception as exc:
+                # pg_dump цел, но выгрузка оборвалась: дописываем локальную
+                # копию, чтобы вызывающий повторил выгрузку из файла
+                if part_path is None or (
+                    producer.done() and producer.exception() is not None
+                ):
+                    raise
+                logging.warning(
+                    f"Выгрузка {file_name} прервана ({exc}), дамп дописывается локально"
+                )
+                upload_error = exc
+                if not stream_done:
+                    async for _ in chunks():
+                        pass
+            await producer
+        finally:
+            producer.cancel()
+            await asyncio.gather(producer, stderr_task, return_exceptions=True)
+
+        if part_path:
+            part_path.replace(local_path)
+        if upload_error is not None:
+            raise upload_error
+        logging.info(f"Потоковый дамп базы данных завершён: {file_name}")
+
+    except subprocess.CalledProcessError as e:
+        logging.error(f"Ошибка при выполнении pg_dump: {e.stderr}")
+        raise
+    except Exception as e:
+        logging.error(f"Ошибка при потоковом создании дампа: {e}")
+        raise
+    finally:
+        if process is not None and process.returncode is None:
+            process.kill()
+            await process.wait()
+        if part_path and part_path.exists():
+            part_path.unlink()
+        remove_pgpass_file(pgpass_path)
+
+
 async def restore_database_from_dump(dump_file: str) -> None:
     db = settings.db
     path_dump_file = Path(settings.db.backups_dir) / dump_file
@@ -161,16 +382,22 @@ async def restore_database_from_dump(dump_file: str) -> None:
         logging.error(f"Файл дампа {path_dump_file} не найден")
         return None
 
-    if os.name == "nt":  # Windows
-        pgpass_path = os.path.join(
-            os.getenv("APPDATA", ""), "postgresql", "pgpass.conf"
-        )
-    else:  # Linux/macOS
-        pgpass_path = os.path.expanduser("~/.pgpass")
+    pgpass_path = get_pgpass_path()
 
     logging.debug(f"Путь к pgpass файлу: {pgpass_path}")
 
+    work_dir = None
     try:
+        source = path_dump_file
+        jobs = []
+        if BackupKind.from_file_name(dump_file) == BackupKind.directory:
+            # каталог распаковывается рядом с архивом и сверяется до pg_restore
+            work_dir = Path(tempfile.mkdtemp(prefix=".restore-", dir=db.backups_dir))
+            source = await asyncio.to_thread(
+                unpack_directory_dump, path_dump_file, work_dir
+            )
+            jobs = ["-j", str(settings.backup.jobs)]
+
         create_pgpass_file(pgpass_path, db)
 
         cmd = [
@@ -185,7 +412,8 @@ async def restore_database_from_dump(dump_file: str) -> None:
             db.database,
             "-c",
             "--if-exists",  # Добавляем флаг для избежания ошибок при отсутствии объектов
-            str(path_dump_file),
+            *jobs,
+            str(source),
         ]
 
         logging.debug(f"Команда восстановления: {' '.join(cmd)}")
@@ -203,41 +431,89 @@ async def restore_database_from_dump(dump_file: str) -> None:
         raise
     finally:
         remove_pgpass_file(pgpass_path)
+        if work_dir is not None:
+            shutil.rmtree(work_dir, ignore_errors=True)
 
 
 async def create_backup(task_name: str) -> str | None:
     logging.info("=" * 50)
     logging.info("Запуск процесса создания бэкапа")
 
+    kind = BackupKind(settings.backup.kind)
     dump_file = None
-    try:
-        if dump_file := await create_database_dump():
-            logging.info(
-                f"Дамп создан: {dump_file}, начинаем копирование на Яндекс.Диск"
-            )
 
-            async for session in db_helper.get_session():
-                try:
-                    tokens_repo = YandexTokensRepository(session)
-                    yadisk = await create_yadisk_instance(tokens_repo=tokens_repo)
-                    await yadisk.copy_photos_to_disk(dump_file)
-                    logging.info(f"Файл {dump_file} успешно скопирован на Яндекс.Диск")
+    async def report(stage: str, sent: int = 0) -> None:
+        await set_job_progress(task_name, stage=stage, file=dump_file, sent=sent)
 
-                    await db_helper.synch_backups()
-                    logging.debug("Синхронизация бэкапов завершена")
+    async def uploaded(sent: int) -> None:
+        await report("upload", sent)
 
+    try:
+        async for session in db_helper.get_session():
+            try:
+                tokens_repo = YandexTokensRepository(session)
+                yadisk = await create_yadisk_instance(tokens_repo=tokens_repo)
+                if kind == BackupKind.directory:
+                    # каталог pg_dump -F d не пишется в stdout: сначала архив
+                    dump_file = generate_dump_name(settings.db.database, kind)
+                    await report("dump")
+                    dump_file = await create_database_dump(kind)
+                    await yadisk.upload_file(
+                        dump_file,
+                        Path(settings.db.backups_dir) / dump_file,
+                        progress=uploaded,
+                    )
+                else:
+                    # дамп сразу уходит на Яндекс.Диск: время бэкапа — большее
+                    # из времени дампа и выгрузки, а не их сумма
+                    dump_file = generate_dump_name(settings.db.database, kind)
+                    local_path = Path(settings.db.backups_dir) / dump_file
+                    await report("upload")
+                    try:
+                        await stream_database_dump(
+                            dump_file,
+                            lambda chunks: yadisk.upload_stream(
+                                dump_file, chunks, progress=uploaded
+                            ),
+                        )
+                    except (
+                        aiohttp.ClientError,
+                        asyncio.TimeoutError,
+                        YaDiskUploadError,
+                    ):
+                        # дамп целиком лёг в локальную копию — выгружаем её
+                        if not local_path.exists():
+                            raise
+                        await report("retry")
+                        await yadisk.upload_file(
+                            dump_file, local_path, progress=uploaded
+                        )
+                logging.info(f"Файл {dump_file} успешно выгружен на Яндекс.Диск")
+
+                await db_helper.synch_backups()
+                logging.debug("Синхронизация бэкапов завершена")
+
+                # копия уже на диске: ошибка очистки не делает бэкап неудачным
+                try:
+                    await report("prune")
+                    await prune_backups(BackupDbRepository(session), yadisk)
                 except Exception as e:
-                    logging.error(f"Ошибка при работе с Яндекс.Диском: {e}")
-                    raise
-                finally:
-                    await session.close()
-                break
+                    logging.exception(f"Ошибка при очистке старых бэкапов: {e}")
+
+            except Exception as e:
+                logging.error(f"Ошибка при создании бэкапа на Яндекс.Диске: {e}")
+                raise
+            finally:
+                await session.close()
+            break
     except Exception as e:
         logging.error(f"Критическая ошибка при создании бэкапа: {e}")
         logging.exception("Полный стек ошибки:")  # Добавляет traceback
-        return None
+        await report("error")
+        # задача Celery должна завершиться FAILURE, а не SUCCESS с None
+        raise
 
-    redis_client.delete(task_name)
+    await redis_helper.client.delete(task_name, job_progress_key(task_name))
     logging.info(f"Процесс создания бэкапа завершен. Результат: {dump_file}")
     logging.info("=" * 50)
     return dump_file
@@ -0,0 +1,120 @@
+"""
+Хранение резервных копий: ступенчатая очистка (дни, недели, месяцы).
+
+Политика в `settings.backup`: остаётся последняя копия каждого из
+`keep_daily` последних дней, `keep_weekly` последних недель и
+`keep_monthly` последних месяцев, в которые делались бэкапы. Набор копий
+собирается из всех трёх мест — `backups_dir`, папка на Яндекс.Диске и
+таблица `backups`, — решение принимается один раз и применяется ко всем.
+Рассматриваются только копии этой БД (имя начинается с
+`<database>_backup_`, как в `generate_dump_name`): в той же папке диска
+могут лежать копии других баз. Файлы, из имени которых не читается время,
+не удаляются.
+"""
+
+import asyncio
+import logging
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Hashable, Iterable
+
+from app.core import settings
+from app.core.config import BackupSettings
+from app.database.crud.backup_db import BackupDbRepository
+from app.database.models.backup_db import BackupKind
+from app.database.yandex_disk import YaDisk
+
+# время в имени из generate_dump_name
+NAME_TIME_RE = re.compile(r"_backup_(\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})\.")
+NAME_TIME_FORMAT = "%Y-%m-%d_%H-%M-%S"
+
+
+def backup_time(name: str) -> datetime | None:
+    if BackupKind.from_file_name(name) is None:
+        return None
+    match = NAME_TIME_RE.search(name)
+    if match is None:
+        return None
+    try:
+        return datetime.strptime(match.group(1), NAME_TIME_FORMAT)
+    except ValueError:
+        return None
+
+
+def select_backups_to_keep(names: Iterable[str], policy: BackupSettings) -> set[str]:
+    """Имена, которые остаются по политике; остальные подлежат удалению."""
+    names = set(names)
+    keep = {name for name in names if backup_time(name) is None}
+    # новые первыми: в каждом периоде остаётся последняя копия
+    dated = sorted(
+        ((backup_time(name), name) for name in names - keep),
+        reverse=True,
+    )
+    tiers: list[tuple[int, Callable[[datetime], Hashable]]] = [
+        (policy.keep_daily, lambda moment: moment.date()),
+        (policy.keep_weekly, lambda moment: moment.isocalendar()[:2]),
+        (policy.keep_monthly, lambda moment: (moment.year, moment.month)),
+    ]
+    for count, period_of in tiers:
+        periods: set[Hashable] = set()
+        for moment, name in dated:
+            period = period_of(moment)
+            if period in periods:
+                continue
+            if len(periods) >= count:
+                break
+            periods.add(period)
+            keep.add(name)
+    return keep
+
+
+def _local_backups(backups_dir: Path) -> set[str]:
+    if not backups_dir.exists():
+        return set()
+    return {
+        file.name
+        for file in backups_dir.iterdir()
+        if file.is_file() and BackupKind.from_file_name(file.name)
+    }
+
+
+def _remove_local(backups_dir: Path, names: set[str]) -> None:
+    for name in names:
+        (backups_dir / name).unlink(missing_ok=True)
+
+
+async def prune_backups(repo: BackupDbRepository, yadisk: YaDisk) -> set[str]:
+    """Удалить копии вне политики локально, на диске и из `backups`."""
+    policy = settings.backup
+    if not (policy.keep_daily or policy.keep_weekly or policy.keep_monthly):
+        return set()
+
+    # копии других баз в той же папке диска чужой политике не подчиняются
+    prefix = f"{settings.db.database}_backup_"
+    backups_dir = Path(settings.db.backups_dir)
+    local = {
+        name
+        for name in await asyncio.to_thread(_local_backups, backups_dir)
+        if name.startswith(prefix)
+    }
+    remote = {
+        name
+        for name in await yadisk.list_files()
+        if name.startswith(prefix) and BackupKind.from_file_name(name)
+    }
+    indexed = {name for name in await repo.get_names() if name.startswith(prefix)}
+
+    everything = local | remote | indexed
+    pruned = everything - select_backups_to_keep(everything, policy)
+    if not pruned:
+        return pruned
+
+    logging.info(
+        f"Очистка бэкапов: удаляется {len(pruned)} из {len(everything)} копий"
+    )
+    # сначала диск: если он недоступен, локальные копии и индекс не трогаем
+    await yadisk.delete_files(sorted(pruned & remote))
+    await asyncio.to_thread(_remove_local, backups_dir, pruned & local)
+    await repo.delete_by_names(pruned & indexed)
+    return pruned
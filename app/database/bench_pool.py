@@ -0,0 +1,191 @@
+"""
+Бенчмарк настроек пула соединений и asyncpg.
+
+Моделирует начало смены: множество терминалов одновременно проходят
+авторизацию (поиск токена и сотрудника) и выполняют короткий запрос,
+удерживающий соединение. Каждый сценарий меняет одну настройку
+`DbSettings` относительно текущей конфигурации и создаёт свой движок.
+
+Для каждого сценария выводятся пропускная способность, перцентили
+задержки, среднее и максимальное ожидание соединения из пула и число
+ошибок (таймауты пула, отменённые сервером или клиентом запросы).
+Сценарии с медленными запросами показывают, как `statement_timeout` и
+`command_timeout` освобождают пул.
+
+Запуск: python -m app.database.bench_pool [--clients 200] [--requests 5]
+"""
+
+import argparse
+import asyncio
+import logging
+import secrets
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.core import settings
+from app.database.db import connect_args, pool_options
+from app.database.sql_metrics import (
+    InstrumentedQueuePool,
+    collect_sql_stats,
+    install_sql_metrics,
+)
+
+# сценарий -> (изменения DbSettings, добавлять ли медленные запросы)
+SCENARIOS: dict[str, tuple[dict[str, Any], bool]] = {
+    "умолчания SQLAlchemy (5+10, без pre-ping)": (
+        {
+            "pool_size": 5,
+            "max_overflow": 10,
+            "pool_pre_ping": False,
+            "pool_recycle": -1,
+            "statement_timeout_ms": 0,
+        },
+        False,
+    ),
+    "текущие настройки": ({}, False),
+    "pool_size x2": ({"pool_size": settings.db.pool_size * 2}, False),
+    "без pool_pre_ping": ({"pool_pre_ping": False}, False),
+    "pool_recycle 1 с": ({"pool_recycle": 1}, False),
+    "statement_cache_size 0": ({"statement_cache_size": 0}, False),
+    "медленные запросы, без таймаутов": (
+        {"statement_timeout_ms": 0, "command_timeout": None},
+        True,
+    ),
+    "медленные запросы, statement_timeout 100 мс": (
+        {"statement_timeout_ms": 100, "command_timeout": None},
+        True,
+    ),
+    "медленные запросы, command_timeout 0.1 с": (
+        {"statement_timeout_ms": 0, "command_timeout": 0.1},
+        True,
+    ),
+}
+
+AUTH_SQL = text(
+    "SELECT user_id, created_at FROM access_tokens WHERE token = :token"
+)
+EMPLOYEE_SQL = text("SELECT id, name, role FROM employees WHERE user_id = :user_id")
+WORK_SQL = text("SELECT pg_sleep(:seconds)")
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    elapsed: float = 0.0
+    latencies: list[float] = field(default_factory=list)
+    pool_waits: list[float] = field(default_factory=list)
+    errors: int = 0
+
+    def row(self) -> str:
+        if not self.latencies:
+            return f"{self.name:<48} все запросы с ошибкой ({self.errors})"
+        p50, p95, p99 = _percentiles(self.latencies)
+        return (
+            f"{self.name:<48} "
+            f"{len(self.latencies) / self.elapsed:>8.1f} "
+            f"{p50:>8.1f} {p95:>8.1f} {p99:>8.1f} "
+            f"{statistics.fmean(self.pool_waits):>9.1f} "
+            f"{max(self.pool_waits):>9.1f} "
+            f"{self.errors:>6}"
+        )
+
+
+HEADER = (
+    f"{'сценарий':<48} {'rps':>8} {'p50 мс':>8} {'p95 мс':>8} {'p99 мс':>8} "
+    f"{'пул ср.':>9} {'пул макс':>9} {'ошибки':>6}"
+)
+
+
+def _percentiles(values: list[float]) -> tuple[float, float, float]:
+    if len(values) < 2:
+        return values[0], values[0], values[0]
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return cuts[49], cuts[94], cuts[98]
+
+
+async def _run_scenario(
+    name: str,
+    overrides: dict[str, Any],
+    slow: bool,
+    args: argparse.Namespace,
+) -> ScenarioResult:
+    db = settings.db.model_copy(update=overrides)
+    engine = create_async_engine(
+        str(db.url),
+        poolclass=InstrumentedQueuePool,
+        connect_args=connect_args(db, db.statement_timeout_ms, "faserkraft-bench"),
+        **pool_options(db),
+    )
+    install_sql_metrics(engine)
+    session_maker = async_sessionmaker(bind=engine, expire_on_commit=False)
+    result = ScenarioResult(name)
+
+    async def request(index: int) -> None:
+        # каждый 20-й запрос в «медленных» сценариях занимает соединение надолго
+        seconds = args.slow_ms if slow and index % 20 == 0 else args.work_ms
+        started = time.perf_counter()
+        with collect_sql_stats() as stats:
+            try:
+                async with session_maker() as session:
+                    await session.execute(AUTH_SQL, {"token": secrets.token_urlsafe(32)})
+                    await session.execute(EMPLOYEE_SQL, {"user_id": index % 50 + 1})
+                    await session.execute(WORK_SQL, {"seconds": seconds / 1000})
+            except Exception:
+                result.errors += 1
+                return
+        result.latencies.append((time.perf_counter() - started) * 1000)
+        result.pool_waits.append(stats.pool_wait * 1000)
+
+    async def client(number: int) -> None:
+        for step in range(args.requests):
+            await request(number * args.requests + step)
+
+    try:
+        # прогрев: открываем соединения, чтобы не мерить их установку
+        await asyncio.gather(*(request(i) for i in range(db.pool_size)))
+        result.latencies.clear()
+        result.pool_waits.clear()
+        result.errors = 0
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client(n) for n in range(args.clients)))
+        result.elapsed = time.perf_counter() - started
+    finally:
+        await engine.dispose()
+    return result
+
+
+async def run_benchmark(args: argparse.Namespace) -> None:
+    logging.info(
+        "%s терминалов x %s запросов, работа %s мс, медленный запрос %s мс",
+        args.clients,
+        args.requests,
+        args.work_ms,
+        args.slow_ms,
+    )
+    logging.info(HEADER)
+    for name, (overrides, slow) in SCENARIOS.items():
+        if args.only and args.only not in name:
+            continue
+        result = await _run_scenario(name, overrides, slow, args)
+        logging.info(result.row())
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5)
+    parser.add_argument("--work-ms", type=float, default=5)
+    parser.add_argument("--slow-ms", type=float, default=1000)
+    parser.add_argument("--only", help="запустить сценарии, содержащие подстроку")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    asyncio.run(run_benchmark(_parse_args()))
@@ -0,0 +1,371 @@
+"""
+Микробенчмарки горячих методов репозиториев с контролем регрессий.
+
+Каждый сценарий вызывает метод репозитория на заполненной базе (например,
+данными `app.database.synthetic_data`) заданное число раз и фиксирует число
+SQL-запросов, строк и перцентили времени вызова. Для SELECT-запросов первого
+вызова снимается форма плана (EXPLAIN без стоимостей: типы узлов, таблицы,
+индексы).
+
+Пишущие методы выполняются внутри внешней транзакции, которая откатывается
+после каждого вызова: commit репозитория фиксирует только точку сохранения,
+база не меняется. Кэш результатов (`result_cache`) обходится.
+
+С `--save` результаты сохраняются как эталон. Без него прогон сравнивается с
+эталоном и завершается с кодом 1, если выросло число запросов или изменился
+план запроса; с `--max-slowdown` — ещё и если p50 вырос больше чем в
+заданное число раз.
+
+Запуск: python -m app.database.bench_repos [--save] [--iterations 50]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import event, exists, func, select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.database import db_helper
+from app.database.crud.daily_plans import DailyPlanRepository
+from app.database.crud.inventory import InventoryRepository
+from app.database.crud.orders import OrderRepository
+from app.database.crud.packaging_box import PackagingRepository
+from app.database.crud.products import ProductRepository
+from app.database.models import (
+    Inventory,
+    Order,
+    Packaging,
+    Product,
+    ProductProgress,
+    Process,
+    SizeType,
+)
+from app.database.models.product import ProductStatus
+from app.database.schemas.packaging_box import PackagingCreate
+from app.database.sql_metrics import collect_sql_stats
+
+DEFAULT_BASELINE = Path(__file__).with_name("bench_repos.baseline.json")
+
+Call = Callable[[AsyncSession], Awaitable[Any]]
+
+
+async def _product_get(conn: AsyncConnection) -> Call | None:
+    # изделие с наибольшей историей этапов
+    serial_number = await conn.scalar(
+        select(Product.serial_number)
+        .join(ProductProgress, ProductProgress.product_id == Product.id)
+        .order_by(ProductProgress.done_count.desc(), Product.id)
+        .limit(1)
+    )
+    if serial_number is None:
+        return None
+    return lambda s: ProductRepository(s).get(serial_number=serial_number)
+
+
+async def _counts_by_last_done_step(conn: AsyncConnection) -> Call | None:
+    # без кэша результатов: метод под @result_cache.cached
+    uncached = ProductRepository.get_counts_by_last_done_step.__wrapped__
+    return lambda s: uncached(ProductRepository(s))
+
+
+async def _inventory_compare(conn: AsyncConnection) -> Call | None:
+    inventory_id = await conn.scalar(select(func.max(Inventory.id)))
+    if inventory_id is None:
+        return None
+    return lambda s: InventoryRepository(s).compare(inventory_id)
+
+
+async def _daily_plans_get(conn: AsyncConnection) -> Call | None:
+    today = date.today()
+    return lambda s: DailyPlanRepository(s).get(date=today)
+
+
+async def _create_packaging(conn: AsyncConnection) -> Call | None:
+    # полная упаковка из завершённых неупакованных изделий одного процесса
+    row = (
+        await conn.execute(
+            select(Process.id, SizeType.packaging_count)
+            .join(SizeType, SizeType.id == Process.size_type_id)
+            .join(Product, Product.process_id == Process.id)
+            .join(ProductProgress, ProductProgress.product_id == Product.id)
+            .where(
+                ProductProgress.is_finished.is_(True),
+                Product.packaging_id.is_(None),
+                Product.status == ProductStatus.normal,
+            )
+            .group_by(Process.id, SizeType.packaging_count)
+            .having(func.count(Product.id) >= SizeType.packaging_count)
+            .limit(1)
+        )
+    ).first()
+    if row is None:
+        return None
+    product_ids = list(
+        (
+            await conn.scalars(
+                select(Product.id)
+                .join(ProductProgress, ProductProgress.product_id == Product.id)
+                .where(
+                    Product.process_id == row.id,
+                    ProductProgress.is_finished.is_(True),
+                    Product.packaging_id.is_(None),
+                    Product.status == ProductStatus.normal,
+                )
+                .order_by(Product.id)
+                .limit(row.packaging_count)
+            )
+        ).all()
+    )
+    return lambda s: PackagingRepository(s).create_packaging(
+        PackagingCreate(serial_number="BENCH-PACKAGING"), products=product_ids
+    )
+
+
+async def _order_close(conn: AsyncConnection) -> Call | None:
+    # неотгруженный заказ с упаковками (комплектность проверяет сам close)
+    order = (
+        await conn.execute(
+            select(Order.id)
+            .where(
+                Order.shipment_date.is_(None),
+                exists().where(Packaging.order_id == Order.id),
+            )
+            .order_by(Order.id)
+            .limit(1)
+        )
+    ).first()
+    employee_id = await conn.scalar(select(func.min(Packaging.performed_by_id)))
+    if order is None or employee_id is None:
+        return None
+    return lambda s: OrderRepository(s).close(order.id, employee_id)
+
+
+# сценарий -> подготовка вызова (None — в базе нет подходящих данных)
+CASES: dict[str, Callable[[AsyncConnection], Awaitable[Call | None]]] = {
+    "ProductRepository.get": _product_get,
+    "ProductRepository.get_counts_by_last_done_step": _counts_by_last_done_step,
+    "InventoryRepository.compare": _inventory_compare,
+    "DailyPlanRepository.get": _daily_plans_get,
+    "PackagingRepository.create_packaging": _create_packaging,
+    "OrderRepository.close": _order_close,
+}
+
+
+@dataclass
+class CaseResult:
+    statements: int = 0
+    rows: int = 0
+    p50_ms: float = 0.0
+    p95_ms: float = 0.0
+    max_ms: float = 0.0
+    plans: list[str] = field(default_factory=list)
+
+    def row(self, name: str) -> str:
+        return (
+            f"{name:<48} {self.statements:>9} {self.rows:>7} "
+            f"{self.p50_ms:>8.2f} {self.p95_ms:>8.2f} {self.max_ms:>8.2f}"
+        )
+
+
+HEADER = (
+    f"{'сценарий':<48} {'запросов':>9} {'строк':>7} "
+    f"{'p50 мс':>8} {'p95 мс':>8} {'макс мс':>8}"
+)
+
+
+def _plan_shape(plan: dict) -> str:
+    """Форма плана без стоимостей и оценок строк."""
+    node = plan["Node Type"]
+    if "Relation Name" in plan:
+        node += f" on {plan['Relation Name']}"
+    if "Index Name" in plan:
+        node += f" using {plan['Index Name']}"
+    children = plan.get("Plans", [])
+    if children:
+        node += "(" + ", ".join(_plan_shape(child) for child in children) + ")"
+    return node
+
+
+async def _explain(conn: AsyncConnection, captured: list[tuple[str, Any]]) -> list[str]:
+    shapes = []
+    for statement, parameters in captured:
+        if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            continue
+        result = await conn.exec_driver_sql(
+            "EXPLAIN (FORMAT JSON) " + statement, parameters
+        )
+        shapes.append(_plan_shape(result.scalar()[0]["Plan"]))
+    return shapes
+
+
+async def _call_once(
+    conn: AsyncConnection,
+    call: Call,
+    *,
+    explain: bool,
+) -> tuple[float, int, int, list[str]]:
+    """Один вызов во внешней транзакции с откатом."""
+    captured: list[tuple[str, Any]] = []
+
+    def capture(_conn, _cursor, statement, parameters, _context, _executemany):
+        captured.append((statement, parameters))
+
+    transaction = await conn.begin()
+    session = AsyncSession(
+        bind=conn,
+        expire_on_commit=False,
+        join_transaction_mode="create_savepoint",
+    )
+    try:
+        if explain:
+            event.listen(conn.sync_connection, "before_cursor_execute", capture)
+        try:
+            with collect_sql_stats() as stats:
+                started = time.perf_counter()
+                await call(session)
+                elapsed = (time.perf_counter() - started) * 1000
+        finally:
+            if explain:
+                event.remove(conn.sync_connection, "before_cursor_execute", capture)
+        plans = await _explain(conn, captured) if explain else []
+    finally:
+        await session.close()
+        await transaction.rollback()
+    return elapsed, stats.statements, stats.rows, plans
+
+
+async def _run_case(
+    conn: AsyncConnection,
+    call: Call,
+    args: argparse.Namespace,
+) -> CaseResult:
+    result = CaseResult()
+    _, result.statements, result.rows, result.plans = await _call_once(
+        conn, call, explain=True
+    )
+    for _ in range(args.warmup):
+        await _call_once(conn, call, explain=False)
+
+    timings = []
+    for _ in range(args.iterations):
+        elapsed, statements, _, _ = await _call_once(conn, call, explain=False)
+        timings.append(elapsed)
+        result.statements = max(result.statements, statements)
+
+    if len(timings) > 1:
+        cuts = statistics.quantiles(timings, n=100, method="inclusive")
+        result.p50_ms, result.p95_ms = cuts[49], cuts[94]
+    else:
+        result.p50_ms = result.p95_ms = timings[0]
+    result.max_ms = max(timings)
+    return result
+
+
+def _regressions(
+    name: str,
+    result: CaseResult,
+    baseline: dict[str, Any],
+    max_slowdown: float | None,
+) -> list[str]:
+    problems = []
+    if result.statements > baseline["statements"]:
+        problems.append(
+            f"{name}: запросов {result.statements} вместо {baseline['statements']}"
+        )
+    if result.plans != baseline["plans"]:
+        for index, (old, new) in enumerate(
+            zip(baseline["plans"], result.plans), start=1
+        ):
+            if old != new:
+                problems.append(
+                    f"{name}: изменился план запроса {index}:\n"
+                    f"  было  {old}\n  стало {new}"
+                )
+        if len(result.plans) != len(baseline["plans"]):
+            problems.append(
+                f"{name}: SELECT-запросов {len(result.plans)} "
+                f"вместо {len(baseline['plans'])}"
+            )
+    if max_slowdown and result.p50_ms > baseline["p50_ms"] * max_slowdown:
+        problems.append(
+            f"{name}: p50 {result.p50_ms:.2f} мс, эталон {baseline['p50_ms']:.2f} мс"
+        )
+    return problems
+
+
+async def run_benchmarks(args: argparse.Namespace) -> bool:
+    baseline: dict[str, Any] = {}
+    if not args.save:
+        if not args.baseline.exists():
+            logging.error("Нет эталона %s, запустите с --save", args.baseline)
+            return False
+        baseline = json.loads(args.baseline.read_text())
+
+    results: dict[str, CaseResult] = {}
+    failed: list[str] = []
+    logging.info(HEADER)
+    async with db_helper.engine.connect() as conn:
+        for name, prepare in CASES.items():
+            if args.only and args.only not in name:
+                continue
+            call = await prepare(conn)
+            await conn.rollback()
+            if call is None:
+                logging.warning("%-48s пропущен: нет подходящих данных", name)
+                continue
+            try:
+                results[name] = await _run_case(conn, call, args)
+            except Exception as exc:
+                failed.append(name)
+                logging.error("%-48s ошибка: %r", name, exc)
+                continue
+            logging.info(results[name].row(name))
+
+    if failed:
+        return False
+
+    if args.save:
+        saved = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        saved.update({name: asdict(result) for name, result in results.items()})
+        args.baseline.write_text(json.dumps(saved, ensure_ascii=False, indent=2) + "\n")
+        logging.info("Эталон сохранён: %s", args.baseline)
+        return True
+
+    problems = []
+    for name, result in results.items():
+        if name not in baseline:
+            logging.warning("%s: нет в эталоне", name)
+            continue
+        problems += _regressions(name, result, baseline[name], args.max_slowdown)
+    for problem in problems:
+        logging.error("РЕГРЕССИЯ %s", problem)
+    return not problems
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="сохранить эталон")
+    parser.add_argument(
+        "--max-slowdown",
+        type=float,
+        help="допустимый рост p50 относительно эталона, раз",
+    )
+    parser.add_argument("--only", help="запустить сценарии, содержащие подстроку")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    sys.exit(0 if asyncio.run(run_benchmarks(_parse_args())) else 1)
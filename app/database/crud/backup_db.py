@@ -1,10 +1,11 @@
 from pathlib import Path
 
-from sqlalchemy import select
+from sqlalchemy import delete, select
 
 from app.core import settings
 from app.database.crud.mixines import GetBackNextIdMixin
 from app.database import BackupDb
+from app.database.models.backup_db import BackupKind
 
 
 class BackupDbRepository(GetBackNextIdMixin[BackupDb]):
@@ -16,14 +17,15 @@ class BackupDbRepository(GetBackNextIdMixin[BackupDb]):
 
         path_dir = Path(settings.db.backups_dir)
         if path_dir.exists():
-            files = [
-                file.name
+            # .dump и .dir.tar; незавершённые .part и временные каталоги пропускаются
+            files = {
+                file.name: kind
                 for file in path_dir.iterdir()
-                if file.is_file() and file.suffix == ".dump"
-            ]
-            for file in files:
+                if file.is_file() and (kind := BackupKind.from_file_name(file.name))
+            }
+            for file, kind in files.items():
                 if file not in items:
-                    self.session.add(self.model(name=file))
+                    self.session.add(self.model(name=file, kind=kind))
             for item in items:
                 if item not in files:
                     obj_to_delete = await self.session.execute(
@@ -33,3 +35,19 @@ class BackupDbRepository(GetBackNextIdMixin[BackupDb]):
                     if obj_to_delete:
                         await self.session.delete(obj_to_delete.scalar())
         await self.session.commit()
+
+    async def get_names(self) -> set[str]:
+        result = await self.session.scalars(select(self.model.name))
+        return set(result.all())
+
+    async def delete_by_names(self, names: set[str]) -> None:
+        if not names:
+            return
+        try:
+            await self.session.execute(
+                delete(self.model).where(self.model.name.in_(names))
+            )
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
@@ -0,0 +1,99 @@
+from collections import Counter
+from datetime import date as date_type
+
+from sqlalchemy import select, func, delete, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.models import DailyFinishedCounter, ProductProgress
+
+FinishedKey = tuple[date_type, int]
+
+
+class DailyFinishedCounterRepository:
+    """
+    Поддержка таблицы `daily_finished_counters`.
+
+    Источник — поля `finished_on`/`finished_process_id` в `product_progress`.
+    Методы не коммитят: вызываются внутри транзакции, меняющей прогресс изделий.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def add(self, key: FinishedKey, delta: int = 1) -> None:
+        day, process_id = key
+        stmt = insert(DailyFinishedCounter).values(
+            date=day, process_id=process_id, count=delta
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DailyFinishedCounter.date, DailyFinishedCounter.process_id],
+            set_={"count": DailyFinishedCounter.count + stmt.excluded.count},
+        )
+        await self.session.execute(stmt)
+
+    async def apply(self, before: Counter[FinishedKey], after: Counter[FinishedKey]) -> None:
+        """Учесть изменение вклада изделий (до и после пересчёта прогресса)."""
+        for key in before.keys() | after.keys():
+            if delta := after[key] - before[key]:
+                await self.add(key, delta)
+
+    def _source_stmt(self, date_from: date_type | None = None):
+        stmt = (
+            select(
+                ProductProgress.finished_on,
+                ProductProgress.finished_process_id,
+                func.count(ProductProgress.product_id).label("count"),
+            )
+            .where(ProductProgress.finished_on.is_not(None))
+            .group_by(ProductProgress.finished_on, ProductProgress.finished_process_id)
+        )
+        if date_from is not None:
+            stmt = stmt.where(ProductProgress.finished_on >= date_from)
+        return stmt
+
+    async def reconcile(self, date_from: date_type) -> int:
+        """
+        Сверить счётчики начиная с `date_from` с `product_progress`.
+
+        Записывает точные значения (не дельты) и возвращает число исправленных
+        ключей; как и `DailyStepCounterRepository.reconcile`, вызывается в
+        транзакции REPEATABLE READ.
+        """
+        return await self._sync(date_from)
+
+    async def rebuild(self) -> None:
+        """Полностью перестроить счётчики по `product_progress`."""
+        await self._sync()
+
+    async def _sync(self, date_from: date_type | None = None) -> int:
+        """
+        Привести счётчики (начиная с `date_from`) к `product_progress`.
+
+        Лишние ключи удаляются, расходящиеся перезаписываются. Возвращает
+        число изменённых ключей.
+        """
+        source = self._source_stmt(date_from).subquery()
+        key = [DailyFinishedCounter.date, DailyFinishedCounter.process_id]
+        period = [] if date_from is None else [DailyFinishedCounter.date >= date_from]
+        deleted = await self.session.execute(
+            delete(DailyFinishedCounter)
+            .where(
+                *period,
+                tuple_(*key).not_in(
+                    select(source.c.finished_on, source.c.finished_process_id)
+                ),
+            )
+            .returning(DailyFinishedCounter.date)
+            .execution_options(synchronize_session=False)
+        )
+        stmt = insert(DailyFinishedCounter).from_select(
+            [*key, DailyFinishedCounter.count], select(source)
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=key,
+            set_={"count": stmt.excluded.count},
+            where=DailyFinishedCounter.count != stmt.excluded.count,
+        )
+        written = await self.session.execute(stmt.returning(DailyFinishedCounter.date))
+        return len(deleted.all()) + len(written.all())
@@ -89,6 +89,25 @@ class DailyPlanRepository(GetBackNextIdMixin[DailyPlan]):
         )
         return bool(await self.session.scalar(select(exists(subq))))
 
+    async def get_planned_step_def_ids(
+        self,
+        *,
+        date: date_type,
+        employee_id: int,
+        step_def_ids: set[int],
+    ) -> set[int]:
+        """Какие из указанных step_definition есть в плане сотрудника на дату."""
+        stmt = (
+            select(DailyPlanStep.step_definition_id)
+            .join(DailyPlan, DailyPlanStep.daily_plan_id == DailyPlan.id)
+            .where(
+                DailyPlan.employee_id == employee_id,
+                DailyPlan.date == date,
+                DailyPlanStep.step_definition_id.in_(step_def_ids),
+            )
+        )
+        return set((await self.session.scalars(stmt)).all())
+
     async def check_step_in_daily_plan(
         self,
         *,
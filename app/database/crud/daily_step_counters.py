@@ -0,0 +1,170 @@
+from datetime import date as date_type
+
+from sqlalchemy import select, func, literal_column, update, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.models import DailyStepCounter, ProductStep
+from app.database.models.base import CURRENT_CHANGE
+from app.database.models.product_step import StepStatus
+from app.utils.dates import MOSCOW_TZ, day_range
+
+CounterKey = tuple[date_type, int, int]
+COUNTER_KEY = [
+    DailyStepCounter.date,
+    DailyStepCounter.employee_id,
+    DailyStepCounter.step_definition_id,
+]
+
+
+class DailyStepCounterRepository:
+    """
+    Поддержка таблицы `daily_step_counters`.
+
+    Методы не коммитят: вызываются внутри транзакции, меняющей этап изделия.
+    Каждое изменение счётчика записывает в его строку `change_id`: по нему
+    `/sync` находит этапы дневного плана с изменившимся фактом, сами этапы
+    плана не обновляются. Поэтому обнулённые счётчики не удаляются.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    @staticmethod
+    def key_for(step: ProductStep) -> CounterKey | None:
+        """Ключ счётчика, в который сейчас засчитан этап (None — не засчитан)."""
+        if (
+            step.status != StepStatus.done
+            or step.performed_at is None
+            or step.performed_by_id is None
+        ):
+            return None
+        return (
+            step.performed_at.astimezone(MOSCOW_TZ).date(),
+            step.performed_by_id,
+            step.step_definition_id,
+        )
+
+    async def add(self, key: CounterKey, delta: int = 1) -> None:
+        await self._upsert(key, delta, increment=True)
+
+    async def _upsert(self, key: CounterKey, count: int, *, increment: bool) -> None:
+        """Прибавить `count` к счётчику (или записать его, `increment=False`)."""
+        day, employee_id, step_definition_id = key
+        stmt = insert(DailyStepCounter).values(
+            date=day,
+            employee_id=employee_id,
+            step_definition_id=step_definition_id,
+            count=count,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=COUNTER_KEY,
+            set_={
+                "count": (
+                    DailyStepCounter.count + stmt.excluded.count
+                    if increment
+                    else stmt.excluded.count
+                ),
+                # onupdate к ON CONFLICT не применяется
+                "change_id": CURRENT_CHANGE,
+            },
+        )
+        await self.session.execute(stmt)
+
+    async def move(self, old_key: CounterKey | None, new_key: CounterKey | None) -> None:
+        """Перенести этап из одного счётчика в другой (ключи могут быть None)."""
+        if old_key == new_key:
+            return
+        if old_key is not None:
+            await self.add(old_key, -1)
+        if new_key is not None:
+            await self.add(new_key, 1)
+
+    async def recount(self, *keys: CounterKey | None) -> None:
+        """Точно пересчитать указанные счётчики по `product_steps`."""
+        for key in {k for k in keys if k is not None}:
+            day, employee_id, step_definition_id = key
+            day_start, day_end = day_range(day)
+            stmt = select(func.count(ProductStep.id)).where(
+                ProductStep.status == StepStatus.done,
+                ProductStep.performed_by_id == employee_id,
+                ProductStep.step_definition_id == step_definition_id,
+                ProductStep.performed_at >= day_start,
+                ProductStep.performed_at < day_end,
+            )
+            count = await self.session.scalar(stmt) or 0
+            await self._upsert(key, count, increment=False)
+
+    @staticmethod
+    def _source_stmt(date_from: date_type | None = None):
+        day = func.date(
+            func.timezone(literal_column("'Europe/Moscow'"), ProductStep.performed_at)
+        )
+        stmt = (
+            select(
+                day.label("date"),
+                ProductStep.performed_by_id.label("employee_id"),
+                ProductStep.step_definition_id,
+                func.count(ProductStep.id).label("count"),
+            )
+            .where(
+                ProductStep.status == StepStatus.done,
+                ProductStep.performed_at.is_not(None),
+                ProductStep.performed_by_id.is_not(None),
+            )
+            .group_by(day, ProductStep.performed_by_id, ProductStep.step_definition_id)
+        )
+        if date_from is not None:
+            period_start, _ = day_range(date_from)
+            stmt = stmt.where(ProductStep.performed_at >= period_start)
+        return stmt
+
+    async def reconcile(self, date_from: date_type) -> int:
+        """
+        Сверить счётчики начиная с `date_from` с `product_steps`.
+
+        Записывает точные значения (не дельты) и возвращает число исправленных
+        ключей. Вызывается в транзакции REPEATABLE READ: сверяемые история и
+        счётчики — один снимок, а счётчик, изменённый параллельно, вызывает
+        ошибку сериализации вместо ложного исправления.
+        """
+        return await self._sync(date_from)
+
+    async def rebuild(self) -> None:
+        """Полностью перестроить счётчики по истории `product_steps`."""
+        await self._sync()
+
+    async def _sync(self, date_from: date_type | None = None) -> int:
+        """
+        Привести счётчики (начиная с `date_from`) к истории `product_steps`.
+
+        Меняются (и получают новый `change_id`) только расходящиеся строки;
+        счётчики без этапов в истории обнуляются. Возвращает число изменённых.
+        """
+        source = self._source_stmt(date_from).subquery()
+        period = [] if date_from is None else [DailyStepCounter.date >= date_from]
+        zeroed = await self.session.execute(
+            update(DailyStepCounter)
+            .where(
+                *period,
+                DailyStepCounter.count != 0,
+                tuple_(*COUNTER_KEY).not_in(
+                    select(
+                        source.c.date, source.c.employee_id, source.c.step_definition_id
+                    )
+                ),
+            )
+            .values(count=0)
+            .returning(DailyStepCounter.date)
+            .execution_options(synchronize_session=False)
+        )
+        stmt = insert(DailyStepCounter).from_select(
+            [*COUNTER_KEY, DailyStepCounter.count], select(source)
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=COUNTER_KEY,
+            set_={"count": stmt.excluded.count, "change_id": CURRENT_CHANGE},
+            where=DailyStepCounter.count != stmt.excluded.count,
+        )
+        written = await self.session.execute(stmt.returning(DailyStepCounter.date))
+        return len(zeroed.all()) + len(written.all())
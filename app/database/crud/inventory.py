@@ -1,20 +1,27 @@
-from collections import defaultdict
 from datetime import datetime, timezone
 
 from fastapi import HTTPException
-from sqlalchemy import select, desc, func, or_
-from sqlalchemy.orm import selectinload, aliased, joinedload
+from sqlalchemy import select, desc, func, or_, case, and_, tuple_, literal_column
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import selectinload, aliased
 
 from app.database import Product
-from app.database import SessionDep, StepDefinition
+from app.database import ReadSessionDep, SessionDep, StepDefinition
 from app.database.crud.mixines import GetBackNextIdMixin
+from app.database.crud.pagination import fetch_page, encode_cursor, decode_cursor
 from app.database.models import Inventory, InventoryItem
-from app.database.models import Packaging
+from app.database.models import Packaging, ProductProgress
 from app.database.models.product_step import StepStatus, ProductStep
+from app.database.schemas.inventory import InventoryItemBatchIn
 
 
-def get_inventory_repo(session: SessionDep) -> "InventoryRepository":
-    return InventoryRepository(session)
+BATCH_CHUNK_SIZE = 1000
+
+
+def get_inventory_repo(
+    session: SessionDep, read_session: ReadSessionDep
+) -> "InventoryRepository":
+    return InventoryRepository(session, read_session)
 
 
 class InventoryRepository(GetBackNextIdMixin[Inventory]):
@@ -154,6 +161,113 @@ class InventoryRepository(GetBackNextIdMixin[Inventory]):
         refreshed_item = await self.session.scalar(stmt_refresh)
         return refreshed_item
 
+    async def add_items_batch(
+        self,
+        inventory_id: int,
+        items: list[InventoryItemBatchIn],
+    ) -> list[dict]:
+        """
+        Пакетное добавление позиций одним INSERT ... ON CONFLICT.
+
+        Идемпотентно: позиция обновляется, только если её scanned_at не
+        старше сохранённого, поэтому повторная отправка того же пакета
+        (или более старого) ничего не меняет.
+        """
+        inventory = (
+            await self.session.execute(
+                select(Inventory.id, Inventory.completed_at).where(
+                    Inventory.id == inventory_id
+                )
+            )
+        ).one_or_none()
+        if inventory is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Инвентаризация с id={inventory_id} не найдена",
+            )
+        if inventory.completed_at is not None:
+            raise HTTPException(
+                status_code=409,
+                detail="Нельзя добавлять позиции в завершённую инвентаризацию",
+            )
+
+        # часы устройства могут спешить: скан «из будущего» сдвинул бы
+        # snapshot_at сверки, поэтому время ограничивается текущим
+        now = datetime.now(timezone.utc)
+        # в пакете серийник может встречаться несколько раз — берём последний скан
+        latest: dict[str, InventoryItemBatchIn] = {}
+        for item in items:
+            if item.scanned_at > now:
+                item = item.model_copy(update={"scanned_at": now})
+            current = latest.get(item.serial_number)
+            if current is None or item.scanned_at >= current.scanned_at:
+                latest[item.serial_number] = item
+
+        step_ids = {item.step_definition_id for item in latest.values()}
+        known_step_ids = set(
+            (
+                await self.session.scalars(
+                    select(StepDefinition.id).where(StepDefinition.id.in_(step_ids))
+                )
+            ).all()
+        )
+
+        results = {serial: "unchanged" for serial in latest}
+        rows = []
+        for serial, item in latest.items():
+            if item.step_definition_id not in known_step_ids:
+                results[serial] = "rejected"
+                continue
+            rows.append(
+                {
+                    "inventory_id": inventory_id,
+                    "serial_number": serial,
+                    "step_definition_id": item.step_definition_id,
+                    "scanned_at": item.scanned_at,
+                }
+            )
+
+        try:
+            # порциями: у asyncpg ограничение на число параметров запроса
+            for start in range(0, len(rows), BATCH_CHUNK_SIZE):
+                chunk = rows[start : start + BATCH_CHUNK_SIZE]
+                for serial, inserted in await self._upsert_items(chunk):
+                    results[serial] = "created" if inserted else "updated"
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+
+        return [
+            {"serial_number": serial, "result": result}
+            for serial, result in results.items()
+        ]
+
+    async def _upsert_items(self, rows: list[dict]) -> list[tuple[str, bool]]:
+        stmt = insert(InventoryItem).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[InventoryItem.inventory_id, InventoryItem.serial_number],
+            set_={
+                "step_definition_id": stmt.excluded.step_definition_id,
+                "scanned_at": stmt.excluded.scanned_at,
+            },
+            # более старый или тот же самый скан ничего не меняет
+            where=and_(
+                InventoryItem.scanned_at <= stmt.excluded.scanned_at,
+                or_(
+                    InventoryItem.scanned_at != stmt.excluded.scanned_at,
+                    InventoryItem.step_definition_id
+                    != stmt.excluded.step_definition_id,
+                ),
+            ),
+        ).returning(
+            InventoryItem.serial_number,
+            # xmax = 0 — строка вставлена, иначе обновлена
+            (literal_column("xmax") == 0).label("inserted"),
+        )
+        result = await self.session.execute(stmt)
+        return [(serial, inserted) for serial, inserted in result.all()]
+
     async def remove_item(self, inventory_id: int, serial_number: str) -> None:
         stmt = (
             select(InventoryItem)
@@ -173,8 +287,9 @@ class InventoryRepository(GetBackNextIdMixin[Inventory]):
             await self.session.rollback()
             raise
 
-    async def get_items(self, inventory_id: int) -> list[InventoryItem]:
-        stmt = (
+    @staticmethod
+    def _items_stmt(inventory_id: int):
+        return (
             select(InventoryItem)
             .where(InventoryItem.inventory_id == inventory_id)
             .options(
@@ -185,172 +300,260 @@ class InventoryRepository(GetBackNextIdMixin[Inventory]):
                     StepDefinition.work_process
                 ),
             )
-            .order_by(desc(InventoryItem.scanned_at))
         )
+
+    async def get_items(self, inventory_id: int) -> list[InventoryItem]:
+        stmt = self._items_stmt(inventory_id).order_by(desc(InventoryItem.scanned_at))
         result = await self.session.scalars(stmt)
         return list(result.all())
 
+    async def get_items_page(
+        self,
+        inventory_id: int,
+        *,
+        cursor: str | None = None,
+        limit: int,
+    ) -> tuple[list[InventoryItem], str | None]:
+        # тот же порядок, что и у get_items: новые сканы первыми
+        return await fetch_page(
+            self.session,
+            self._items_stmt(inventory_id),
+            keys=[InventoryItem.scanned_at, InventoryItem.id],
+            cursor=cursor,
+            limit=limit,
+            descending=True,
+        )
 
     async def compare(self, inventory_id: int) -> list[dict]:
-        # 1. Загружаем строки инвентаризации
-        stmt_items = (
-            select(InventoryItem)
-            .where(InventoryItem.inventory_id == inventory_id)
-            .options(joinedload(InventoryItem.step_definition))
+        results, _ = await self.compare_page(inventory_id)
+        return results
+
+    async def compare_page(
+        self,
+        inventory_id: int,
+        *,
+        cursor: str | None = None,
+        limit: int | None = None,
+    ) -> tuple[list[dict], str | None]:
+        """
+        Сверка инвентаризации с учётом на момент snapshot_at (последнее сканирование).
+
+        Вся сверка — один SQL-запрос:
+        - этап изделия на snapshot_at берётся из product_progress, а для изделий,
+          менявшихся после snapshot_at, — одним проходом DISTINCT ON по их этапам;
+        - matched/missing/unexpected — FULL JOIN учётного множества
+          (не упакованные на snapshot_at изделия) со сканированными позициями;
+        - страница — `limit` групп по step_definition в порядке
+          (процесс, порядок этапа), курсор — ключ последней группы.
+
+        Сканированные серийные номера, которых нет в БД, учитываются в
+        scanned_count, но в списки не попадают.
+        """
+        snapshot_at = await self.read_session.scalar(
+            select(func.max(InventoryItem.scanned_at)).where(
+                InventoryItem.inventory_id == inventory_id
+            )
         )
-        items = (await self.session.scalars(stmt_items)).all()
-        if not items:
-            return []
+        if snapshot_at is None:
+            return [], None
 
-        snapshot_at = max(item.scanned_at for item in items)
-        scanned_serials = {item.serial_number for item in items}
+        scanned = (
+            select(InventoryItem.serial_number, InventoryItem.step_definition_id)
+            .where(InventoryItem.inventory_id == inventory_id)
+            .cte("scanned")
+        )
 
-        scanned_items_by_step: dict[int, dict[str, InventoryItem]] = defaultdict(dict)
-        for item in items:
-            scanned_items_by_step[item.step_definition_id][item.serial_number] = item
-
-        ps_alias = aliased(ProductStep)
-        sd_alias = aliased(StepDefinition)
-        pkg_alias = aliased(Packaging)
-
-        # Последний завершенный шаг на момент snapshot_at
-        last_step_id_subq = (
-            select(ps_alias.id)
-            .join(sd_alias, sd_alias.id == ps_alias.step_definition_id)
-            .where(ps_alias.product_id == Product.id)
-            .where(ps_alias.status == StepStatus.done)
-            .where(ps_alias.performed_at.is_not(None))
-            .where(ps_alias.performed_at <= snapshot_at)
+        # последний закрытый до snapshot_at этап — только для изделий,
+        # у которых что-то закрывалось после snapshot_at
+        changed_last = (
+            select(ProductStep.product_id, ProductStep.step_definition_id)
+            .join(StepDefinition, StepDefinition.id == ProductStep.step_definition_id)
+            .join(ProductProgress, ProductProgress.product_id == ProductStep.product_id)
+            .where(
+                ProductProgress.last_done_at > snapshot_at,
+                ProductStep.status == StepStatus.done,
+                ProductStep.performed_at.is_not(None),
+                ProductStep.performed_at <= snapshot_at,
+            )
+            .distinct(ProductStep.product_id)
             .order_by(
-                desc(sd_alias.order),
-                desc(ps_alias.performed_at),
-                desc(ps_alias.id),
+                ProductStep.product_id,
+                desc(StepDefinition.order),
+                desc(ProductStep.performed_at),
+                desc(ProductStep.id),
             )
-            .limit(1)
-            .correlate(Product)
-            .scalar_subquery()
+            .cte("changed_last")
         )
 
-        last_step_def_id_subq = (
-            select(ps_alias.step_definition_id)
-            .where(ps_alias.id == last_step_id_subq)
-            .scalar_subquery()
+        step_at_snapshot = case(
+            (
+                ProductProgress.last_done_at <= snapshot_at,
+                ProductProgress.last_done_step_definition_id,
+            ),
+            else_=changed_last.c.step_definition_id,
         )
 
-        # Упакован ли продукт на snapshot_at
-        is_packaged_at_snapshot_expr = (
-            select(1)
-            .where(pkg_alias.id == Product.packaging_id)
-            .where(pkg_alias.performed_at.is_not(None))
-            .where(pkg_alias.performed_at <= snapshot_at)
-            .correlate(Product)
-            .exists()
+        # учёт: изделия, не упакованные на snapshot_at, с известным этапом
+        accounting = (
+            select(
+                Product.id.label("product_id"),
+                Product.serial_number,
+                step_at_snapshot.label("step_definition_id"),
+            )
+            .join(ProductProgress, ProductProgress.product_id == Product.id)
+            .outerjoin(changed_last, changed_last.c.product_id == Product.id)
+            .outerjoin(Packaging, Packaging.id == Product.packaging_id)
+            .where(
+                or_(
+                    Packaging.id.is_(None),
+                    Packaging.performed_at.is_(None),
+                    Packaging.performed_at > snapshot_at,
+                ),
+                step_at_snapshot.is_not(None),
+            )
+            .cte("accounting")
         )
 
-        # 2. Берем:
-        # - все продукты из инвентаризации
-        # - все продукты, не упакованные на snapshot_at
-        product_filters = [~is_packaged_at_snapshot_expr]
-        if scanned_serials:
-            product_filters.append(Product.serial_number.in_(scanned_serials))
-
-        stmt_products = select(
-            Product,
-            last_step_def_id_subq.label("current_step_definition_id"),
-            is_packaged_at_snapshot_expr.label("is_packaged_at_snapshot"),
-        ).where(or_(*product_filters))
-        db_rows = (await self.session.execute(stmt_products)).all()
-
-        # 3. Разделяем:
-        # - все продукты из инвентаризации по serial
-        # - учетные продукты (не упакованные на snapshot_at) по этапу
-        products_from_inventory_by_serial: dict[str, Product] = {}
-        accounting_products_by_step: dict[int, dict[str, Product]] = defaultdict(dict)
-
-        for product, current_step_definition_id, is_packaged_at_snapshot in db_rows:
-            if product.serial_number in scanned_serials:
-                products_from_inventory_by_serial[product.serial_number] = product
-
-            if not is_packaged_at_snapshot and current_step_definition_id is not None:
-                accounting_products_by_step[current_step_definition_id][
-                    product.serial_number
-                ] = product
-
-        # 4. Все step_definition_id из физики и учета
-        all_step_ids = set(scanned_items_by_step.keys()) | set(
-            accounting_products_by_step.keys()
+        scanned_product = aliased(Product)
+        compared = (
+            select(
+                func.coalesce(
+                    accounting.c.step_definition_id, scanned.c.step_definition_id
+                ).label("step_definition_id"),
+                func.coalesce(accounting.c.product_id, scanned_product.id).label(
+                    "product_id"
+                ),
+                accounting.c.product_id.is_not(None).label("in_db"),
+                scanned.c.serial_number.is_not(None).label("in_scan"),
+            )
+            .select_from(
+                accounting.join(
+                    scanned,
+                    and_(
+                        scanned.c.serial_number == accounting.c.serial_number,
+                        scanned.c.step_definition_id
+                        == accounting.c.step_definition_id,
+                    ),
+                    full=True,
+                )
+            )
+            .outerjoin(
+                scanned_product,
+                scanned_product.serial_number == scanned.c.serial_number,
+            )
+            .cte("compared")
         )
-        if not all_step_ids:
-            return []
 
-        stmt_step_defs = (
-            select(StepDefinition)
-            .where(StepDefinition.id.in_(all_step_ids))
-            .options(
-                joinedload(StepDefinition.template),
-                joinedload(StepDefinition.work_process),
+        group_key = (
+            StepDefinition.process_id,
+            StepDefinition.order,
+            StepDefinition.id,
+        )
+        by_step = compared.c.step_definition_id
+        ranked = (
+            select(
+                by_step.label("step_definition_id"),
+                compared.c.product_id,
+                compared.c.in_db,
+                compared.c.in_scan,
+                StepDefinition.process_id,
+                StepDefinition.order,
+                func.count()
+                .filter(compared.c.in_db)
+                .over(partition_by=by_step)
+                .label("db_count"),
+                func.count()
+                .filter(compared.c.in_scan)
+                .over(partition_by=by_step)
+                .label("scanned_count"),
+                func.dense_rank().over(order_by=group_key).label("group_no"),
             )
+            .join(StepDefinition, StepDefinition.id == by_step)
         )
-        step_defs = await self.session.scalars(stmt_step_defs)
-        step_def_map = {sd.id: sd for sd in step_defs.unique().all()}
-
-        def make_item(product: Product, step_def: StepDefinition) -> dict:
-            return {
-                "id": product.id,
-                "serial_number": product.serial_number,
-                "status": product.status,
-                "step_definition": step_def,
-            }
-
-        results = []
+        if cursor is not None:
+            ranked = ranked.where(
+                tuple_(*group_key) > tuple_(*decode_cursor(cursor, group_key))
+            )
+        ranked = ranked.subquery()
 
-        for step_def_id in sorted(
-            all_step_ids,
-            key=lambda sid: (
-                (
-                    step_def_map[sid].work_process.id
-                    if sid in step_def_map and step_def_map[sid].work_process
-                    else 0
-                ),
-                step_def_map[sid].order if sid in step_def_map else 0,
-                sid,
-            ),
-        ):
-            step_def = step_def_map.get(step_def_id)
-            if step_def is None:
+        stmt = (
+            select(
+                ranked,
+                Product.serial_number,
+                Product.status,
+            )
+            .outerjoin(Product, Product.id == ranked.c.product_id)
+            .order_by(ranked.c.group_no, Product.serial_number)
+        )
+        if limit is not None:
+            # лишняя группа нужна только чтобы понять, есть ли следующая страница
+            stmt = stmt.where(ranked.c.group_no <= limit + 1)
+
+        groups: dict[int, dict] = {}
+        next_cursor = None
+        for row in (await self.read_session.execute(stmt)).all():
+            if limit is not None and row.group_no > limit:
+                last = groups[next(reversed(groups))]
+                next_cursor = encode_cursor(
+                    [last["process_id"], last["order"], last["step_definition_id"]]
+                )
+                break
+            group = groups.get(row.step_definition_id)
+            if group is None:
+                group = groups[row.step_definition_id] = {
+                    "step_definition_id": row.step_definition_id,
+                    "process_id": row.process_id,
+                    "order": row.order,
+                    "db_count": row.db_count,
+                    "scanned_count": row.scanned_count,
+                    "matched": [],
+                    "missing": [],
+                    "unexpected": [],
+                }
+            if row.product_id is None:
                 continue
+            if row.in_db and row.in_scan:
+                kind = "matched"
+            elif row.in_db:
+                kind = "missing"
+            else:
+                kind = "unexpected"
+            group[kind].append(
+                {
+                    "id": row.product_id,
+                    "serial_number": row.serial_number,
+                    "status": row.status,
+                }
+            )
 
-            scanned_map = scanned_items_by_step.get(step_def_id, {})
-            scanned_serials_step = set(scanned_map.keys())
-
-            accounting_map = accounting_products_by_step.get(step_def_id, {})
-            accounting_serials_step = set(accounting_map.keys())
-
-            matched_serials = scanned_serials_step & accounting_serials_step
-            missing_serials = accounting_serials_step - scanned_serials_step
-            unexpected_serials = scanned_serials_step - accounting_serials_step
-
-            matched = [
-                make_item(accounting_map[s], step_def) for s in sorted(matched_serials)
-            ]
-
-            missing = [
-                make_item(accounting_map[s], step_def) for s in sorted(missing_serials)
-            ]
+        if not groups:
+            return [], None
 
-            unexpected = [
-                make_item(products_from_inventory_by_serial[s], step_def)
-                for s in sorted(unexpected_serials)
-            ]
+        stmt_step_defs = (
+            select(StepDefinition)
+            .where(StepDefinition.id.in_(groups.keys()))
+            .options(
+                selectinload(StepDefinition.template),
+                selectinload(StepDefinition.work_process),
+            )
+        )
+        step_defs = await self.read_session.scalars(stmt_step_defs)
+        step_def_map = {sd.id: sd for sd in step_defs.all()}
 
+        results = []
+        for step_def_id, group in groups.items():
+            step_def = step_def_map[step_def_id]
+            for kind in ("matched", "missing", "unexpected"):
+                for item in group[kind]:
+                    item["step_definition"] = step_def
             results.append(
                 {
-                    "db_count": len(accounting_serials_step),
-                    "scanned_count": len(scanned_serials_step),
-                    "matched": matched,
-                    "missing": missing,
-                    "unexpected": unexpected,
+                    "step_definition_id": step_def_id,
+                    "db_count": group["db_count"],
+                    "scanned_count": group["scanned_count"],
+                    "matched": group["matched"],
+                    "missing": group["missing"],
+                    "unexpected": group["unexpected"],
                 }
             )
-
-        return results
+        return results, next_cursor
@@ -15,17 +15,22 @@ from starlette.requests import Request
 
 from app.core.type_vars import T
 
-
 class GetBackNextIdMixin(ABC, Generic[T]):
     session: AsyncSession
+    # сессия для методов только чтения (реплика, если она настроена); такие
+    # методы явно обращаются к ней, а `self.session` не подменяется — репозиторий
+    # может одновременно использоваться из нескольких корутин. Данные реплики
+    # могут отставать от основной БД на доли секунды.
+    read_session: AsyncSession
 
     @property
     @abstractmethod
     def model(self) -> Type[T]:
         pass
 
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, read_session: AsyncSession | None = None):
         self.session = session
+        self.read_session = read_session or session
         self.main_stmt = select(self.model)
 
     async def get_adjacent_id(
@@ -73,7 +78,7 @@ class GetBackNextIdMixin(ABC, Generic[T]):
         query = select(func.count(self.model.id))
         if conditions:
             query = query.where(*conditions)  # применяем условия, если они есть
-        result = await self.session.execute(query)
+        result = await self.read_session.execute(query)
         return result.scalar_one_or_none() or 0
 
     async def get_async_position(
@@ -4,14 +4,17 @@ from typing import Any
 from zoneinfo import ZoneInfo
 
 from fastapi import HTTPException
-from sqlalchemy import select
+from sqlalchemy import select, func, Select
 from sqlalchemy.orm import selectinload
 from starlette import status
 
+from app.core.progress_events import current_xact_id, progress_events
 from app.database import SessionDep
 from app.database.crud.mixines import GetBackNextIdMixin
-from app.database.models import Order, OrderItem
+from app.database.crud.pagination import fetch_page
+from app.database.models import Order, OrderItem, Packaging, Product
 from app.database.schemas.order import OrderCreate, OrderItemCreate, OrderUpdate
+from app.database.schemas.read_view import ReadView
 from database.validators.packaging import get_packaging_with_non_normal_products
 
 
@@ -34,6 +37,68 @@ class OrderRepository(GetBackNextIdMixin[Order]):
         )
         return await self.session.scalar(stmt_ret)
 
+    async def _project(self, view: ReadView, stmt: Select) -> list[dict]:
+        """Колоночная проекция заказов, отобранных `stmt` (select(Order))."""
+        columns = [
+            Order.id,
+            Order.contract_number,
+            Order.contract_date,
+            Order.planned_shipment_date,
+            Order.shipment_date,
+            Order.shipment_by_id,
+        ]
+        if view == ReadView.steps_summary:
+            columns += [
+                select(func.coalesce(func.sum(OrderItem.quantity), 0))
+                .where(OrderItem.order_id == Order.id)
+                .scalar_subquery()
+                .label("ordered_quantity"),
+                select(func.count(Packaging.id))
+                .where(Packaging.order_id == Order.id)
+                .scalar_subquery()
+                .label("packaging_count"),
+                select(func.count(Product.id))
+                .join(Packaging, Packaging.id == Product.packaging_id)
+                .where(Packaging.order_id == Order.id)
+                .scalar_subquery()
+                .label("product_count"),
+            ]
+        projection = (
+            select(*columns)
+            .where(Order.id.in_(stmt.with_only_columns(Order.id)))
+            .order_by(Order.id)
+        )
+        result = await self.session.execute(projection)
+        return [dict(row) for row in result.mappings().all()]
+
+    async def get_all(self, view: ReadView = ReadView.full) -> Any:
+        if view != ReadView.full:
+            return await self._project(view, select(Order))
+        return await super().get_all()
+
+    async def get_view(self, view: ReadView, order_id: int) -> dict:
+        rows = await self._project(view, select(Order).where(Order.id == order_id))
+        if not rows:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Заказ с идентификатором {order_id} не найден",
+            )
+        return rows[0]
+
+    async def get_page(
+        self,
+        *,
+        cursor: str | None = None,
+        limit: int,
+    ) -> tuple[list[Order], str | None]:
+        stmt = select(Order).options(
+            selectinload(Order.items).selectinload(OrderItem.work_process),
+            selectinload(Order.packaging),
+        )
+        return await fetch_page(
+            self.session, stmt, keys=[Order.id], cursor=cursor, limit=limit
+        )
+
     # === 1. ОБНОВЛЕНИЕ ОСНОВНЫХ ДАННЫХ ЗАКАЗА ===
     async def update(
         self,
@@ -178,11 +243,20 @@ class OrderRepository(GetBackNextIdMixin[Order]):
         order.shipment_by_id = employee_id
 
         try:
+            xact_id = await current_xact_id(self.session)
             await self.session.commit()
         except Exception:
             await self.session.rollback()
             raise
 
+        await progress_events.publish(
+            "order_closed",
+            {
+                "order_id": order.id,
+                "packaging_ids": sorted(pack.id for pack in order.packaging),
+            },
+            xact_id,
+        )
         return await self._get_order_with_relations(order.id)
 
     async def delete(
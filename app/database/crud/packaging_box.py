@@ -2,15 +2,21 @@ from datetime import datetime, timezone
 from typing import Optional, List, Sequence
 
 from fastapi import HTTPException
-from sqlalchemy import select, update, or_
+from sqlalchemy import select, update, or_, func, Select
 from sqlalchemy.orm import joinedload, selectinload
 from starlette import status
 
+from app.core.progress_events import current_xact_id, progress_events
+from app.core.result_cache import CacheTag, result_cache
 from app.database import SessionDep, Product
 from app.database.crud.mixines import GetBackNextIdMixin
+from app.database.crud.pagination import fetch_page
+from app.database.crud.product_progress import ProductProgressRepository
 from app.database.models import Packaging
 from app.database.schemas.packaging_box import PackagingCreate
-from app.database.models import Order
+from app.database.models import Order, ProductProgress
+from app.database.models.product import ProductStatus
+from app.database.schemas.read_view import ReadView
 from app.database.validators.packaging import get_packaging_with_non_normal_products
 
 
@@ -21,6 +27,56 @@ def get_packaging_repo(session: SessionDep) -> "PackagingRepository":
 class PackagingRepository(GetBackNextIdMixin[Packaging]):
     model = Packaging
 
+    async def _project(self, view: ReadView, stmt: Select) -> list[dict]:
+        """Колоночная проекция упаковок, отобранных `stmt` (select(Packaging))."""
+        columns = [
+            Packaging.id,
+            Packaging.serial_number,
+            Packaging.performed_at,
+            Packaging.performed_by_id,
+            Packaging.order_id,
+            select(func.count(Product.id))
+            .where(Product.packaging_id == Packaging.id)
+            .scalar_subquery()
+            .label("products_count"),
+        ]
+        if view == ReadView.steps_summary:
+            columns += [
+                select(func.count(Product.id))
+                .where(
+                    Product.packaging_id == Packaging.id,
+                    Product.status != ProductStatus.normal,
+                )
+                .scalar_subquery()
+                .label("not_normal_count"),
+                select(func.count(Product.id))
+                .join(ProductProgress, ProductProgress.product_id == Product.id)
+                .where(
+                    Product.packaging_id == Packaging.id,
+                    ProductProgress.is_finished.is_(True),
+                )
+                .scalar_subquery()
+                .label("finished_count"),
+            ]
+        projection = (
+            select(*columns)
+            .where(Packaging.id.in_(stmt.with_only_columns(Packaging.id)))
+            .order_by(Packaging.id)
+        )
+        result = await self.session.execute(projection)
+        return [dict(row) for row in result.mappings().all()]
+
+    async def get_view(self, view: ReadView, *, serial_number: str) -> dict:
+        rows = await self._project(
+            view, select(Packaging).where(Packaging.serial_number == serial_number)
+        )
+        if not rows:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Упаковка с идентификатором {serial_number} не найдена",
+            )
+        return rows[0]
+
     async def create_packaging(
         self,
         packaging_in: PackagingCreate,
@@ -68,6 +124,9 @@ class PackagingRepository(GetBackNextIdMixin[Packaging]):
             to_attach = new_ids - current_ids
             to_detach = current_ids - new_ids
 
+            progress = ProductProgressRepository(self.session)
+            before = await progress.last_done_counts(to_attach | to_detach)
+
             if to_attach:
                 stmt_attach = (
                     update(Product)
@@ -84,11 +143,25 @@ class PackagingRepository(GetBackNextIdMixin[Packaging]):
                 )
                 await self.session.execute(stmt_detach)
 
+            after = await progress.last_done_counts(to_attach | to_detach)
+            xact_id = await current_xact_id(self.session)
             await self.session.commit()
         except Exception:
             await self.session.rollback()
             raise
 
+        await result_cache.invalidate(CacheTag.progress)
+        await progress_events.publish_last_done_step(before, after, xact_id)
+        await progress_events.publish(
+            "packaging",
+            {
+                "packaging_id": packaging.id,
+                "serial_number": packaging.serial_number,
+                "product_ids": sorted(new_ids),
+            },
+            xact_id,
+        )
+
         await self.session.refresh(packaging)
         return packaging
 
@@ -149,15 +222,13 @@ class PackagingRepository(GetBackNextIdMixin[Packaging]):
                 detail=f"Упаковка с идентификатором {ident} не найдена",
             )
 
-        # удаляем сам объект
+        # удаляем сам объект; изделия снова попадают в сводку по этапам
         await self.session.delete(packaging)
         await self.session.commit()
+        await result_cache.invalidate(CacheTag.progress)
 
-    async def get_all_excluding_closed_orders(self) -> Sequence[Packaging]:
-        """
-        Возвращает все упаковки, кроме тех, которые привязаны к закрытым (отгруженным) заказам.
-        """
-        stmt = (
+    def _excluding_closed_orders_stmt(self):
+        return (
             select(self.model)
             .outerjoin(Order, self.model.order_id == Order.id)
             .where(
@@ -170,9 +241,33 @@ class PackagingRepository(GetBackNextIdMixin[Packaging]):
             )
         )
 
+    async def get_all_excluding_closed_orders(
+        self,
+        view: ReadView = ReadView.full,
+    ) -> Sequence[Packaging] | list[dict]:
+        """
+        Возвращает все упаковки, кроме тех, которые привязаны к закрытым (отгруженным) заказам.
+        """
+        stmt = self._excluding_closed_orders_stmt()
+        if view != ReadView.full:
+            return await self._project(view, stmt)
         result = await self.session.execute(stmt)
         return result.scalars().all()
 
+    async def get_excluding_closed_orders_page(
+        self,
+        *,
+        cursor: str | None = None,
+        limit: int,
+    ) -> tuple[list[Packaging], str | None]:
+        stmt = self._excluding_closed_orders_stmt().options(
+            selectinload(Packaging.products).selectinload(Product.work_process),
+            selectinload(Packaging.performed_by),
+        )
+        return await fetch_page(
+            self.session, stmt, keys=[Packaging.id], cursor=cursor, limit=limit
+        )
+
     async def attach_to_order(
         self,
         order_id: int,
@@ -0,0 +1,65 @@
+import base64
+from datetime import date, datetime
+from typing import Any, Sequence
+
+import orjson
+from fastapi import HTTPException
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps(list(values))).decode()
+
+
+def decode_cursor(cursor: str, keys: Sequence[InstrumentedAttribute]) -> list[Any]:
+    """Разобрать курсор и привести значения к типам ключевых колонок."""
+    try:
+        values = orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError
+        result = []
+        for key, value in zip(keys, values):
+            python_type = key.type.python_type
+            if value is not None and python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif value is not None and python_type is date:
+                value = date.fromisoformat(value)
+            result.append(value)
+        return result
+    except (ValueError, TypeError, orjson.JSONDecodeError):
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
+
+
+async def fetch_page(
+    session: AsyncSession,
+    stmt: Select,
+    *,
+    keys: Sequence[InstrumentedAttribute],
+    cursor: str | None,
+    limit: int,
+    descending: bool = False,
+) -> tuple[list[Any], str | None]:
+    """
+    Keyset-страница по уникальному набору колонок `keys`.
+
+    Условие строится сравнением строк `(k1, k2, ...) > (v1, v2, ...)`, поэтому
+    запрос идёт по индексу и не зависит от глубины страницы (в отличие от OFFSET).
+    """
+    if cursor is not None:
+        bound = tuple_(*decode_cursor(cursor, keys))
+        stmt = stmt.where(tuple_(*keys) < bound if descending else tuple_(*keys) > bound)
+
+    stmt = (
+        stmt.order_by(None)
+        .order_by(*(key.desc() if descending else key.asc() for key in keys))
+        .limit(limit + 1)
+    )
+    rows = list((await session.scalars(stmt)).unique().all())
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([getattr(rows[-1], key.key) for key in keys])
+    return rows, next_cursor
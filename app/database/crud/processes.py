@@ -1,5 +1,5 @@
 from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, noload
 
 from app.database import Process, SessionDep, StepDefinition
 from app.database.crud.mixines import GetBackNextIdMixin
@@ -13,6 +13,21 @@ def get_process_repo(session: SessionDep) -> "ProcessRepository":
 class ProcessRepository(GetBackNextIdMixin[Process]):
     model = Process
 
+    async def get_catalog(self) -> list[Process]:
+        """Процессы с этапами для справочника (без изделий и истории этапов)."""
+        stmt = (
+            select(Process)
+            .options(
+                selectinload(Process.size_type),
+                selectinload(Process.steps).options(
+                    selectinload(StepDefinition.template),
+                    noload(StepDefinition.work_process),
+                ),
+            )
+            .order_by(Process.id)
+        )
+        return list((await self.session.scalars(stmt)).all())
+
     async def copy_process(self, process_id: int) -> Process:
         stmt = (
             select(Process)
@@ -0,0 +1,229 @@
+from collections import Counter
+from datetime import date as date_type
+from typing import Iterable
+
+from sqlalchemy import select, func, case, and_, literal_column, Select, union
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.crud.daily_finished_counters import (
+    DailyFinishedCounterRepository,
+    FinishedKey,
+)
+from app.database.models import Product, ProductProgress, ProductStep, StepDefinition
+from app.database.models.product import ProductStatus
+from app.database.models.product_step import StepStatus
+from app.utils.dates import day_range
+
+ProductIds = Iterable[int] | Select
+
+
+class ProductProgressRepository:
+    """
+    Поддержка таблицы `product_progress`.
+
+    Методы не коммитят: вызываются внутри транзакции, меняющей этапы изделия,
+    чтобы состояние прогресса фиксировалось вместе с ними. Вместе с прогрессом
+    поддерживается `daily_finished_counters`.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    @staticmethod
+    def _source_stmt(product_ids: ProductIds | None = None):
+        """SELECT с актуальным прогрессом изделий (всех или только указанных)."""
+        ps_filter = []
+        product_filter = []
+        if product_ids is not None:
+            ids = product_ids if isinstance(product_ids, Select) else list(product_ids)
+            ps_filter.append(ProductStep.product_id.in_(ids))
+            product_filter.append(Product.id.in_(ids))
+
+        is_done = ProductStep.status == StepStatus.done
+
+        counts_subq = (
+            select(
+                ProductStep.product_id,
+                func.count(ProductStep.id).label("total_count"),
+                func.count(ProductStep.id).filter(is_done).label("done_count"),
+                func.max(ProductStep.performed_at)
+                .filter(is_done)
+                .label("last_done_at"),
+            )
+            .where(*ps_filter)
+            .group_by(ProductStep.product_id)
+            .subquery()
+        )
+
+        # последний закрытый этап по порядку в процессе
+        last_done_subq = (
+            select(
+                ProductStep.product_id,
+                ProductStep.step_definition_id,
+                ProductStep.performed_at,
+            )
+            .join(StepDefinition, StepDefinition.id == ProductStep.step_definition_id)
+            .where(is_done, *ps_filter)
+            .distinct(ProductStep.product_id)
+            .order_by(
+                ProductStep.product_id,
+                StepDefinition.order.desc(),
+                ProductStep.performed_at.desc().nulls_last(),
+                ProductStep.id.desc(),
+            )
+            .subquery()
+        )
+
+        done_count = func.coalesce(counts_subq.c.done_count, 0)
+        total_count = func.coalesce(counts_subq.c.total_count, 0)
+
+        # засчитывается в статистику завершённых: все этапы закрыты, статус
+        # normal, дата — закрытие последнего по порядку этапа
+        counted = and_(
+            done_count == total_count,
+            Product.status == ProductStatus.normal,
+            last_done_subq.c.performed_at.is_not(None),
+        )
+        finished_on = func.date(
+            func.timezone(
+                literal_column("'Europe/Moscow'"), last_done_subq.c.performed_at
+            )
+        )
+
+        return (
+            select(
+                Product.id,
+                last_done_subq.c.step_definition_id,
+                counts_subq.c.last_done_at,
+                done_count,
+                total_count,
+                done_count == total_count,
+                case((counted, finished_on)),
+                case((counted, Product.process_id)),
+            )
+            .outerjoin(counts_subq, counts_subq.c.product_id == Product.id)
+            .outerjoin(last_done_subq, last_done_subq.c.product_id == Product.id)
+            .where(*product_filter)
+        )
+
+    async def _upsert(self, product_ids: ProductIds | None = None) -> None:
+        stmt = insert(ProductProgress).from_select(
+            [
+                ProductProgress.product_id,
+                ProductProgress.last_done_step_definition_id,
+                ProductProgress.last_done_at,
+                ProductProgress.done_count,
+                ProductProgress.total_count,
+                ProductProgress.is_finished,
+                ProductProgress.finished_on,
+                ProductProgress.finished_process_id,
+            ],
+            self._source_stmt(product_ids),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ProductProgress.product_id],
+            set_={
+                "last_done_step_definition_id": stmt.excluded.last_done_step_definition_id,
+                "last_done_at": stmt.excluded.last_done_at,
+                "done_count": stmt.excluded.done_count,
+                "total_count": stmt.excluded.total_count,
+                "is_finished": stmt.excluded.is_finished,
+                "finished_on": stmt.excluded.finished_on,
+                "finished_process_id": stmt.excluded.finished_process_id,
+            },
+        )
+        await self.session.execute(stmt)
+
+    async def refresh(self, *product_ids: int) -> None:
+        """Пересчитать прогресс указанных изделий (только по их этапам)."""
+        if not product_ids:
+            return
+        await self.session.flush()
+        # строки изделий блокируются до пересчёта: иначе две транзакции по
+        # одному изделию в READ COMMITTED считают агрегат по снимкам до
+        # коммита друг друга, и более поздняя записывает устаревший прогресс
+        # (а разница для daily_finished_counters применяется дважды). После
+        # ожидания блокировки следующие запросы видят чужой коммит. FOR NO KEY
+        # UPDATE не мешает вставке этапов (проверка внешнего ключа).
+        await self.session.execute(
+            select(Product.id)
+            .where(Product.id.in_(product_ids))
+            .order_by(Product.id)
+            .with_for_update(key_share=True)
+        )
+        before = await self._finished_keys(product_ids)
+        await self._upsert(product_ids)
+        after = await self._finished_keys(product_ids)
+        await DailyFinishedCounterRepository(self.session).apply(before, after)
+
+    async def _finished_keys(self, product_ids: Iterable[int]) -> Counter[FinishedKey]:
+        """Вклад изделий в `daily_finished_counters` по сохранённому прогрессу."""
+        rows = await self.session.execute(
+            select(ProductProgress.finished_on, ProductProgress.finished_process_id)
+            .where(
+                ProductProgress.product_id.in_(list(product_ids)),
+                ProductProgress.finished_on.is_not(None),
+            )
+        )
+        return Counter((day, process_id) for day, process_id in rows)
+
+    async def finished_key(self, product_id: int) -> FinishedKey | None:
+        """Ключ, под которым изделие сейчас засчитано (None — не засчитано)."""
+        keys = await self._finished_keys([product_id])
+        return next(iter(keys), None)
+
+    async def last_done_counts(
+        self, product_ids: Iterable[int]
+    ) -> Counter[tuple[int, int]]:
+        """
+        Вклад изделий в сводку по последнему закрытому этапу.
+
+        Те же условия, что в `ProductRepository.get_counts_by_last_done_step`;
+        разница значений до и после изменения — дельта для SSE-клиентов.
+        """
+        ids = list(product_ids)
+        if not ids:
+            return Counter()
+        await self.session.flush()
+        rows = await self.session.execute(
+            select(
+                Product.process_id,
+                ProductProgress.last_done_step_definition_id,
+                func.count(Product.id),
+            )
+            .join(ProductProgress, ProductProgress.product_id == Product.id)
+            .where(
+                Product.id.in_(ids),
+                Product.status == ProductStatus.normal,
+                Product.packaging_id.is_(None),
+                ProductProgress.last_done_step_definition_id.is_not(None),
+            )
+            .group_by(Product.process_id, ProductProgress.last_done_step_definition_id)
+        )
+        return Counter({(process_id, step_id): count for process_id, step_id, count in rows})
+
+    async def rebuild(self) -> None:
+        """Полностью перестроить таблицу по истории `product_steps`."""
+        await self._upsert()
+        await DailyFinishedCounterRepository(self.session).rebuild()
+
+    async def reconcile(self, date_from: date_type) -> int:
+        """
+        Сверить прогресс и счётчики завершённых изделий начиная с `date_from`.
+
+        Пересчитывает прогресс изделий с этапами, закрытыми с этой даты, и
+        засчитанных с неё же, затем исправляет счётчики. Возвращает число
+        исправленных ключей счётчиков.
+        """
+        period_start, _ = day_range(date_from)
+        product_ids = union(
+            select(ProductStep.product_id).where(
+                ProductStep.performed_at >= period_start
+            ),
+            select(ProductProgress.product_id).where(
+                ProductProgress.finished_on >= date_from
+            ),
+        )
+        await self._upsert(select(product_ids.subquery().c.product_id))
+        return await DailyFinishedCounterRepository(self.session).reconcile(date_from)
@@ -1,10 +1,13 @@
-from datetime import date as date_type, timedelta
+from collections import Counter
+from datetime import date as date_type
 from typing import Optional
 
 from fastapi import HTTPException
-from sqlalchemy import select, func, desc
-from sqlalchemy.orm import joinedload, selectinload, aliased
+from sqlalchemy import select, func, Select
+from sqlalchemy.orm import joinedload, selectinload
 
+from app.core.progress_events import current_xact_id, progress_events
+from app.core.result_cache import CacheTag, result_cache
 from app.database import (
     Product,
     ProductStep,
@@ -15,10 +18,20 @@ from app.database import (
     DailyPlan,
 )
 from app.database.crud.mixines import GetBackNextIdMixin
-from app.database.models import DailyPlanStep
+from app.database.crud.pagination import fetch_page
+from app.database.crud.product_progress import ProductProgressRepository
+from app.database.crud.daily_step_counters import DailyStepCounterRepository
+from app.database.models import (
+    DailyPlanStep,
+    ProductProgress,
+    DailyFinishedCounter,
+    DailyStepCounter,
+)
 from app.database.models.product import ProductStatus
 from app.database.models.product_step import StepStatus
 from app.database.schemas.product import ProductCreate
+from app.database.schemas.read_view import ReadView
+from app.utils.dates import day_range
 from database import Employee
 
 
@@ -27,8 +40,60 @@ def get_product_repo(session: SessionDep) -> "ProductRepository":
 
 
 class ProductRepository(GetBackNextIdMixin[Product]):
+    """
+    Репозиторий изделий.
+
+    Реплика не используется: агрегаты статистики кэшируются
+    (`result_cache`), и промах кэша после `invalidate` должен читать
+    основную БД. Нагрузку статистики на неё снимает кэш, а не реплика.
+    """
+
     model = Product
 
+    @staticmethod
+    def _read_options() -> tuple:
+        """
+        Связи для ProductRead. selectinload вместо joinedload: коллекции
+        грузятся отдельными IN-запросами без размножения строк изделия,
+        и LIMIT страницы применяется к самим изделиям.
+        """
+        return (
+            selectinload(Product.work_process),
+            selectinload(Product.steps)
+            .selectinload(ProductStep.step_definition)
+            .selectinload(StepDefinition.template),
+            selectinload(Product.steps).selectinload(ProductStep.performed_by),
+        )
+
+    async def _project(self, view: ReadView, stmt: Select) -> list[dict]:
+        """
+        Колоночная проекция изделий, отобранных запросом `stmt` (select(Product)).
+
+        Строки возвращаются словарями и сериализуются без ORM-объектов и
+        Pydantic-валидации.
+        """
+        ids_subq = stmt.with_only_columns(Product.id).order_by(None)
+        projection = select(
+            Product.id,
+            Product.serial_number,
+            Product.status,
+            Product.created_at,
+            Product.packaging_id,
+            Product.process_id,
+            Process.name.label("process_name"),
+        ).join(Process, Process.id == Product.process_id)
+        if view == ReadView.steps_summary:
+            projection = projection.add_columns(
+                ProductProgress.done_count,
+                ProductProgress.total_count,
+                ProductProgress.is_finished,
+                ProductProgress.last_done_step_definition_id,
+                ProductProgress.last_done_at,
+            ).outerjoin(ProductProgress, ProductProgress.product_id == Product.id)
+        projection = projection.where(Product.id.in_(ids_subq)).order_by(Product.id)
+        result = await self.session.execute(projection)
+        return [dict(row) for row in result.mappings().all()]
+
     async def create_product(self, product_in: ProductCreate) -> Product:
         # 1) создаём продукт
         product = product_in.to_orm()
@@ -61,8 +126,9 @@ class ProductRepository(GetBackNextIdMixin[Product]):
                 )
             )
 
-        # 4) коммитим транзакцию
+        # 4) пересчитываем прогресс и коммитим транзакцию
         try:
+            await ProductProgressRepository(self.session).refresh(product.id)
             await self.session.commit()
         except Exception:
             await self.session.rollback()
@@ -108,20 +174,61 @@ class ProductRepository(GetBackNextIdMixin[Product]):
             detail=f"Продукт с идентификатором {ident} не найден",
         )
 
+    async def get_view(
+        self,
+        view: ReadView,
+        *,
+        id: Optional[int] = None,
+        serial_number: Optional[str] = None,
+    ) -> dict:
+        """Проекция одного изделия (см. `get`)."""
+        stmt = select(Product)
+        if id is not None:
+            stmt = stmt.where(Product.id == id)
+        else:
+            stmt = stmt.where(Product.serial_number == serial_number)
+        rows = await self._project(view, stmt)
+        if rows:
+            return rows[0]
+        ident = id if id is not None else serial_number
+        raise HTTPException(
+            status_code=404,
+            detail=f"Продукт с идентификатором {ident} не найден",
+        )
+
+    async def get_many(self, ids: set[int] | list[int]) -> list[Product]:
+        stmt = select(Product).options(*self._read_options()).where(Product.id.in_(ids))
+        result = await self.session.scalars(stmt)
+        return list(result.unique().all())
+
     async def set_status(self, product_id: int, status: ProductStatus) -> Product:
         product = await self.get(id=product_id)
 
         if product.status == status:
             return product
 
+        progress = ProductProgressRepository(self.session)
+        before = await progress.last_done_counts([product.id])
         product.status = status
 
         try:
+            # статус влияет на учёт изделия в daily_finished_counters
+            await progress.refresh(product.id)
+            after = await progress.last_done_counts([product.id])
+            xact_id = await current_xact_id(self.session)
             await self.session.commit()
         except Exception:
             await self.session.rollback()
             raise
 
+        await result_cache.invalidate(CacheTag.progress, CacheTag.statistics)
+        await progress_events.publish_last_done_step(before, after, xact_id)
+        await progress_events.publish(
+            "product_status",
+            {"product_id": product.id, "status": status.value},
+            xact_id,
+        )
+
         await self.session.refresh(product)
         return product
 
@@ -164,6 +271,13 @@ class ProductRepository(GetBackNextIdMixin[Product]):
         if new_process is None:
             raise ValueError("Процесс с таким new_process_id не найден")
 
+        # закрытые этапы переедут на этапы нового процесса — запоминаем,
+        # в какие дневные счётчики они засчитаны сейчас
+        counters = DailyStepCounterRepository(self.session)
+        old_keys = Counter(
+            key for ps in product.steps if (key := counters.key_for(ps)) is not None
+        )
+
         # 3) индекс: template_id -> список ProductStep (на случай повторов)
         steps_by_template: dict[int, list[ProductStep]] = {}
         for ps in product.steps:
@@ -213,65 +327,53 @@ class ProductRepository(GetBackNextIdMixin[Product]):
         # 6) меняем процесс у продукта
         product.process_id = new_process_id
 
-        # 7) коммит
+        new_keys = Counter(
+            key
+            for ps in new_product_steps
+            if (key := counters.key_for(ps)) is not None
+        )
+
+        # 7) пересчёт прогресса и счётчиков, коммит
         try:
+            for key in old_keys.keys() | new_keys.keys():
+                if delta := new_keys[key] - old_keys[key]:
+                    await counters.add(key, delta)
+            await ProductProgressRepository(self.session).refresh(product.id)
             await self.session.commit()
         except Exception:
             await self.session.rollback()
             raise
 
+        await result_cache.invalidate(CacheTag.progress, CacheTag.statistics)
         await self.session.refresh(product)
         return product
 
+    @result_cache.cached("counts_by_last_done_step", CacheTag.progress)
     async def get_counts_by_last_done_step(self):
-
-        ps_alias = aliased(ProductStep)
-        sd_alias = aliased(StepDefinition)
-
-        subq = (
-            select(
-                ps_alias.product_id,
-                ps_alias.step_definition_id,
-                func.row_number()
-                .over(
-                    partition_by=ps_alias.product_id,
-                    order_by=(
-                        desc(sd_alias.order),
-                        desc(ps_alias.accepted_at),
-                    ),
-                )
-                .label("rn"),
-            )
-            .join(sd_alias, sd_alias.id == ps_alias.step_definition_id)
-            .where(ps_alias.status == StepStatus.done)
-            .subquery()
-        )
-
-        # Основной запрос
         stmt = (
             select(
                 Product.process_id,
-                Process.name.label(
-                    "process_name"
-                ),  # предполагается поле name у Process
-                subq.c.step_definition_id,
+                Process.name.label("process_name"),
+                ProductProgress.last_done_step_definition_id.label(
+                    "step_definition_id"
+                ),
                 StepTemplate.name.label("step_name"),
                 StepTemplate.name_genitive.label("step_name_genitive"),
                 func.count(Product.id).label("count"),
             )
-            .join(subq, subq.c.product_id == Product.id)
-            .join(StepDefinition, StepDefinition.id == subq.c.step_definition_id)
+            .join(ProductProgress, ProductProgress.product_id == Product.id)
             .join(
-                StepTemplate, StepTemplate.id == StepDefinition.template_id
-            )  # присоединяем StepTemplate
+                StepDefinition,
+                StepDefinition.id == ProductProgress.last_done_step_definition_id,
+            )
+            .join(StepTemplate, StepTemplate.id == StepDefinition.template_id)
             .join(Process, Process.id == Product.process_id)
             .where(Product.status == ProductStatus.normal)
             .where(Product.packaging_id.is_(None))
-            .where(subq.c.rn == 1)
             .group_by(
                 Product.process_id,
                 Process.name,
-                subq.c.step_definition_id,
+                ProductProgress.last_done_step_definition_id,
                 StepTemplate.name,
                 StepTemplate.name_genitive,
             )
@@ -281,45 +383,17 @@ class ProductRepository(GetBackNextIdMixin[Product]):
         rows = result.all()
         return [dict(row._mapping) for row in rows]
 
-    async def get_finished_products(
-        self,
-        *,
-        employee_id: int | None = None,
-    ) -> list[Product]:
+    def _finished_products_stmt(self, employee_id: int | None = None):
         today = date_type.today()
 
-        not_done_exists = (
-            select(ProductStep.id)
-            .where(
-                ProductStep.product_id == Product.id,
-                ProductStep.status != StepStatus.done,
-            )
-            .exists()
-        )
-
         # базовые условия «завершённого» продукта
         conditions = [
             Product.status == ProductStatus.normal,
             Product.packaging_id.is_(None),
-            ~not_done_exists,
+            ProductProgress.is_finished.is_(True),
         ]
 
         if employee_id is not None:
-            # последний выполненный шаг продукта (по порядку StepDefinition.order)
-            last_step_step_def_id_subq = (
-                select(ProductStep.step_definition_id)
-                .join(
-                    StepDefinition, StepDefinition.id == ProductStep.step_definition_id
-                )
-                .where(
-                    ProductStep.product_id == Product.id,
-                    ProductStep.status == StepStatus.done,
-                )
-                .order_by(StepDefinition.order.desc())
-                .limit(1)
-                .scalar_subquery()
-            )
-
             # множество step_definition_id из дневного плана сотрудника на сегодня
             plan_step_def_ids_subq = (
                 select(DailyPlanStep.step_definition_id)
@@ -331,17 +405,49 @@ class ProductRepository(GetBackNextIdMixin[Product]):
             )
 
             # пересечение: последний шаг продукта должен быть в плане
-            conditions.append(last_step_step_def_id_subq.in_(plan_step_def_ids_subq))
+            conditions.append(
+                ProductProgress.last_done_step_definition_id.in_(
+                    plan_step_def_ids_subq
+                )
+            )
 
-        stmt = (
+        return (
             select(Product)
+            .join(ProductProgress, ProductProgress.product_id == Product.id)
             .where(*conditions)
-            .options(selectinload(Product.work_process))
         )
 
+    async def get_finished_products(
+        self,
+        *,
+        employee_id: int | None = None,
+        view: ReadView = ReadView.full,
+    ) -> list[Product] | list[dict]:
+        stmt = self._finished_products_stmt(employee_id)
+        if view != ReadView.full:
+            return await self._project(view, stmt)
+        stmt = stmt.options(selectinload(Product.work_process))
         result = await self.session.execute(stmt)
         return list(result.scalars().all())
 
+    async def get_finished_products_page(
+        self,
+        *,
+        employee_id: int | None = None,
+        cursor: str | None = None,
+        limit: int,
+    ) -> tuple[list[Product], str | None]:
+        return await fetch_page(
+            self.session,
+            self._finished_products_stmt(employee_id).options(
+                selectinload(Product.work_process)
+            ),
+            keys=[Product.id],
+            cursor=cursor,
+            limit=limit,
+        )
+
+    @result_cache.cached("finished_products_stats_by_period", CacheTag.statistics)
     async def get_finished_products_stats_by_period(
         self,
         date_from: date_type,
@@ -349,147 +455,123 @@ class ProductRepository(GetBackNextIdMixin[Product]):
     ):
         """
         Считает количество завершённых продуктов по процессам, у которых последний этап
-        был выполнен в указанный период.
+        был выполнен в указанный период (сумма дневных счётчиков).
         """
-        not_done_exists = (
-            select(ProductStep.id)
-            .where(
-                ProductStep.product_id == Product.id,
-                ProductStep.status != StepStatus.done,
-            )
-            .exists()
-        )
-
-        last_step_date_subq = (
-            select(func.date(ProductStep.performed_at))
-            .join(StepDefinition, StepDefinition.id == ProductStep.step_definition_id)
-            .where(
-                ProductStep.product_id == Product.id,
-                ProductStep.status == StepStatus.done,
-                ProductStep.performed_at.is_not(None),
-            )
-            .order_by(desc(StepDefinition.order))
-            .limit(1)
-            .scalar_subquery()
-        )
-
-        conditions = [
-            Product.status == ProductStatus.normal,
-            ~not_done_exists,
-            last_step_date_subq >= date_from,
-            last_step_date_subq <= date_to,
-        ]
-
         stmt = (
             select(
                 Process.id.label("process_id"),
                 Process.name.label("process_name"),
-                func.count(Product.id).label("count"),
+                func.sum(DailyFinishedCounter.count).label("count"),
             )
-            .select_from(Product)
-            .join(Process, Process.id == Product.process_id)
-            .where(*conditions)
+            .select_from(DailyFinishedCounter)
+            .join(Process, Process.id == DailyFinishedCounter.process_id)
+            .where(DailyFinishedCounter.date.between(date_from, date_to))
             .group_by(Process.id, Process.name)
+            .having(func.sum(DailyFinishedCounter.count) > 0)
         )
 
         result = await self.session.execute(stmt)
         return [dict(row._mapping) for row in result.all()]
 
+    @result_cache.cached("completed_steps_stats_by_period", CacheTag.statistics)
     async def get_completed_steps_stats_by_period(
         self, date_from: date_type, date_to: date_type
     ):
-        """Считает количество закрытых этапов по процессам и сотрудникам за период."""
+        """
+        Считает количество закрытых этапов по процессам и сотрудникам за период
+        (сумма дневных счётчиков `daily_step_counters`).
+        """
         stmt = (
             select(
-                Product.process_id,
+                StepDefinition.process_id,
                 Process.name.label("process_name"),
-                ProductStep.step_definition_id,
+                DailyStepCounter.step_definition_id,
                 StepDefinition.order.label("order"),
                 StepTemplate.name.label("step_name"),
-                ProductStep.performed_by_id.label("employee_id"),
+                DailyStepCounter.employee_id,
                 Employee.name.label("employee_name"),
-                func.count(ProductStep.id).label("count"),
+                func.sum(DailyStepCounter.count).label("count"),
             )
-            .select_from(ProductStep)
-            .join(Product, Product.id == ProductStep.product_id)
-            .join(Process, Process.id == Product.process_id)
-            .join(StepDefinition, StepDefinition.id == ProductStep.step_definition_id)
+            .select_from(DailyStepCounter)
+            .join(
+                StepDefinition,
+                StepDefinition.id == DailyStepCounter.step_definition_id,
+            )
+            .join(Process, Process.id == StepDefinition.process_id)
             .join(StepTemplate, StepTemplate.id == StepDefinition.template_id)
-            .join(Employee, Employee.id == ProductStep.performed_by_id)
-            .where(ProductStep.status == StepStatus.done)
-            .where(ProductStep.performed_at.is_not(None))
-            .where(func.date(ProductStep.performed_at) >= date_from)
-            .where(func.date(ProductStep.performed_at) <= date_to)
+            .join(Employee, Employee.id == DailyStepCounter.employee_id)
+            .where(DailyStepCounter.date.between(date_from, date_to))
             .group_by(
-                Product.process_id,
+                StepDefinition.process_id,
                 Process.name,
-                ProductStep.step_definition_id,
+                DailyStepCounter.step_definition_id,
                 StepDefinition.order,
                 StepTemplate.name,
-                ProductStep.performed_by_id,
+                DailyStepCounter.employee_id,
                 Employee.name,
             )
+            .having(func.sum(DailyStepCounter.count) > 0)
         )
 
         result = await self.session.execute(stmt)
         return [dict(row._mapping) for row in result.all()]
 
-    async def list_by_process_and_last_completed_step(
-        self,
-        *,
-        process_id: int,
-        step_definition_id: int,
-    ) -> list[Product]:
-        last_step_id_subq = (
-            select(ProductStep.id)
-            .join(StepDefinition, StepDefinition.id == ProductStep.step_definition_id)
-            .where(ProductStep.product_id == Product.id)  # корреляция с outer query
-            .where(ProductStep.performed_at.is_not(None))
-            .order_by(
-                desc(StepDefinition.order),
-                desc(ProductStep.performed_at),
-                desc(ProductStep.id),
-            )
-            .limit(1)
-            .correlate(Product)
-            .scalar_subquery()
-        )
-
-        stmt = (
+    def _by_last_completed_step_stmt(self, process_id: int, step_definition_id: int):
+        return (
             select(Product)
-            .options(
-                joinedload(Product.work_process),
-                joinedload(Product.steps)
-                .joinedload(ProductStep.step_definition)
-                .joinedload(StepDefinition.template),
-                joinedload(Product.steps).joinedload(ProductStep.performed_by),
-            )
+            .join(ProductProgress, ProductProgress.product_id == Product.id)
             .where(Product.process_id == process_id)
             .where(Product.packaging_id.is_(None))
             .where(Product.status == ProductStatus.normal)
-            .where(
-                select(ProductStep.step_definition_id)
-                .where(ProductStep.id == last_step_id_subq)
-                .scalar_subquery()
-                == step_definition_id
-            )
+            .where(ProductProgress.last_done_step_definition_id == step_definition_id)
             .order_by(Product.id)
         )
 
+    async def list_by_process_and_last_completed_step(
+        self,
+        *,
+        process_id: int,
+        step_definition_id: int,
+        view: ReadView = ReadView.full,
+    ) -> list[Product] | list[dict]:
+        stmt = self._by_last_completed_step_stmt(process_id, step_definition_id)
+        if view != ReadView.full:
+            return await self._project(view, stmt)
+        stmt = stmt.options(*self._read_options())
         result = await self.session.scalars(stmt)
         return result.unique().all()
 
+    async def list_by_process_and_last_completed_step_page(
+        self,
+        *,
+        process_id: int,
+        step_definition_id: int,
+        cursor: str | None = None,
+        limit: int,
+    ) -> tuple[list[Product], str | None]:
+        return await fetch_page(
+            self.session,
+            self._by_last_completed_step_stmt(process_id, step_definition_id).options(
+                *self._read_options()
+            ),
+            keys=[Product.id],
+            cursor=cursor,
+            limit=limit,
+        )
+
     async def list_by_step_employee_and_day(
         self,
         *,
         step_definition_id: int,
         employee_id: int,
         day: date_type,
-    ) -> list[Product]:
+        view: ReadView = ReadView.full,
+    ) -> list[Product] | list[dict]:
         """
         Продукты, у которых ЕСТЬ этап с указанным step_definition_id,
         выполненный заданным сотрудником в указанную дату.
         """
+        day_start, day_end = day_range(day)
         has_step_subq = (
             select(ProductStep.id)
             .where(
@@ -497,44 +579,50 @@ class ProductRepository(GetBackNextIdMixin[Product]):
                 ProductStep.step_definition_id == step_definition_id,
                 ProductStep.performed_by_id == employee_id,
                 ProductStep.status == StepStatus.done,
-                ProductStep.performed_at >= day,
-                ProductStep.performed_at < day + timedelta(days=1),
+                ProductStep.performed_at >= day_start,
+                ProductStep.performed_at < day_end,
             )
             .exists()
         )
 
-        stmt = (
-            select(Product)
-            .options(
-                joinedload(Product.work_process),
-                joinedload(Product.steps)
-                .joinedload(ProductStep.step_definition)
-                .joinedload(StepDefinition.template),
-                joinedload(Product.steps).joinedload(ProductStep.performed_by),
-            )
-            .where(has_step_subq)
-            .order_by(Product.id)
-        )
+        stmt = select(Product).where(has_step_subq).order_by(Product.id)
+        if view != ReadView.full:
+            return await self._project(view, stmt)
 
+        stmt = stmt.options(*self._read_options())
         result = await self.session.scalars(stmt)
         return result.unique().all()
 
-    async def get_products_not_normal(self) -> list[Product]:
-        """
-        Возвращает список продуктов, статус которых отличается от ProductStatus.normal.
-        """
-        stmt = (
+    def _not_normal_stmt(self):
+        return (
             select(Product)
             .where(Product.status != ProductStatus.normal)
-            .options(
-                joinedload(Product.work_process),
-                joinedload(Product.steps)
-                .joinedload(ProductStep.step_definition)
-                .joinedload(StepDefinition.template),
-                joinedload(Product.steps).joinedload(ProductStep.performed_by),
-            )
             .order_by(Product.id)
         )
 
-        result = await self.session.scalars(stmt)
+    async def get_products_not_normal(
+        self,
+        view: ReadView = ReadView.full,
+    ) -> list[Product] | list[dict]:
+        """
+        Возвращает список продуктов, статус которых отличается от ProductStatus.normal.
+        """
+        stmt = self._not_normal_stmt()
+        if view != ReadView.full:
+            return await self._project(view, stmt)
+        result = await self.session.scalars(stmt.options(*self._read_options()))
         return list(result.unique().all())
+
+    async def get_products_not_normal_page(
+        self,
+        *,
+        cursor: str | None = None,
+        limit: int,
+    ) -> tuple[list[Product], str | None]:
+        return await fetch_page(
+            self.session,
+            self._not_normal_stmt().options(*self._read_options()),
+            keys=[Product.id],
+            cursor=cursor,
+            limit=limit,
+        )
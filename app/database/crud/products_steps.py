@@ -1,10 +1,17 @@
-from datetime import datetime
+from collections import Counter
+from datetime import date, datetime
 from zoneinfo import ZoneInfo
 
-from sqlalchemy import select
+from sqlalchemy import select, update
+from sqlalchemy.orm import aliased
 
+from app.core.progress_events import current_xact_id, progress_events
+from app.core.result_cache import CacheTag, result_cache
 from app.database import ProductStep, StepDefinition, SessionDep
+from app.database.crud.daily_plans import DailyPlanRepository
+from app.database.crud.daily_step_counters import DailyStepCounterRepository
 from app.database.crud.mixines import GetBackNextIdMixin
+from app.database.crud.product_progress import ProductProgressRepository
 from app.database.models.product_step import StepStatus
 
 
@@ -15,12 +22,28 @@ def get_products_steps_repo(session: SessionDep) -> "ProductStepRepository":
 class ProductStepRepository(GetBackNextIdMixin[ProductStep]):
     model = ProductStep
 
+    async def _get_for_update(self, step_id: int) -> ProductStep | None:
+        """
+        Этап под блокировкой строки до конца транзакции.
+
+        Ключ счётчика до изменения считается по заблокированной строке: иначе
+        два одновременных закрытия одного этапа оба видят его незакрытым и
+        засчитывают дважды. populate_existing — значения берутся из БД, а не
+        из identity map сессии.
+        """
+        return await self.session.scalar(
+            select(ProductStep)
+            .where(ProductStep.id == step_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+
     async def accept_step(
         self,
         step_id: int,
         employee_id: int,
     ) -> type[ProductStep] | None:
-        step = await self.session.get(self.model, step_id)
+        step = await self._get_for_update(step_id)
         if not step:
             return None
 
@@ -41,16 +64,36 @@ class ProductStepRepository(GetBackNextIdMixin[ProductStep]):
         if prev_step and prev_step.status != StepStatus.done:
             raise ValueError("Нельзя принять этот этап, пока предыдущий не завершён.")
 
+        counters = DailyStepCounterRepository(self.session)
+        progress = ProductProgressRepository(self.session)
+        old_key = counters.key_for(step)
+        before = await progress.last_done_counts([step.product_id])
+
         step.status = StepStatus.done
         step.performed_by_id = employee_id
         step.performed_at = datetime.now(ZoneInfo("Europe/Moscow"))
+        new_key = counters.key_for(step)
 
         try:
+            await counters.move(old_key, new_key)
+            await progress.refresh(step.product_id)
+            after = await progress.last_done_counts([step.product_id])
+            xact_id = await current_xact_id(self.session)
             await self.session.commit()
         except Exception:
             await self.session.rollback()
             raise
 
+        await result_cache.invalidate(CacheTag.progress, CacheTag.statistics)
+        await progress_events.publish_last_done_step(before, after, xact_id)
+        daily: Counter = Counter()
+        if old_key != new_key:
+            if old_key is not None:
+                daily[old_key] -= 1
+            if new_key is not None:
+                daily[new_key] += 1
+        await progress_events.publish_daily_counters(daily, xact_id)
+
         await self.session.refresh(step)
         return step
 
@@ -59,20 +102,169 @@ class ProductStepRepository(GetBackNextIdMixin[ProductStep]):
         step_id: int,
         employee_id: int,
     ) -> type[ProductStep] | None:
-        step = await self.session.get(self.model, step_id)
+        step = await self._get_for_update(step_id)
         if not step:
             return None
 
         if step.status != StepStatus.done:
             raise ValueError("Нельзя сменить исполнителя, этап ещё не закрыт.")
 
+        counters = DailyStepCounterRepository(self.session)
+        old_key = counters.key_for(step)
+
         step.performed_by_id = employee_id
 
         try:
+            await counters.move(old_key, counters.key_for(step))
             await self.session.commit()
         except Exception:
             await self.session.rollback()
             raise
 
+        await result_cache.invalidate(CacheTag.statistics)
+
         await self.session.refresh(step)
         return step
+
+    async def accept_steps_batch(
+        self,
+        step_ids: list[int],
+        employee_id: int,
+        *,
+        plan_date: date | None = None,
+    ) -> list[dict]:
+        """
+        Закрыть набор этапов одним UPDATE.
+
+        Проверка плана (если передан plan_date) и статуса предыдущих этапов
+        делается одним запросом на весь набор. Предыдущий этап, закрываемый
+        в этом же пакете, считается закрытым — как при последовательных вызовах
+        accept_step. Возвращает результат по каждому id в порядке запроса.
+        """
+        ids = list(dict.fromkeys(step_ids))
+        if not ids:
+            return []
+
+        rows = (
+            await self.session.execute(
+                select(
+                    ProductStep.id,
+                    ProductStep.product_id,
+                    ProductStep.step_definition_id,
+                    ProductStep.status,
+                    ProductStep.performed_at,
+                    ProductStep.performed_by_id,
+                    StepDefinition.order,
+                )
+                .join(StepDefinition, StepDefinition.id == ProductStep.step_definition_id)
+                .where(ProductStep.id.in_(ids))
+                # строки этапов блокируются до коммита: дельты счётчиков
+                # считаются по прочитанным значениям, и параллельное закрытие
+                # тех же этапов засчитало бы их дважды. Порядок по id —
+                # пересекающиеся пакеты блокируют строки в одном порядке
+                .order_by(ProductStep.id)
+                .with_for_update(of=ProductStep)
+            )
+        ).all()
+        steps = {row.id: row for row in rows}
+
+        results = {step_id: {"step_id": step_id, "result": "not_found"} for step_id in ids}
+        for row in rows:
+            results[row.id]["product_id"] = row.product_id
+
+        candidates = set(steps)
+        if plan_date is not None and candidates:
+            planned = await DailyPlanRepository(self.session).get_planned_step_def_ids(
+                date=plan_date,
+                employee_id=employee_id,
+                step_def_ids={steps[i].step_definition_id for i in candidates},
+            )
+            for step_id in list(candidates):
+                if steps[step_id].step_definition_id not in planned:
+                    results[step_id]["result"] = "not_in_plan"
+                    candidates.discard(step_id)
+
+        # незакрытые предыдущие этапы для всего набора
+        prev = aliased(ProductStep)
+        prev_def = aliased(StepDefinition)
+        blocking = {}
+        if candidates:
+            blocking = dict(
+                (
+                    await self.session.execute(
+                        select(ProductStep.id, prev.id)
+                        .join(
+                            StepDefinition,
+                            StepDefinition.id == ProductStep.step_definition_id,
+                        )
+                        .join(prev, prev.product_id == ProductStep.product_id)
+                        .join(
+                            prev_def,
+                            (prev_def.id == prev.step_definition_id)
+                            & (prev_def.process_id == StepDefinition.process_id)
+                            & (prev_def.order == StepDefinition.order - 1),
+                        )
+                        .where(
+                            ProductStep.id.in_(candidates),
+                            prev.status != StepStatus.done,
+                        )
+                    )
+                ).all()
+            )
+
+        accepted: set[int] = set()
+        for step_id in sorted(candidates, key=lambda i: steps[i].order):
+            prev_id = blocking.get(step_id)
+            if prev_id is not None and prev_id not in accepted:
+                results[step_id]["result"] = "previous_not_done"
+                continue
+            accepted.add(step_id)
+            results[step_id]["result"] = "done"
+
+        if accepted:
+            performed_at = datetime.now(ZoneInfo("Europe/Moscow"))
+            counters = DailyStepCounterRepository(self.session)
+            progress = ProductProgressRepository(self.session)
+            product_ids = {steps[i].product_id for i in accepted}
+            before = await progress.last_done_counts(product_ids)
+            deltas: Counter = Counter()
+            for step_id in accepted:
+                step = steps[step_id]
+                old_key = counters.key_for(step)
+                new_key = (
+                    performed_at.date(),
+                    employee_id,
+                    step.step_definition_id,
+                )
+                if old_key != new_key:
+                    if old_key is not None:
+                        deltas[old_key] -= 1
+                    deltas[new_key] += 1
+
+            try:
+                await self.session.execute(
+                    update(ProductStep)
+                    .where(ProductStep.id.in_(accepted))
+                    .values(
+                        status=StepStatus.done,
+                        performed_by_id=employee_id,
+                        performed_at=performed_at,
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                for key, delta in deltas.items():
+                    if delta:
+                        await counters.add(key, delta)
+                await progress.refresh(*product_ids)
+                after = await progress.last_done_counts(product_ids)
+                xact_id = await current_xact_id(self.session)
+                await self.session.commit()
+            except Exception:
+                await self.session.rollback()
+                raise
+
+            await result_cache.invalidate(CacheTag.progress, CacheTag.statistics)
+            await progress_events.publish_last_done_step(before, after, xact_id)
+            await progress_events.publish_daily_counters(deltas, xact_id)
+
+        return [results[step_id] for step_id in ids]
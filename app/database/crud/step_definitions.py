@@ -1,3 +1,6 @@
+from sqlalchemy import select
+from sqlalchemy.orm import noload, selectinload
+
 from app.database import StepDefinition, SessionDep
 from app.database.crud.mixines import GetBackNextIdMixin
 
@@ -8,3 +11,15 @@ def get_step_definition_repo(session: SessionDep) -> "StepDefinitionRepository":
 
 class StepDefinitionRepository(GetBackNextIdMixin[StepDefinition]):
     model = StepDefinition
+
+    async def get_catalog(self) -> list[StepDefinition]:
+        """Этапы для справочника (без этапов изделий и строк дневных планов)."""
+        stmt = (
+            select(StepDefinition)
+            .options(
+                selectinload(StepDefinition.template),
+                noload(StepDefinition.work_process),
+            )
+            .order_by(StepDefinition.id)
+        )
+        return list((await self.session.scalars(stmt)).all())
@@ -0,0 +1,257 @@
+import base64
+import binascii
+import time
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta, timezone
+
+import orjson
+from sqlalchemy import select, text, tuple_, delete, and_, func, union
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import SessionDep
+from app.database.models import (
+    BaseWithId,
+    DailyPlan,
+    DailyPlanStep,
+    DailyStepCounter,
+    Order,
+    OrderItem,
+    Packaging,
+    Product,
+    ProductStep,
+    SyncTombstone,
+)
+
+# таблицы, отдаваемые /sync, в порядке применения на клиенте
+SYNCED_MODELS: dict[str, type[BaseWithId]] = {
+    "products": Product,
+    "product_steps": ProductStep,
+    "daily_plans": DailyPlan,
+    "daily_plan_steps": DailyPlanStep,
+    "packaging": Packaging,
+    "orders": Order,
+    "order_items": OrderItem,
+}
+DELETED = "deleted"
+
+# самая старая незавершённая транзакция: всё, что ниже, уже видно целиком
+HORIZON_SQL = text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+
+
+class SyncCursorError(ValueError):
+    """Курсор синхронизации не разобран."""
+
+
+class SyncCursorExpired(SyncCursorError):
+    """Курсор старше хранимых отметок об удалении: нужна полная синхронизация."""
+
+
+@dataclass(frozen=True)
+class SyncCursor:
+    """
+    Позиция клиента в потоке изменений.
+
+    Проход выбирает строки с `change_id >= since` порциями по ключу
+    `(change_id, id)`. В начале прохода запоминается `horizon` — xmin
+    снимка БД: все транзакции ниже него завершены, поэтому следующий проход
+    начинается с `since = horizon` и не теряет строки транзакций, которые
+    были открыты во время выборки. Ценой этого отдельные строки могут прийти
+    повторно.
+
+    Атрибуты:
+        since: Нижняя граница `change_id` текущего прохода (0 — полная выгрузка).
+        since_at: Когда взят `since` (unix time), для проверки срока хранения
+            отметок об удалении.
+        horizon: Граница следующего прохода (None — проход ещё не начат).
+        horizon_at: Когда взят `horizon`.
+        positions: Последний отданный ключ `(change_id, id)` по таблицам.
+        done: Таблицы, выгруженные в этом проходе полностью.
+    """
+
+    since: int = 0
+    since_at: float = 0.0
+    horizon: int | None = None
+    horizon_at: float = 0.0
+    positions: dict[str, tuple[int, int]] = field(default_factory=dict)
+    done: frozenset[str] = frozenset()
+
+    def encode(self) -> str:
+        data = {
+            "s": self.since,
+            "sa": self.since_at,
+            "h": self.horizon,
+            "ha": self.horizon_at,
+            "p": self.positions,
+            "d": sorted(self.done),
+        }
+        return base64.urlsafe_b64encode(orjson.dumps(data)).rstrip(b"=").decode()
+
+    @classmethod
+    def decode(cls, value: str | None) -> "SyncCursor":
+        if not value:
+            return cls()
+        try:
+            data = orjson.loads(base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)))
+            return cls(
+                since=int(data["s"]),
+                since_at=float(data["sa"]),
+                horizon=None if data["h"] is None else int(data["h"]),
+                horizon_at=float(data["ha"]),
+                positions={
+                    str(name): (int(pos[0]), int(pos[1]))
+                    for name, pos in data["p"].items()
+                },
+                done=frozenset(str(name) for name in data["d"]),
+            )
+        except (binascii.Error, orjson.JSONDecodeError, KeyError, TypeError, ValueError):
+            raise SyncCursorError("Некорректный курсор синхронизации")
+
+    def is_expired(self, tombstone_days: int) -> bool:
+        return bool(self.since) and time.time() - self.since_at > tombstone_days * 86400
+
+
+def get_sync_repo(session: SessionDep) -> "SyncRepository":
+    return SyncRepository(session)
+
+
+class SyncRepository:
+    """
+    Выборка изменений для дельта-синхронизации мобильного приложения.
+
+    Читает основную БД: граница прохода и сами строки должны браться с
+    одного сервера.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def changes(
+        self, cursor: SyncCursor, limit: int
+    ) -> tuple[dict[str, list[dict]], SyncCursor, bool]:
+        """
+        Очередная порция изменений (до `limit` строк каждой таблицы).
+
+        Возвращает строки по таблицам (удаления — под ключом `deleted`),
+        курсор для следующего запроса и признак, что проход не закончен.
+        """
+        if cursor.horizon is None:
+            horizon = await self.session.scalar(HORIZON_SQL)
+            # при полной выгрузке удалённых строк у клиента нет
+            done = cursor.done | ({DELETED} if not cursor.since else frozenset())
+            cursor = replace(cursor, horizon=horizon, horizon_at=time.time(), done=done)
+
+        positions = dict(cursor.positions)
+        done = set(cursor.done)
+        result: dict[str, list[dict]] = {}
+
+        sources = {
+            name: (model, self._columns(model))
+            for name, model in SYNCED_MODELS.items()
+        }
+        sources[DELETED] = (
+            SyncTombstone,
+            [SyncTombstone.entity, SyncTombstone.entity_id.label("id")],
+        )
+        for name, (model, columns) in sources.items():
+            result[name] = []
+            if name in done:
+                continue
+            change_id = self._change_id(model)
+            stmt = select(
+                *columns,
+                change_id.label("_change_id"),
+                model.id.label("_row_id"),
+            ).where(change_id >= cursor.since)
+            if model is DailyPlanStep:
+                stmt = stmt.where(
+                    DailyPlanStep.id.in_(self._plan_steps_since(cursor.since))
+                )
+            if name in positions:
+                stmt = stmt.where(
+                    tuple_(change_id, model.id) > tuple_(*positions[name])
+                )
+            stmt = stmt.order_by(change_id, model.id).limit(limit + 1)
+            rows = (await self.session.execute(stmt)).mappings().all()
+
+            page = rows[:limit]
+            result[name] = [dict(row) for row in page]
+            if len(rows) > limit:
+                positions[name] = (page[-1]["_change_id"], page[-1]["_row_id"])
+            else:
+                positions.pop(name, None)
+                done.add(name)
+
+        if done >= sources.keys():
+            # проход закончен: следующий начинается с границы этого
+            next_cursor = SyncCursor(since=cursor.horizon, since_at=cursor.horizon_at)
+            return result, next_cursor, False
+        next_cursor = replace(cursor, positions=positions, done=frozenset(done))
+        return result, next_cursor, True
+
+    @staticmethod
+    def _columns(model: type[BaseWithId]) -> list:
+        columns = list(model.__table__.columns)
+        if model is DailyPlanStep:
+            columns.append(DailyPlanStep.actual_quantity)
+        return columns
+
+    @staticmethod
+    def _change_id(model: type[BaseWithId]):
+        """
+        Номер изменения строки для курсора.
+
+        Факт этапа плана считается по `daily_step_counters`, поэтому этап
+        плана изменён и тогда, когда изменился его счётчик.
+        """
+        if model is not DailyPlanStep:
+            return model.change_id
+        counter_change_id = (
+            select(DailyStepCounter.change_id)
+            .join(
+                DailyPlan,
+                and_(
+                    DailyPlan.date == DailyStepCounter.date,
+                    DailyPlan.employee_id == DailyStepCounter.employee_id,
+                ),
+            )
+            .where(
+                DailyPlan.id == DailyPlanStep.daily_plan_id,
+                DailyStepCounter.step_definition_id == DailyPlanStep.step_definition_id,
+            )
+            .scalar_subquery()
+        )
+        return func.greatest(
+            DailyPlanStep.change_id, func.coalesce(counter_change_id, 0)
+        )
+
+    @staticmethod
+    def _plan_steps_since(since: int):
+        """
+        Этапы плана, изменённые сами или через счётчик начиная с `since`.
+
+        Отбор по индексам `change_id` обеих таблиц: без него составной номер
+        изменения считался бы для каждого этапа плана.
+        """
+        return union(
+            select(DailyPlanStep.id).where(DailyPlanStep.change_id >= since),
+            select(DailyPlanStep.id)
+            .join(DailyPlan, DailyPlan.id == DailyPlanStep.daily_plan_id)
+            .join(
+                DailyStepCounter,
+                and_(
+                    DailyStepCounter.date == DailyPlan.date,
+                    DailyStepCounter.employee_id == DailyPlan.employee_id,
+                    DailyStepCounter.step_definition_id
+                    == DailyPlanStep.step_definition_id,
+                ),
+            )
+            .where(DailyStepCounter.change_id >= since),
+        )
+
+    async def prune_tombstones(self, days: int) -> int:
+        """Удалить отметки об удалении старше `days` дней."""
+        threshold = datetime.now(timezone.utc) - timedelta(days=days)
+        result = await self.session.execute(
+            delete(SyncTombstone).where(SyncTombstone.deleted_at < threshold)
+        )
+        return result.rowcount
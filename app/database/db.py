@@ -5,38 +5,143 @@ from .crud.backup_db import BackupDbRepository
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 
-from typing import Annotated, AsyncGenerator, Type
+from typing import Annotated, Any, AsyncGenerator, Type
 
 from fastapi import Depends
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import NullPool
 
 from app.core import settings
+from app.core.config import DbSettings
 from app.database.models import BaseWithId
+from app.database.sql_metrics import InstrumentedQueuePool, install_sql_metrics
 from app.database.schemas import (
     BaseSchema,
 )
 
 
+def pool_options(db: DbSettings) -> dict[str, Any]:
+    return {
+        "pool_size": db.pool_size,
+        "max_overflow": db.max_overflow,
+        "pool_timeout": db.pool_timeout,
+        "pool_recycle": db.pool_recycle,
+        "pool_pre_ping": db.pool_pre_ping,
+    }
+
+
+def connect_args(
+    db: DbSettings,
+    statement_timeout_ms: int,
+    application_name: str = "faserkraft-api",
+    read_only: bool = False,
+) -> dict[str, Any]:
+    server_settings = {"application_name": application_name}
+    if statement_timeout_ms:
+        server_settings["statement_timeout"] = str(statement_timeout_ms)
+    if read_only:
+        server_settings["default_transaction_read_only"] = "on"
+    return {
+        # SQLAlchemy готовит запросы сам (свой LRU-кэш), asyncpg кэширует
+        # запросы без явной подготовки — размер задаём обоим
+        "prepared_statement_cache_size": db.statement_cache_size,
+        "statement_cache_size": db.statement_cache_size,
+        "command_timeout": db.command_timeout,
+        "server_settings": server_settings,
+    }
+
+
 class DbHelper:
-    def __init__(self, url: str, echo: bool = False):
+    def __init__(self, url: str, echo: bool = False, db: DbSettings = settings.db):
+        self.pool_capacity = db.pool_size + db.max_overflow
         self.engine = create_async_engine(
             url=url,
             echo=echo,
+            poolclass=InstrumentedQueuePool,
+            connect_args=connect_args(db, db.statement_timeout_ms),
+            **pool_options(db),
         )
+        install_sql_metrics(self.engine)
         self.async_session = async_sessionmaker(
             bind=self.engine,
             autoflush=False,
             expire_on_commit=False,
         )
+        # реплика для тяжёлых отчётов; сессии на ней только читают
+        self.read_engine = None
+        self.read_session = None
+        if db.replica_url:
+            self.read_engine = create_async_engine(
+                url=str(db.replica_url),
+                echo=echo,
+                poolclass=InstrumentedQueuePool,
+                connect_args=connect_args(
+                    db,
+                    db.statement_timeout_ms,
+                    application_name="faserkraft-api-read",
+                    read_only=True,
+                ),
+                **pool_options(db),
+            )
+            install_sql_metrics(self.read_engine)
+            self.read_session = async_sessionmaker(
+                bind=self.read_engine,
+                autoflush=False,
+                expire_on_commit=False,
+            )
+        # перестроения и служебные скрипты: редкие и долгие, без пула
+        # и со своим statement_timeout
+        self.maintenance_engine = create_async_engine(
+            url=url,
+            echo=echo,
+            poolclass=NullPool,
+            connect_args=connect_args(
+                db,
+                db.maintenance_statement_timeout_ms,
+                application_name="faserkraft-maintenance",
+            ),
+        )
+        self.maintenance_session = async_sessionmaker(
+            bind=self.maintenance_engine,
+            autoflush=False,
+            expire_on_commit=False,
+        )
 
     async def dispose(self) -> None:
         await self.engine.dispose()
+        if self.read_engine is not None:
+            await self.read_engine.dispose()
+        await self.maintenance_engine.dispose()
 
     async def get_session(self) -> AsyncGenerator[AsyncSession, None]:
         async with self.async_session() as session:
             yield session
 
+    async def get_read_session(self) -> AsyncGenerator[AsyncSession, None]:
+        """Сессия только для чтения: на реплике, если она настроена, иначе на основной БД."""
+        async with (self.read_session or self.async_session)() as session:
+            yield session
+
+    async def get_maintenance_session(self) -> AsyncGenerator[AsyncSession, None]:
+        async with self.maintenance_session() as session:
+            yield session
+
+    def pool_status(self) -> dict[str, float]:
+        """Состояние пула основного движка для `/metrics`."""
+        pool = self.engine.pool
+        checked_out = pool.checkedout()  # type: ignore[attr-defined]
+        return {
+            "size": pool.size(),  # type: ignore[attr-defined]
+            "checked_out": checked_out,
+            "overflow": max(pool.overflow(), 0),  # type: ignore[attr-defined]
+            "capacity": self.pool_capacity,
+            # при неограниченном переполнении (max_overflow=-1) насыщения нет
+            "saturation": (
+                checked_out / self.pool_capacity if self.pool_capacity > 0 else 0.0
+            ),
+        }
+
     @staticmethod
     async def _init_model(
             session: AsyncSession,
@@ -58,3 +163,15 @@ class DbHelper:
 
 db_helper = DbHelper(url=str(settings.db.url), echo=settings.db.echo)
 SessionDep = Annotated[AsyncSession, Depends(db_helper.get_session)]
+
+
+async def _get_read_session(session: SessionDep) -> AsyncGenerator[AsyncSession, None]:
+    # без реплики — та же сессия запроса, лишнее соединение не берём
+    if db_helper.read_session is None:
+        yield session
+        return
+    async for read_session in db_helper.get_read_session():
+        yield read_session
+
+
+ReadSessionDep = Annotated[AsyncSession, Depends(_get_read_session)]
@@ -0,0 +1,121 @@
+"""
+Проверка планов запросов к `product_steps`.
+
+Выполняет запросы статистики и дневного плана через репозитории (в
+транзакции, которая затем откатывается), перехватывает отправленный в БД
+SQL и прогоняет его через EXPLAIN. Проверка считается пройденной, если в
+плане каждого сценария есть ожидаемый индекс.
+
+Запуск: python -m app.database.explain_indexes (код выхода 1 — индекс не
+используется).
+"""
+
+import asyncio
+import logging
+import sys
+from datetime import date, timedelta
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import db_helper
+from app.database.crud.daily_step_counters import DailyStepCounterRepository
+from app.database.crud.products import ProductRepository
+
+TODAY = date.today()
+WEEK_AGO = TODAY - timedelta(days=7)
+
+# сценарий -> (вызов репозитория, индекс, который должен быть в плане)
+CASES: dict[str, tuple[Callable[[AsyncSession], Awaitable[Any]], str]] = {
+    "статистика: закрытые этапы за период": (
+        lambda s: ProductRepository(s).get_completed_steps_stats_by_period(
+            WEEK_AGO, TODAY
+        ),
+        "ix_product_steps_performed_at",
+    ),
+    "статистика: завершённые изделия за период": (
+        lambda s: ProductRepository(s).get_finished_products_stats_by_period(
+            WEEK_AGO, TODAY
+        ),
+        "ix_product_steps_product_id_status",
+    ),
+    "дневной план: пересчёт счётчика сотрудника": (
+        lambda s: DailyStepCounterRepository(s).recount((TODAY, 1, 1)),
+        "ix_product_steps_step_def_performer_performed_at",
+    ),
+    "дневной план: изделия по этапу/сотруднику/дню": (
+        lambda s: ProductRepository(s).list_by_step_employee_and_day(
+            step_definition_id=1, employee_id=1, day=TODAY
+        ),
+        "ix_product_steps_step_def_performer_performed_at",
+    ),
+}
+
+
+def _index_names(plan: dict) -> set[str]:
+    names = set()
+    if "Index Name" in plan:
+        names.add(plan["Index Name"])
+    for child in plan.get("Plans", []):
+        names |= _index_names(child)
+    return names
+
+
+async def _explain_case(
+    session: AsyncSession,
+    call: Callable[[AsyncSession], Awaitable[Any]],
+) -> set[str]:
+    conn = await session.connection()
+    captured: list[tuple[str, Any]] = []
+
+    def capture(_conn, _cursor, statement, parameters, _context, _executemany):
+        if "product_steps" in statement:
+            captured.append((statement, parameters))
+
+    sync_conn = conn.sync_connection
+    event.listen(sync_conn, "before_cursor_execute", capture)
+    try:
+        await call(session)
+    finally:
+        event.remove(sync_conn, "before_cursor_execute", capture)
+
+    used = set()
+    for statement, parameters in captured:
+        if not statement.lstrip().upper().startswith("SELECT"):
+            continue
+        result = await conn.exec_driver_sql(
+            "EXPLAIN (FORMAT JSON) " + statement, parameters
+        )
+        plan = result.scalar()[0]["Plan"]
+        used |= _index_names(plan)
+    return used
+
+
+async def check_indexes() -> bool:
+    ok = True
+    async for session in db_helper.get_session():
+        try:
+            # на пустой или маленькой таблице планировщик предпочтёт seq scan;
+            # здесь проверяется, что индекс применим к запросу
+            await session.execute(text("SET LOCAL enable_seqscan = off"))
+            for name, (call, index_name) in CASES.items():
+                used = await _explain_case(session, call)
+                if index_name in used:
+                    logging.info("OK   %s: %s", name, index_name)
+                else:
+                    ok = False
+                    logging.error(
+                        "FAIL %s: нет %s в плане (индексы: %s)",
+                        name,
+                        index_name,
+                        ", ".join(sorted(used)) or "—",
+                    )
+        finally:
+            await session.rollback()
+    return ok
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    sys.exit(0 if asyncio.run(check_indexes()) else 1)
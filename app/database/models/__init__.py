@@ -2,7 +2,9 @@ from .access_token import AccessToken
 from .backup_db import BackupDb
 from .base import BaseWithId, Base
 from .daily_plan import DailyPlan
+from .daily_finished_counter import DailyFinishedCounter
 from .daily_plan_step import DailyPlanStep
+from .daily_step_counter import DailyStepCounter
 from .device import Device
 from .employee import Employee
 from .inventory import Inventory, InventoryItem
@@ -10,10 +12,12 @@ from .order import Order, OrderItem
 from .packaging_box import Packaging
 from .process import Process
 from .product import Product
+from .product_progress import ProductProgress
 from .product_step import ProductStep
 from .size_type import SizeType
 from .step_definition import StepDefinition
 from .step_template import StepTemplate
+from .sync_tombstone import SyncTombstone
 from .user import User
 from .yandex_token import YandexToken
 
@@ -23,6 +27,7 @@ __all__ = [
     "Employee",
     "Process",
     "Product",
+    "ProductProgress",
     "Packaging",
     "ProductStep",
     "StepTemplate",
@@ -34,9 +39,12 @@ __all__ = [
     "Device",
     "YandexToken",
     "DailyPlanStep",
+    "DailyStepCounter",
+    "DailyFinishedCounter",
     "SizeType",
     "Order",
     "OrderItem",
     "Inventory",
     "InventoryItem",
+    "SyncTombstone",
 ]
@@ -1,20 +1,58 @@
+from enum import Enum
+
 from sqlalchemy import String
+from sqlalchemy import Enum as SqlEnum
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .base import BaseWithId
 
 
+class BackupKind(str, Enum):
+    custom = "custom"  # pg_dump -F c: один файл .dump
+    directory = "directory"  # pg_dump -F d -j N: каталог в .dir.tar с SHA256SUMS
+
+    @property
+    def suffix(self) -> str:
+        suffixes = {
+            BackupKind.custom: ".dump",
+            BackupKind.directory: ".dir.tar",
+        }
+        return suffixes[self]
+
+    @property
+    def label(self) -> str:
+        labels = {
+            BackupKind.custom: "Один файл",
+            BackupKind.directory: "Каталог (параллельно)",
+        }
+        return labels.get(self, self.value)
+
+    @classmethod
+    def from_file_name(cls, name: str) -> "BackupKind | None":
+        for kind in cls:
+            if name.endswith(kind.suffix):
+                return kind
+        return None
+
+
 class BackupDb(BaseWithId):
     """
     Модель для представления резервной копии в базе данных.
 
     Атрибуты:
         id: Уникальный идентификатор резервной копии (наследуется от BaseWithId).
-        name: Имя резервной копии. Максимальная длина - 50 символов. Обязательное поле.
+        name: Имя файла резервной копии. Максимальная длина - 100 символов. Обязательное поле.
+        kind: Формат копии: custom-дамп или архив каталога.
     """
 
     __tablename__ = "backups"
-    name: Mapped[str] = mapped_column(String(50), nullable=False, unique=True)
+    name: Mapped[str] = mapped_column(String(100), nullable=False, unique=True)
+    kind: Mapped[BackupKind] = mapped_column(
+        SqlEnum(BackupKind, name="backup_kind_enum"),
+        nullable=False,
+        default=BackupKind.custom,
+        server_default=BackupKind.custom.value,
+    )
 
     def __str__(self) -> str:
         return self.name
@@ -1,6 +1,6 @@
 from typing import Any
 
-from sqlalchemy import MetaData
+from sqlalchemy import MetaData, BigInteger, text
 from sqlalchemy.orm import DeclarativeBase, mapped_column, Mapped
 
 from app.core import settings
@@ -12,6 +12,13 @@ class Base(DeclarativeBase):
 
     Использует настройки метаданных из `settings.db.naming_convention` для единообразия именования объектов в базе данных.
     Наследуется от `DeclarativeBase`, что позволяет использовать декларативный стиль определения моделей SQLAlchemy.
+
+    Политика загрузки связей: ссылки "многие к одному" и ограниченные по
+    размеру коллекции (этапы процесса, этапы изделия, изделия в упаковке)
+    подгружаются `selectin`. Коллекции, растущие вместе с историей
+    производства (этапы изделий по определению этапа, изделия процесса,
+    позиции инвентаризации, записи сотрудника), объявлены `lazy="raise"`:
+    запрос, которому они нужны, обязан загрузить их явно через `options()`.
     """
 
     __abstract__ = True
@@ -32,3 +39,30 @@ class BaseWithId(Base):
 
     init_data: list[dict[str, Any]] = []
     id: Mapped[int] = mapped_column(primary_key=True, index=True, unique=True)
+
+
+# идентификатор текущей транзакции (xid8): монотонно растёт и не переполняется
+CURRENT_CHANGE = text("pg_current_xact_id()::text::bigint")
+
+
+class ChangeTrackedMixin:
+    """
+    Примесь для таблиц, синхронизируемых с мобильным приложением (`/sync`).
+
+    Атрибуты:
+        change_id: Номер транзакции, последней изменившей строку. Заполняется
+            при вставке и любом UPDATE (в том числе через `update()`), по нему
+            выбираются изменения после курсора клиента. Удаления таких строк
+            записываются в `sync_tombstones` триггером БД.
+
+    После flush атрибут устаревает (значение вычисляет БД), поэтому его не
+    читают у объектов текущей сессии — только отдельным запросом.
+    """
+
+    change_id: Mapped[int] = mapped_column(
+        BigInteger,
+        nullable=False,
+        index=True,
+        server_default=CURRENT_CHANGE,
+        onupdate=CURRENT_CHANGE,
+    )
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, ForeignKey, Date
+
+from .base import Base
+
+
+class DailyFinishedCounter(Base):
+    """
+    Счётчик завершённых изделий за день.
+
+    Ключ — (дата по Москве закрытия последнего этапа, техпроцесс). Учитываются
+    изделия в статусе normal со всеми закрытыми этапами. Обновляется вместе с
+    `product_progress` (`ProductProgressRepository.refresh`) и служит
+    источником статистики за период.
+    """
+
+    __tablename__ = "daily_finished_counters"
+
+    date = Column(Date, primary_key=True)
+    process_id = Column(
+        Integer,
+        ForeignKey("processes.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"{self.date} {self.process_id}: {self.count}"
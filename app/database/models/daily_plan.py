@@ -1,10 +1,10 @@
 from sqlalchemy import Column, Integer, ForeignKey, Date, UniqueConstraint
 from sqlalchemy.orm import relationship
 
-from .base import BaseWithId
+from .base import BaseWithId, ChangeTrackedMixin
 
 
-class DailyPlan(BaseWithId):
+class DailyPlan(ChangeTrackedMixin, BaseWithId):
     __tablename__ = "daily_plans"
 
     __table_args__ = (
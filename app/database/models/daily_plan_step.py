@@ -1,13 +1,12 @@
-from sqlalchemy import Column, Integer, ForeignKey, func, select
+from sqlalchemy import Column, Integer, ForeignKey, func, select, and_
 from sqlalchemy.orm import relationship, column_property
 
-from .base import BaseWithId
-from .product_step import StepStatus
-from .product_step import ProductStep
+from .base import BaseWithId, ChangeTrackedMixin
 from .daily_plan import DailyPlan
+from .daily_step_counter import DailyStepCounter
 
 
-class DailyPlanStep(BaseWithId):
+class DailyPlanStep(ChangeTrackedMixin, BaseWithId):
     __tablename__ = "daily_plan_steps"
 
     daily_plan_id = Column(
@@ -24,15 +23,23 @@ class DailyPlanStep(BaseWithId):
     planned_quantity = Column(Integer, nullable=False, default=0)
 
     actual_quantity = column_property(
-        select(func.count(ProductStep.id))
-        .where(
-            ProductStep.step_definition_id == step_definition_id,
-            ProductStep.performed_by_id == DailyPlan.employee_id,
-            func.date(ProductStep.performed_at) == DailyPlan.date,
-            ProductStep.status == StepStatus.done,
+        func.coalesce(
+            select(DailyStepCounter.count)
+            .join(
+                DailyPlan,
+                and_(
+                    DailyPlan.date == DailyStepCounter.date,
+                    DailyPlan.employee_id == DailyStepCounter.employee_id,
+                ),
+            )
+            .where(
+                DailyPlan.id == daily_plan_id,
+                DailyStepCounter.step_definition_id == step_definition_id,
+            )
+            .correlate_except(DailyStepCounter, DailyPlan)
+            .scalar_subquery(),
+            0,
         )
-        .correlate_except(ProductStep)
-        .scalar_subquery()
     )
 
     daily_plan = relationship(
@@ -0,0 +1,44 @@
+from sqlalchemy import Column, Integer, ForeignKey, Date, BigInteger
+
+from .base import Base, CURRENT_CHANGE
+
+
+class DailyStepCounter(Base):
+    """
+    Счётчик закрытых этапов за день.
+
+    Ключ — (дата по Москве, исполнитель, этап процесса). Обновляется в той же
+    транзакции, что и закрытие этапа или смена исполнителя
+    (`DailyStepCounterRepository`), и служит источником
+    `DailyPlanStep.actual_quantity`.
+
+    Атрибуты:
+        change_id: Номер транзакции, последней изменившей счётчик. `/sync`
+            по нему находит этапы дневного плана с изменившимся фактом,
+            поэтому строки с нулевым счётчиком не удаляются.
+    """
+
+    __tablename__ = "daily_step_counters"
+
+    date = Column(Date, primary_key=True)
+    employee_id = Column(
+        Integer,
+        ForeignKey("employees.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    step_definition_id = Column(
+        Integer,
+        ForeignKey("step_definitions.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    count = Column(Integer, nullable=False, default=0)
+    change_id = Column(
+        BigInteger,
+        nullable=False,
+        index=True,
+        server_default=CURRENT_CHANGE,
+        onupdate=CURRENT_CHANGE,
+    )
+
+    def __repr__(self):
+        return f"{self.date} {self.employee_id}/{self.step_definition_id}: {self.count}"
@@ -35,26 +35,30 @@ class Employee(BaseWithId):
     )
     device = relationship("Device", back_populates=None, viewonly=True)
 
-    plans = relationship("DailyPlan", back_populates="employee")
+    plans = relationship("DailyPlan", back_populates="employee", lazy="raise")
     product_steps_performed = relationship(
         "ProductStep",
         back_populates="performed_by",
         foreign_keys="ProductStep.performed_by_id",
+        lazy="raise",
     )
     product_steps_accepted = relationship(
         "ProductStep",
         back_populates="accepted_by",
         foreign_keys="ProductStep.accepted_by_id",
+        lazy="raise",
     )
     packaging_performed = relationship(
         "Packaging",
         back_populates="performed_by",
         foreign_keys="Packaging.performed_by_id",
+        lazy="raise",
     )
     inventory = relationship(
         "Inventory",
         back_populates="created_by",
         foreign_keys="Inventory.created_by_id",
+        lazy="raise",
     )
 
     def __repr__(self):
@@ -22,7 +22,7 @@ class Inventory(BaseWithId):
     items = relationship(
         "InventoryItem",
         back_populates="inventory",
-        lazy="selectin",
+        lazy="raise",
         cascade="all, delete-orphan",
     )
 
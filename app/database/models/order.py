@@ -1,10 +1,10 @@
 from sqlalchemy import Column, String, Date, Integer, ForeignKey, DateTime
 from sqlalchemy.orm import relationship
 
-from .base import BaseWithId
+from .base import BaseWithId, ChangeTrackedMixin
 
 
-class Order(BaseWithId):
+class Order(ChangeTrackedMixin, BaseWithId):
     __tablename__ = "orders"
 
     contract_number = Column(String, nullable=False)
@@ -37,7 +37,7 @@ class Order(BaseWithId):
         return f"Order {self.contract_number} from {self.contract_date}"
 
 
-class OrderItem(BaseWithId):
+class OrderItem(ChangeTrackedMixin, BaseWithId):
     __tablename__ = "order_items"
 
     order_id = Column(ForeignKey("orders.id"), nullable=False)
@@ -1,10 +1,10 @@
 from sqlalchemy import Column, String, ForeignKey, DateTime
 from sqlalchemy.orm import relationship
 
-from .base import BaseWithId
+from .base import BaseWithId, ChangeTrackedMixin
 
 
-class Packaging(BaseWithId):
+class Packaging(ChangeTrackedMixin, BaseWithId):
     __tablename__ = "packaging"
 
     serial_number = Column(String, unique=True, nullable=False)
@@ -28,13 +28,13 @@ class Process(BaseWithId):
     products = relationship(
         "Product",
         back_populates="work_process",
-        lazy="selectin",
+        lazy="raise",
     )
 
     order_items = relationship(
         "OrderItem",
         back_populates="work_process",
-        lazy="selectin",
+        lazy="raise",
     )
 
     def __repr__(self):
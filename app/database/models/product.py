@@ -9,7 +9,7 @@ from enum import Enum
 from sqlalchemy.orm import relationship
 from sqlalchemy import Enum as SqlEnum
 
-from .base import BaseWithId
+from .base import BaseWithId, ChangeTrackedMixin
 
 
 class ProductStatus(str, Enum):
@@ -26,7 +26,7 @@ class ProductStatus(str, Enum):
         }
         return labels.get(self, self.value)
 
-class Product(BaseWithId):
+class Product(ChangeTrackedMixin, BaseWithId):
     __tablename__ = "products"
 
     serial_number = Column(String, unique=True, nullable=False)
@@ -52,5 +52,13 @@ class Product(BaseWithId):
         lazy="selectin",
     )
 
+    progress = relationship(
+        "ProductProgress",
+        back_populates="product",
+        uselist=False,
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
     def __repr__(self):
         return self.serial_number
@@ -0,0 +1,56 @@
+from sqlalchemy import (
+    Column,
+    ForeignKey,
+    DateTime,
+    Date,
+    Integer,
+    Boolean,
+)
+from sqlalchemy.orm import relationship
+
+from .base import Base
+
+
+class ProductProgress(Base):
+    """
+    Материализованное текущее состояние изделия.
+
+    Одна строка на изделие, пересчитывается в той же транзакции, что и
+    изменения этапов (`ProductProgressRepository.refresh`). Позволяет
+    дашбордам не вычислять последний выполненный этап по всей истории
+    `product_steps`.
+
+    Атрибуты:
+        product_id: Изделие (первичный ключ).
+        last_done_step_definition_id: Последний закрытый этап по порядку в процессе.
+        last_done_at: Время последнего закрытия этапа изделия.
+        done_count: Количество закрытых этапов.
+        total_count: Общее количество этапов изделия.
+        is_finished: Все этапы изделия закрыты.
+        finished_on: Дата (по Москве) закрытия последнего по порядку этапа;
+            заполнена, только если изделие засчитано в `daily_finished_counters`
+            (завершено и в статусе normal).
+        finished_process_id: Техпроцесс, под которым изделие засчитано.
+    """
+
+    __tablename__ = "product_progress"
+
+    product_id = Column(
+        ForeignKey("products.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    last_done_step_definition_id = Column(
+        ForeignKey("step_definitions.id", ondelete="SET NULL"),
+        nullable=True,
+    )
+    last_done_at = Column(DateTime(timezone=True), nullable=True)
+    done_count = Column(Integer, nullable=False, default=0)
+    total_count = Column(Integer, nullable=False, default=0)
+    is_finished = Column(Boolean, nullable=False, default=False)
+    finished_on = Column(Date, nullable=True)
+    finished_process_id = Column(Integer, nullable=True)
+
+    product = relationship("Product", back_populates="progress")
+
+    def __repr__(self):
+        return f"{self.product_id}: {self.done_count}/{self.total_count}"
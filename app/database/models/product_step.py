@@ -4,11 +4,13 @@ from sqlalchemy import (
     Column,
     ForeignKey,
     DateTime,
+    Index,
+    text,
 )
 from sqlalchemy import Enum as SqlEnum
 from sqlalchemy.orm import relationship
 
-from .base import BaseWithId
+from .base import BaseWithId, ChangeTrackedMixin
 
 
 class StepStatus(str, Enum):
@@ -26,9 +28,35 @@ class StepStatus(str, Enum):
         return labels.get(self, self.value)
 
 
-class ProductStep(BaseWithId):
+class ProductStep(ChangeTrackedMixin, BaseWithId):
     __tablename__ = "product_steps"
 
+    __table_args__ = (
+        # этапы изделия по статусу: прогресс, проверка предыдущего этапа
+        Index("ix_product_steps_product_id_status", "product_id", "status"),
+        # этапы сотрудника по виду этапа за период: счётчики дневного плана,
+        # изделия по этапу/сотруднику/дню
+        Index(
+            "ix_product_steps_step_def_performer_performed_at",
+            "step_definition_id",
+            "performed_by_id",
+            "performed_at",
+        ),
+        # статистика за период: диапазон по performed_at, остальные поля
+        # группировки берутся прямо из индекса
+        Index(
+            "ix_product_steps_performed_at",
+            "performed_at",
+            postgresql_where=text("performed_at IS NOT NULL"),
+            postgresql_include=[
+                "status",
+                "product_id",
+                "step_definition_id",
+                "performed_by_id",
+            ],
+        ),
+    )
+
     product_id = Column(ForeignKey("products.id"), nullable=False)
     step_definition_id = Column(ForeignKey("step_definitions.id"), nullable=False)
 
@@ -13,7 +13,7 @@ class SizeType(BaseWithId):
     work_process = relationship(
         "Process",
         back_populates="size_type",
-        lazy="selectin",
+        lazy="raise",
     )
 
     def __repr__(self):
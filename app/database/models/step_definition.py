@@ -17,10 +17,11 @@ class StepDefinition(BaseWithId):
         lazy="selectin",
     )
 
+    # история выполнения этапа растёт без ограничений — только явная загрузка
     product_steps = relationship(
         "ProductStep",
         back_populates="step_definition",
-        lazy="selectin",
+        lazy="raise",
     )
     work_process = relationship(
         "Process",
@@ -31,7 +32,7 @@ class StepDefinition(BaseWithId):
     steps = relationship(
         "DailyPlanStep",
         back_populates="step_definition",
-        lazy="selectin",
+        lazy="raise",
         cascade="all, delete-orphan",
     )
 
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime, func
+
+from .base import BaseWithId, CURRENT_CHANGE
+
+
+class SyncTombstone(BaseWithId):
+    """
+    Отметка об удалении синхронизируемой строки.
+
+    Пишется триггером БД `sync_write_tombstones` в той же транзакции, что и
+    удаление, — в том числе каскадное и массовое `delete()` — и отдаётся
+    клиентам `/sync` вместе с изменёнными строками. Старые отметки удаляются
+    по расписанию (`settings.sync.tombstone_days`).
+    """
+
+    __tablename__ = "sync_tombstones"
+
+    entity = Column(String, nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    change_id = Column(
+        BigInteger, nullable=False, index=True, server_default=CURRENT_CHANGE
+    )
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"{self.entity} {self.entity_id}"
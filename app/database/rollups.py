@@ -0,0 +1,108 @@
+import asyncio
+import logging
+from datetime import date, datetime, timedelta
+
+from sqlalchemy.exc import DBAPIError
+
+from app.core import settings
+from app.core.result_cache import CacheTag, result_cache
+from app.database import db_helper
+from app.database.crud.daily_step_counters import DailyStepCounterRepository
+from app.database.crud.product_progress import ProductProgressRepository
+from app.utils.dates import MOSCOW_TZ
+
+RECONCILE_ATTEMPTS = 3
+# could not serialize access: строку изменила транзакция после снимка
+SERIALIZATION_FAILURE = "40001"
+
+
+async def rebuild_product_progress() -> None:
+    """
+    Перестроить `product_progress` и `daily_finished_counters` по всей
+    истории этапов изделий.
+    """
+    logging.info("Начало перестроения product_progress")
+    async for session in db_helper.get_maintenance_session():
+        try:
+            await ProductProgressRepository(session).rebuild()
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            logging.exception("Ошибка при перестроении product_progress")
+            raise
+    logging.info("Перестроение product_progress завершено")
+
+
+async def rebuild_daily_step_counters() -> None:
+    """Перестроить `daily_step_counters` по всей истории этапов изделий."""
+    logging.info("Начало перестроения daily_step_counters")
+    async for session in db_helper.get_maintenance_session():
+        try:
+            await DailyStepCounterRepository(session).rebuild()
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            logging.exception("Ошибка при перестроении daily_step_counters")
+            raise
+    logging.info("Перестроение daily_step_counters завершено")
+
+
+async def reconcile_rollups(days: int | None = None) -> None:
+    """
+    Сверить дневные счётчики статистики за последние `days` дней с историей.
+
+    Счётчики поддерживаются инкрементально; расхождения означают правку
+    данных в обход репозиториев и исправляются, а их число пишется в лог.
+    Сверка идёт в REPEATABLE READ; если параллельная транзакция изменила
+    сверяемые строки, сверка повторяется на новом снимке.
+    """
+    days = days or settings.db.rollup_reconcile_days
+    date_from = datetime.now(MOSCOW_TZ).date() - timedelta(days=days)
+    for attempt in range(1, RECONCILE_ATTEMPTS + 1):
+        try:
+            fixed_steps, fixed_finished = await _reconcile(date_from)
+            break
+        except DBAPIError as exc:
+            if (
+                getattr(exc.orig, "sqlstate", None) != SERIALIZATION_FAILURE
+                or attempt == RECONCILE_ATTEMPTS
+            ):
+                logging.exception("Ошибка при сверке счётчиков статистики")
+                raise
+            logging.info("Сверка счётчиков прервана параллельным изменением, повтор")
+    await result_cache.invalidate(CacheTag.progress, CacheTag.statistics)
+    if fixed_steps or fixed_finished:
+        logging.warning(
+            "Сверка с %s: исправлено счётчиков этапов %s, завершённых изделий %s",
+            date_from,
+            fixed_steps,
+            fixed_finished,
+        )
+    else:
+        logging.info("Сверка счётчиков статистики с %s: расхождений нет", date_from)
+
+
+async def _reconcile(date_from: date) -> tuple[int, int]:
+    async for session in db_helper.get_maintenance_session():
+        # история и счётчики читаются одним снимком
+        await session.connection(
+            execution_options={"isolation_level": "REPEATABLE READ"}
+        )
+        try:
+            fixed_steps = await DailyStepCounterRepository(session).reconcile(date_from)
+            fixed_finished = await ProductProgressRepository(session).reconcile(date_from)
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+    return fixed_steps, fixed_finished
+
+
+async def rebuild_all() -> None:
+    await rebuild_product_progress()
+    await rebuild_daily_step_counters()
+    await result_cache.invalidate(CacheTag.progress, CacheTag.statistics)
+
+
+if __name__ == "__main__":
+    asyncio.run(rebuild_all())
@@ -16,8 +16,12 @@ class BaseSchema(BaseModel):
         """
         Преобразует схему в ORM-модель.
         """
-        column_names = list(self.base_class.__table__.columns.keys())
-        column_names.remove("id")
+        # id и change_id заполняет база данных
+        column_names = [
+            name
+            for name in self.base_class.__table__.columns.keys()
+            if name not in ("id", "change_id")
+        ]
         if sorted(column_names) == sorted(list(self.model_dump().keys())):
             return self.base_class(**self.model_dump())
         raise ValueError(
@@ -1,4 +1,7 @@
 from datetime import datetime
+from typing import Literal
+
+from pydantic import AwareDatetime
 
 from app.database import BaseSchema
 from app.database.schemas.employee import EmployeeRead
@@ -41,10 +44,31 @@ class AddInventoryItemRequest(BaseSchema):
     step_definition_id: int
 
 
+# позиций в одном пакете сканов
+INVENTORY_BATCH_MAX_ITEMS = 5000
+
+
+class InventoryItemBatchIn(AddInventoryItemRequest):
+    # с часовым поясом: наивное время устройства не с чем сравнить
+    scanned_at: AwareDatetime
+
+
+class InventoryItemBatchResultRead(BaseSchema):
+    """
+    Результат по позиции пакета:
+    created — добавлена, updated — обновлена, unchanged — в БД уже есть
+    скан не старше этого (повтор пакета), rejected — неизвестный этап.
+    """
+
+    serial_number: str
+    result: Literal["created", "updated", "unchanged", "rejected"]
+
+
 # ---------- Compare ----------
 
 
 class InventoryCompareResultRead(BaseSchema):
+    step_definition_id: int
     db_count: int
     scanned_count: int
     matched: list[ProductInventoryItem]
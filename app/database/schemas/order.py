@@ -25,6 +25,29 @@ class OrderRead(BaseSchema):
     packaging: list[PackagingRead] = Field(default_factory=list)
 
 
+class OrderShortView(BaseSchema):
+    """Проекция `view=short` (`OrderRepository._project`)."""
+
+    id: int
+    contract_number: str
+    contract_date: date
+    planned_shipment_date: date
+    shipment_date: datetime | None
+    shipment_by_id: int | None
+
+
+class OrderStepsSummaryView(OrderShortView):
+    """Проекция `view=steps_summary`: short + количества по позициям и упаковкам."""
+
+    ordered_quantity: int
+    packaging_count: int
+    product_count: int
+
+
+# ответ ручек с параметром view
+OrderViewRead = OrderRead | OrderStepsSummaryView | OrderShortView
+
+
 class OrderItemCreate(BaseSchema):
     process_id: int
     quantity: int
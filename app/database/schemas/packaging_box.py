@@ -37,6 +37,27 @@ class PackagingRead(PackagingCreate):
         from_attributes = True
 
 
+class PackagingShortView(BaseSchema):
+    """Проекция `view=short` (`PackagingRepository._project`)."""
+
+    id: int
+    serial_number: str
+    performed_at: datetime | None
+    performed_by_id: int | None
+    order_id: int | None
+    products_count: int
+
+
+class PackagingStepsSummaryView(PackagingShortView):
+    """Проекция `view=steps_summary`: short + число проблемных и завершённых изделий."""
+
+    not_normal_count: int
+    finished_count: int
+
+
 from app.database.schemas.product import ProductShortRead
 
 PackagingRead.model_rebuild()
+
+# ответ ручек с параметром view
+PackagingViewRead = PackagingRead | PackagingStepsSummaryView | PackagingShortView
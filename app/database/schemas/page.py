@@ -0,0 +1,17 @@
+from typing import Generic, TypeVar
+
+from pydantic import BaseModel
+
+ItemT = TypeVar("ItemT")
+
+
+class Page(BaseModel, Generic[ItemT]):
+    """
+    Страница keyset-пагинации.
+
+    next_cursor передаётся в параметр `cursor` следующего запроса;
+    None — страниц больше нет.
+    """
+
+    items: list[ItemT]
+    next_cursor: str | None = None
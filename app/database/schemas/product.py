@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, List, Type, ClassVar, TYPE_CHECKING
+from typing import Optional, List, Type, ClassVar, Literal, TYPE_CHECKING
 from zoneinfo import ZoneInfo
 
 from pydantic import Field
@@ -42,12 +42,48 @@ class ProductRead(ProductBase):
     }
 
 
+class ProductStepBatchResultRead(BaseSchema):
+    """Результат пакетного закрытия по одному этапу (`POST /products_steps/batch`)."""
+
+    step_id: int
+    product_id: int | None = None
+    result: Literal["done", "not_found", "not_in_plan", "previous_not_done"]
+    product: Optional[ProductRead] = None
+
+
 class ProductShortRead(ProductBase):
     id: int
     work_process: ProcessReadShort
     status: ProductStatus
 
 
+class ProductShortView(BaseSchema):
+    """Проекция `view=short` (`ProductRepository._project`)."""
+
+    id: int
+    serial_number: str
+    status: ProductStatus
+    created_at: datetime
+    packaging_id: int | None
+    process_id: int
+    process_name: str
+
+
+class ProductStepsSummaryView(ProductShortView):
+    """Проекция `view=steps_summary`: short + сводка по этапам из `product_progress`."""
+
+    done_count: int | None
+    total_count: int | None
+    is_finished: bool | None
+    last_done_step_definition_id: int | None
+    last_done_at: datetime | None
+
+
+# ответ ручек с параметром view
+ProductViewRead = ProductRead | ProductStepsSummaryView | ProductShortView
+ProductShortViewRead = ProductShortRead | ProductStepsSummaryView | ProductShortView
+
+
 class ProductsCountByLastStepRead(BaseSchema):
     """
     Статистика количества продуктов по процессу и последнему выполненному шагу.
@@ -67,3 +103,4 @@ class ProductsCountByLastStepRead(BaseSchema):
 from app.database.schemas.packaging_box import PackagingBase
 
 ProductRead.model_rebuild()
+ProductStepBatchResultRead.model_rebuild()
@@ -1,11 +1,16 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 
+from pydantic import Field
+
 from app.database import BaseSchema
 from app.database.models.product_step import StepStatus
 from app.database.schemas.employee import EmployeeRead
 from app.database.schemas.step_definition import StepDefinitionRead
 
+# этапов в одном пакетном закрытии
+BATCH_ACCEPT_MAX_STEPS = 500
+
 
 class ProductStepBase(BaseSchema):
     id: int
@@ -20,3 +25,11 @@ class ProductStepBase(BaseSchema):
 
 class ProductStepRead(ProductStepBase):
     step_definition: StepDefinitionRead
+
+
+class ProductStepBatchAccept(BaseSchema):
+    step_ids: list[int] = Field(max_length=BATCH_ACCEPT_MAX_STEPS)
+    plan_date: date | None = None
+    # ProductRead по каждому закрытому этапу — тяжёлый ответ, по умолчанию не нужен
+    include_product: bool = False
+
@@ -0,0 +1,15 @@
+from enum import Enum
+
+
+class ReadView(str, Enum):
+    """
+    Проекция ответа списка/карточки.
+
+    short — только собственные колонки (без ORM и Pydantic),
+    steps_summary — short + сводка по этапам/содержимому,
+    full — полная схема *Read, как раньше.
+    """
+
+    short = "short"
+    steps_summary = "steps_summary"
+    full = "full"
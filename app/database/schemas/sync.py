@@ -0,0 +1,92 @@
+from datetime import date, datetime
+
+from app.database import BaseSchema
+from app.database.models.product import ProductStatus
+from app.database.models.product_step import StepStatus
+
+
+class SyncProductRead(BaseSchema):
+    id: int
+    serial_number: str
+    process_id: int
+    created_at: datetime | None = None
+    status: ProductStatus
+    packaging_id: int | None = None
+
+
+class SyncProductStepRead(BaseSchema):
+    id: int
+    product_id: int
+    step_definition_id: int
+    status: StepStatus
+    accepted_by_id: int | None = None
+    accepted_at: datetime | None = None
+    performed_by_id: int | None = None
+    performed_at: datetime | None = None
+
+
+class SyncDailyPlanRead(BaseSchema):
+    id: int
+    employee_id: int
+    date: date
+
+
+class SyncDailyPlanStepRead(BaseSchema):
+    id: int
+    daily_plan_id: int
+    step_definition_id: int
+    planned_quantity: int
+    actual_quantity: int
+
+
+class SyncPackagingRead(BaseSchema):
+    id: int
+    serial_number: str
+    performed_by_id: int | None = None
+    performed_at: datetime | None = None
+    shipment_by_id: int | None = None
+    shipment_at: datetime | None = None
+    order_id: int | None = None
+
+
+class SyncOrderRead(BaseSchema):
+    id: int
+    contract_number: str
+    contract_date: date
+    planned_shipment_date: date
+    shipment_date: datetime | None = None
+    shipment_by_id: int | None = None
+
+
+class SyncOrderItemRead(BaseSchema):
+    id: int
+    order_id: int
+    process_id: int
+    quantity: int
+
+
+class SyncDeletedRead(BaseSchema):
+    entity: str
+    id: int
+
+
+class SyncRead(BaseSchema):
+    """
+    Изменения с курсора клиента.
+
+    Строки отдаются целиком, без вложенных объектов. Клиент применяет их как
+    upsert по `id`, затем удаляет строки из `deleted`, сохраняет `cursor` и,
+    пока `has_more`, сразу запрашивает следующую порцию. Одна строка может
+    прийти повторно — применять изменения нужно идемпотентно.
+    """
+
+    cursor: str
+    has_more: bool
+    products: list[SyncProductRead]
+    product_steps: list[SyncProductStepRead]
+    daily_plans: list[SyncDailyPlanRead]
+    daily_plan_steps: list[SyncDailyPlanStepRead]
+    packaging: list[SyncPackagingRead]
+    orders: list[SyncOrderRead]
+    order_items: list[SyncOrderItemRead]
+    deleted: list[SyncDeletedRead]
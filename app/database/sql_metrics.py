@@ -0,0 +1,285 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+START_TIMES_KEY = "sql_metrics_start"
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Запрос к API превысил бюджет обращений к БД."""
+
+
+@dataclass(frozen=True)
+class SqlBudget:
+    """
+    Бюджет обращений к БД на один HTTP-запрос (0 — без ограничения).
+
+    Атрибуты:
+        max_statements: Допустимое число SQL-запросов.
+        max_rows: Допустимое число строк (выбранных или изменённых).
+        max_db_time_ms: Допустимое суммарное время выполнения SQL, мс.
+        strict: Прерывать запрос `QueryBudgetExceeded` сразу при превышении
+            (режим тестов и стенда), иначе превышение только пишется в лог.
+    """
+
+    max_statements: int = 0
+    max_rows: int = 0
+    max_db_time_ms: int = 0
+    strict: bool = False
+
+
+@dataclass
+class SqlStats:
+    """
+    Счётчики обращений к БД.
+
+    Атрибуты:
+        statements: Выполнено SQL-запросов.
+        rows: Строк выбрано (SELECT) или изменено (DML).
+        db_time: Время выполнения SQL, секунды.
+        pool_wait: Время получения соединения из пула, секунды.
+    """
+
+    statements: int = 0
+    rows: int = 0
+    db_time: float = 0.0
+    pool_wait: float = 0.0
+
+
+@dataclass
+class RequestSqlStats(SqlStats):
+    """Счётчики текущего HTTP-запроса и проверка его бюджета."""
+
+    budget: SqlBudget = field(default_factory=SqlBudget)
+    # отметка, от которой считается бюджет (см. `restart_sql_budget`)
+    baseline: SqlStats = field(default_factory=SqlStats)
+    over_budget: bool = False
+
+    @property
+    def exceeded(self) -> bool:
+        budget, base = self.budget, self.baseline
+        return bool(
+            (
+                budget.max_statements
+                and self.statements - base.statements > budget.max_statements
+            )
+            or (budget.max_rows and self.rows - base.rows > budget.max_rows)
+            or (
+                budget.max_db_time_ms
+                and (self.db_time - base.db_time) * 1000 > budget.max_db_time_ms
+            )
+        )
+
+    def checkpoint(self) -> None:
+        self.baseline = SqlStats(self.statements, self.rows, self.db_time, self.pool_wait)
+
+    def check(self) -> None:
+        if not self.exceeded:
+            return
+        self.over_budget = True
+        if self.budget.strict:
+            raise QueryBudgetExceeded(str(self))
+
+    def server_timing(self) -> str:
+        return (
+            f'db;dur={self.db_time * 1000:.1f};'
+            f'desc="{self.statements} statements, {self.rows} rows", '
+            f"db-pool;dur={self.pool_wait * 1000:.1f}"
+        )
+
+    def __str__(self) -> str:
+        return (
+            f"запросов {self.statements}, строк {self.rows}, "
+            f"время БД {self.db_time * 1000:.1f} мс, "
+            f"ожидание пула {self.pool_wait * 1000:.1f} мс"
+        )
+
+
+@dataclass
+class RouteSqlStats(SqlStats):
+    requests: int = 0
+    over_budget: int = 0
+
+
+class SqlMetrics:
+    """
+    Накопленные по маршрутам счётчики для `/metrics`.
+
+    Хранятся в памяти процесса: при нескольких воркерах uvicorn каждый
+    отдаёт свои значения, Prometheus различает их по `instance`.
+    """
+
+    METRICS = (
+        ("requests", "app_db_requests_total", "HTTP-запросы с учётом обращений к БД"),
+        ("statements", "app_db_statements_total", "Выполнено SQL-запросов"),
+        ("rows", "app_db_rows_total", "Строк выбрано или изменено"),
+        ("db_time", "app_db_time_seconds_total", "Время выполнения SQL"),
+        ("pool_wait", "app_db_pool_wait_seconds_total", "Ожидание соединения из пула"),
+        ("over_budget", "app_db_over_budget_total", "Запросы сверх бюджета БД"),
+    )
+
+    def __init__(self) -> None:
+        self.routes: dict[tuple[str, str], RouteSqlStats] = {}
+
+    def observe(self, method: str, route: str, stats: RequestSqlStats) -> None:
+        totals = self.routes.setdefault((method, route), RouteSqlStats())
+        totals.requests += 1
+        totals.statements += stats.statements
+        totals.rows += stats.rows
+        totals.db_time += stats.db_time
+        totals.pool_wait += stats.pool_wait
+        totals.over_budget += int(stats.over_budget)
+
+    POOL_GAUGES = {
+        "size": "Открытых соединений в пуле",
+        "checked_out": "Соединений выдано запросам",
+        "overflow": "Соединений сверх pool_size",
+        "capacity": "Предел соединений (pool_size + max_overflow)",
+        "saturation": "Доля выданных соединений от предела",
+    }
+
+    def render(self, pool_status: dict[str, float] | None = None) -> str:
+        lines = []
+        for key, value in (pool_status or {}).items():
+            name = f"app_db_pool_{key}"
+            lines.append(f"# HELP {name} {self.POOL_GAUGES.get(key, key)}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        for attr, name, help_text in self.METRICS:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for (method, route), totals in sorted(self.routes.items()):
+                route = route.replace("\\", "\\\\").replace('"', '\\"')
+                lines.append(
+                    f'{name}{{method="{method}",route="{route}"}} '
+                    f"{getattr(totals, attr)}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+sql_metrics = SqlMetrics()
+
+_current_stats: ContextVar[RequestSqlStats | None] = ContextVar(
+    "request_sql_stats", default=None
+)
+
+
+def current_sql_stats() -> RequestSqlStats | None:
+    return _current_stats.get()
+
+
+@contextmanager
+def collect_sql_stats(budget: SqlBudget = SqlBudget()) -> Iterator[RequestSqlStats]:
+    """Считать обращения к БД внутри блока (HTTP-запрос, шаг бенчмарка)."""
+    stats = RequestSqlStats(budget=budget)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def restart_sql_budget() -> None:
+    """Считать бюджет заново с текущего момента (например, для очередной порции выгрузки)."""
+    if stats := _current_stats.get():
+        stats.checkpoint()
+
+
+def _fetched_rows(cursor) -> int:
+    # asyncpg-адаптер выбирает результат SELECT целиком, rowcount у него -1
+    rows = getattr(cursor, "_rows", None)
+    if cursor.description and rows is not None:
+        return len(rows)
+    return max(cursor.rowcount, 0)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault(START_TIMES_KEY, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    starts = conn.info.get(START_TIMES_KEY)
+    if stats is None or not starts:
+        return
+    stats.db_time += time.perf_counter() - starts.pop()
+    stats.statements += 1
+    stats.rows += _fetched_rows(cursor)
+    stats.check()
+
+
+def install_sql_metrics(engine: AsyncEngine) -> None:
+    """Подключить счётчики к движку (без открытого HTTP-запроса ничего не считают)."""
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений, учитывающий время выдачи соединения в текущем запросе.
+
+    Включает ожидание свободного соединения и установку нового, если пул
+    ещё не заполнен.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if stats := _current_stats.get():
+                stats.pool_wait += time.perf_counter() - start
+
+
+class SqlMetricsMiddleware:
+    """
+    ASGI-middleware: собирает обращения к БД каждого HTTP-запроса.
+
+    Отдаёт их в заголовке `Server-Timing`, накапливает по маршрутам для
+    `/metrics` и пишет в лог запросы, превысившие бюджет.
+    """
+
+    def __init__(self, app: ASGIApp, budget: SqlBudget = SqlBudget()) -> None:
+        self.app = app
+        self.budget = budget
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with collect_sql_stats(self.budget) as stats:
+
+            async def send_with_timing(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    MutableHeaders(scope=message).append(
+                        "Server-Timing", stats.server_timing()
+                    )
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                # шаблон маршрута FastAPI, для смонтированных приложений — их префикс
+                route = getattr(scope.get("route"), "path", None)
+                route = route or scope.get("root_path") or "other"
+                sql_metrics.observe(scope["method"], route, stats)
+                if stats.over_budget:
+                    logger.warning(
+                        "Превышен бюджет БД: %s %s — %s",
+                        scope["method"],
+                        scope["path"],
+                        stats,
+                    )
@@ -0,0 +1,508 @@
+"""
+Генератор синтетических производственных данных для нагрузочных тестов.
+
+Создаёт техпроцессы с этапами, сотрудников с учётными записями, изделия с
+историей этапов за заданное число дней, упаковки, заказы с отгрузками,
+дневные планы и инвентаризации. Данные пишутся COPY порциями изделий, после
+чего перестраиваются `product_progress` и дневные счётчики, а
+последовательности id сдвигаются за вставленные строки.
+
+Все записи помечаются тегом (`--tag`): по нему сценарий нагрузки
+(`app.load_test`) находит синтетических сотрудников. Пароль у всех
+сотрудников один (`--password`).
+
+Запуск: python -m app.database.synthetic_data [--products 125000] [--days 365]
+(125 000 изделий по 8 этапов — около 1 млн строк `product_steps`).
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from fastapi_users.password import PasswordHelper
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.result_cache import CacheTag, result_cache
+from app.database import db_helper
+from app.database.crud.daily_step_counters import DailyStepCounterRepository
+from app.database.crud.product_progress import ProductProgressRepository
+from app.database.models import (
+    Base,
+    DailyPlan,
+    DailyPlanStep,
+    Employee,
+    Inventory,
+    InventoryItem,
+    Order,
+    OrderItem,
+    Packaging,
+    Process,
+    Product,
+    ProductStep,
+    SizeType,
+    StepDefinition,
+    StepTemplate,
+    User,
+)
+from app.database.models.employee import Role
+from app.database.models.product import ProductStatus
+from app.database.models.product_step import StepStatus
+from app.utils.dates import MOSCOW_TZ
+
+# длительность одного этапа изделия, минуты
+STEP_MINUTES = (10, 8 * 60)
+# доля изделий в браке и на доработке
+SCRAP_SHARE = 0.01
+REWORK_SHARE = 0.02
+
+
+@dataclass
+class Ids:
+    """Следующие свободные id по таблицам (строки вставляются с явными id)."""
+
+    next: dict[str, int] = field(default_factory=dict)
+
+    async def load(self, session: AsyncSession, models: Iterable[type[Base]]) -> None:
+        for model in models:
+            last = await session.scalar(select(func.coalesce(func.max(model.id), 0)))
+            self.next[model.__tablename__] = last + 1
+
+    def take(self, model: type[Base]) -> int:
+        value = self.next[model.__tablename__]
+        self.next[model.__tablename__] = value + 1
+        return value
+
+
+@dataclass
+class Catalog:
+    """Созданные справочники и сотрудники."""
+
+    steps: dict[int, list[int]] = field(default_factory=dict)  # процесс -> этапы
+    performers: dict[int, list[int]] = field(default_factory=dict)  # этап -> работники
+    masters: list[int] = field(default_factory=list)
+    packers: list[int] = field(default_factory=list)
+
+
+@dataclass
+class Batch:
+    """Порция строк для COPY, в порядке внешних ключей."""
+
+    orders: list[tuple] = field(default_factory=list)
+    order_items: list[tuple] = field(default_factory=list)
+    packaging: list[tuple] = field(default_factory=list)
+    products: list[tuple] = field(default_factory=list)
+    product_steps: list[tuple] = field(default_factory=list)
+
+
+COPY_COLUMNS: dict[type[Base], list[str]] = {
+    Order: [
+        "id",
+        "contract_number",
+        "contract_date",
+        "planned_shipment_date",
+        "shipment_date",
+        "shipment_by_id",
+    ],
+    OrderItem: ["id", "order_id", "process_id", "quantity"],
+    Packaging: [
+        "id",
+        "serial_number",
+        "performed_by_id",
+        "performed_at",
+        "shipment_by_id",
+        "shipment_at",
+        "order_id",
+    ],
+    Product: ["id", "serial_number", "process_id", "created_at", "status", "packaging_id"],
+    ProductStep: [
+        "id",
+        "product_id",
+        "step_definition_id",
+        "status",
+        "performed_by_id",
+        "performed_at",
+    ],
+}
+
+
+async def _copy(session: AsyncSession, model: type[Base], records: list[tuple], columns=None) -> None:
+    if not records:
+        return
+    connection = await session.connection()
+    raw = await connection.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        model.__tablename__,
+        records=records,
+        columns=columns or COPY_COLUMNS[model],
+    )
+
+
+class Generator:
+    def __init__(self, session: AsyncSession, args: argparse.Namespace) -> None:
+        self.session = session
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.ids = Ids()
+        self.catalog = Catalog()
+        self.now = datetime.now(MOSCOW_TZ)
+        self.start = self.now - timedelta(days=args.days)
+        # выборка изделий для инвентаризаций: (серийный номер, этапы процесса)
+        self.inventory_sample: list[tuple[str, list[int]]] = []
+        self.seen_products = 0
+
+    async def run(self) -> None:
+        await self.ids.load(
+            self.session,
+            [
+                SizeType,
+                StepTemplate,
+                Process,
+                StepDefinition,
+                User,
+                Employee,
+                Order,
+                OrderItem,
+                Packaging,
+                Product,
+                ProductStep,
+                DailyPlan,
+                DailyPlanStep,
+                Inventory,
+                InventoryItem,
+            ],
+        )
+        await self._catalogs()
+        await self._employees()
+        await self._daily_plans()
+
+        started = time.perf_counter()
+        done = 0
+        while done < self.args.products:
+            size = min(self.args.batch, self.args.products - done)
+            batch = self._products_batch(size)
+            for model, rows in (
+                (Order, batch.orders),
+                (OrderItem, batch.order_items),
+                (Packaging, batch.packaging),
+                (Product, batch.products),
+                (ProductStep, batch.product_steps),
+            ):
+                await _copy(self.session, model, rows)
+            done += size
+            logging.info(
+                "изделий %s из %s (%.0f в секунду)",
+                done,
+                self.args.products,
+                done / (time.perf_counter() - started),
+            )
+
+        await self._inventories()
+        await self._finish()
+
+    async def _catalogs(self) -> None:
+        tag = self.args.tag
+        size_type_id = self.ids.take(SizeType)
+        await _copy(
+            self.session,
+            SizeType,
+            [(size_type_id, f"{tag} {self.args.box_size} шт.", self.args.box_size)],
+            ["id", "name", "packaging_count"],
+        )
+        templates = []
+        for number in range(1, self.args.steps + 1):
+            name = f"{tag} этап {number} ({size_type_id})"
+            templates.append((self.ids.take(StepTemplate), name, name))
+        await _copy(self.session, StepTemplate, templates, ["id", "name", "name_genitive"])
+
+        processes, definitions = [], []
+        for number in range(1, self.args.processes + 1):
+            process_id = self.ids.take(Process)
+            processes.append((process_id, f"{tag} процесс {number} ({process_id})", size_type_id))
+            self.catalog.steps[process_id] = []
+            for order, (template_id, _, _) in enumerate(templates, start=1):
+                step_id = self.ids.take(StepDefinition)
+                definitions.append((step_id, process_id, template_id, order))
+                self.catalog.steps[process_id].append(step_id)
+        await _copy(self.session, Process, processes, ["id", "name", "size_type_id"])
+        await _copy(
+            self.session,
+            StepDefinition,
+            definitions,
+            ["id", "process_id", "template_id", "order"],
+        )
+
+    async def _employees(self) -> None:
+        tag = self.args.tag
+        hashed = PasswordHelper().hash(self.args.password)
+        roles = (
+            [Role.master] * self.args.masters
+            + [Role.worker] * self.args.workers
+            + [Role.worker] * self.args.packers
+        )
+        users, employees, workers = [], [], []
+        for index, role in enumerate(roles):
+            user_id = self.ids.take(User)
+            employee_id = self.ids.take(Employee)
+            users.append((user_id, f"{tag}-{employee_id}@example.com", hashed, True, False, True))
+            employees.append((employee_id, f"{tag} {role.value} {employee_id}", role.value, user_id))
+            if role == Role.master:
+                self.catalog.masters.append(employee_id)
+            elif index < self.args.masters + self.args.workers:
+                workers.append(employee_id)
+            else:
+                self.catalog.packers.append(employee_id)
+        await _copy(
+            self.session,
+            User,
+            users,
+            ["id", "email", "hashed_password", "is_active", "is_superuser", "is_verified"],
+        )
+        await _copy(self.session, Employee, employees, ["id", "name", "role", "user_id"])
+
+        # каждый работник закреплён за одним видом этапа: план и факт совпадают
+        all_steps = [step for steps in self.catalog.steps.values() for step in steps]
+        for index, employee_id in enumerate(workers):
+            step_id = all_steps[index % len(all_steps)]
+            self.catalog.performers.setdefault(step_id, []).append(employee_id)
+        for step_id in all_steps:
+            self.catalog.performers.setdefault(step_id, workers[:1] or self.catalog.masters[:1])
+
+    async def _daily_plans(self) -> None:
+        per_day = self.args.products / max(self.args.days, 1)
+        assigned: dict[int, list[tuple[int, int]]] = {}  # работник -> (этап, план)
+        for step_id, employees in self.catalog.performers.items():
+            planned = max(1, round(per_day / len(self.catalog.steps) / len(employees)))
+            for employee_id in employees:
+                assigned.setdefault(employee_id, []).append((step_id, planned))
+
+        plans, plan_steps = [], []
+        for offset in range(self.args.days + 1):
+            day = (self.start + timedelta(days=offset)).date()
+            for employee_id, steps in assigned.items():
+                plan_id = self.ids.take(DailyPlan)
+                plans.append((plan_id, employee_id, day))
+                for step_id, planned in steps:
+                    plan_steps.append(
+                        (self.ids.take(DailyPlanStep), plan_id, step_id, planned)
+                    )
+        await _copy(self.session, DailyPlan, plans, ["id", "employee_id", "date"])
+        await _copy(
+            self.session,
+            DailyPlanStep,
+            plan_steps,
+            ["id", "daily_plan_id", "step_definition_id", "planned_quantity"],
+        )
+
+    def _products_batch(self, size: int) -> Batch:
+        batch = Batch()
+        rng = self.rng
+        span = (self.now - self.start).total_seconds()
+        # завершённые изделия в статусе normal: процесс -> [(время, индекс строки)]
+        finished: dict[int, list[tuple[datetime, int]]] = {}
+
+        for _ in range(size):
+            product_id = self.ids.take(Product)
+            process_id = rng.choice(list(self.catalog.steps))
+            created_at = self.start + timedelta(seconds=rng.random() * span)
+            roll = rng.random()
+            status = (
+                ProductStatus.scrap
+                if roll < SCRAP_SHARE
+                else ProductStatus.rework
+                if roll < SCRAP_SHARE + REWORK_SHARE
+                else ProductStatus.normal
+            )
+            serial = f"{self.args.tag.upper()}{product_id:09d}"
+
+            moment = created_at
+            last_done = None
+            for step_id in self.catalog.steps[process_id]:
+                moment += timedelta(minutes=rng.uniform(*STEP_MINUTES))
+                # брак обнаруживается на случайном этапе: дальше изделие не идёт
+                if moment < self.now and (
+                    status != ProductStatus.scrap or rng.random() < 0.5
+                ):
+                    batch.product_steps.append(
+                        (
+                            self.ids.take(ProductStep),
+                            product_id,
+                            step_id,
+                            StepStatus.done.value,
+                            rng.choice(self.catalog.performers[step_id]),
+                            moment,
+                        )
+                    )
+                    last_done = moment
+                else:
+                    batch.product_steps.append(
+                        (
+                            self.ids.take(ProductStep),
+                            product_id,
+                            step_id,
+                            StepStatus.pending.value,
+                            None,
+                            None,
+                        )
+                    )
+                    last_done = None
+                    moment = self.now
+
+            batch.products.append([product_id, serial, process_id, created_at, status.value, None])
+            if last_done is not None and status == ProductStatus.normal:
+                finished.setdefault(process_id, []).append((last_done, len(batch.products) - 1))
+
+            # резервуарная выборка для инвентаризаций
+            self.seen_products += 1
+            if len(self.inventory_sample) < self.args.inventory_items:
+                self.inventory_sample.append((serial, self.catalog.steps[process_id]))
+            elif (slot := rng.randrange(self.seen_products)) < self.args.inventory_items:
+                self.inventory_sample[slot] = (serial, self.catalog.steps[process_id])
+
+        self._pack(batch, finished)
+        batch.products = [tuple(row) for row in batch.products]
+        return batch
+
+    def _pack(self, batch: Batch, finished: dict[int, list[tuple[datetime, int]]]) -> None:
+        """Упаковать завершённые изделия и собрать упаковки в заказы."""
+        rng = self.rng
+        boxes: list[tuple[int, int, datetime]] = []  # (id упаковки, процесс, время)
+        for process_id, items in finished.items():
+            items.sort()
+            for start in range(0, len(items) - self.args.box_size + 1, self.args.box_size):
+                chunk = items[start : start + self.args.box_size]
+                packed_at = chunk[-1][0] + timedelta(hours=rng.uniform(1, 24))
+                if packed_at >= self.now:
+                    continue
+                packaging_id = self.ids.take(Packaging)
+                for _, row in chunk:
+                    batch.products[row][5] = packaging_id
+                boxes.append((packaging_id, process_id, packed_at))
+
+        boxes.sort(key=lambda box: box[2])
+        packers = self.catalog.packers or self.catalog.masters
+        packaging_rows = {
+            packaging_id: [
+                packaging_id,
+                f"{self.args.tag.upper()}P{packaging_id:08d}",
+                rng.choice(packers),
+                packed_at,
+                None,
+                None,
+                None,
+            ]
+            for packaging_id, _, packed_at in boxes
+        }
+        for start in range(0, len(boxes), self.args.order_size):
+            chunk = boxes[start : start + self.args.order_size]
+            order_id = self.ids.take(Order)
+            contract_date = chunk[0][2].date() - timedelta(days=rng.randint(7, 30))
+            planned = chunk[-1][2].date() + timedelta(days=rng.randint(1, 7))
+            shipped_at = None
+            master = rng.choice(self.catalog.masters)
+            if planned < self.now.date():
+                shipped_at = datetime.combine(
+                    planned, datetime.min.time(), MOSCOW_TZ
+                ) + timedelta(hours=rng.uniform(8, 18))
+            batch.orders.append(
+                (
+                    order_id,
+                    f"{self.args.tag.upper()}-{order_id}",
+                    contract_date,
+                    planned,
+                    shipped_at,
+                    master if shipped_at else None,
+                )
+            )
+            quantities: dict[int, int] = {}
+            for packaging_id, process_id, _ in chunk:
+                quantities[process_id] = quantities.get(process_id, 0) + self.args.box_size
+                row = packaging_rows[packaging_id]
+                row[6] = order_id
+                if shipped_at:
+                    row[4], row[5] = master, shipped_at
+            for process_id, quantity in quantities.items():
+                batch.order_items.append((self.ids.take(OrderItem), order_id, process_id, quantity))
+        batch.packaging = [tuple(row) for row in packaging_rows.values()]
+
+    async def _inventories(self) -> None:
+        inventories, items = [], []
+        for number in range(self.args.inventories):
+            inventory_id = self.ids.take(Inventory)
+            created_at = self.now - timedelta(days=self.args.days * number / max(self.args.inventories, 1))
+            inventories.append(
+                (inventory_id, self.rng.choice(self.catalog.masters), created_at, created_at + timedelta(hours=2))
+            )
+            for serial, steps in self.inventory_sample:
+                items.append(
+                    (
+                        self.ids.take(InventoryItem),
+                        inventory_id,
+                        serial,
+                        self.rng.choice(steps),
+                        created_at + timedelta(minutes=self.rng.uniform(0, 120)),
+                    )
+                )
+        await _copy(self.session, Inventory, inventories, ["id", "created_by_id", "created_at", "completed_at"])
+        await _copy(
+            self.session,
+            InventoryItem,
+            items,
+            ["id", "inventory_id", "serial_number", "step_definition_id", "scanned_at"],
+        )
+
+    async def _finish(self) -> None:
+        logging.info("Пересчёт product_progress и дневных счётчиков")
+        await ProductProgressRepository(self.session).rebuild()
+        await DailyStepCounterRepository(self.session).rebuild()
+        for table in self.ids.next:
+            await self.session.execute(
+                text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"(SELECT max(id) FROM {table}))"
+                )
+            )
+
+
+async def generate(args: argparse.Namespace) -> None:
+    started = time.perf_counter()
+    async for session in db_helper.get_maintenance_session():
+        try:
+            await Generator(session, args).run()
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            logging.exception("Ошибка генерации синтетических данных")
+            raise
+    await result_cache.invalidate(CacheTag.progress, CacheTag.statistics)
+    logging.info("Готово за %.1f с", time.perf_counter() - started)
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--products", type=int, default=125_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--processes", type=int, default=5)
+    parser.add_argument("--steps", type=int, default=8, help="этапов в процессе")
+    parser.add_argument("--masters", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=40)
+    parser.add_argument("--packers", type=int, default=4)
+    parser.add_argument("--box-size", type=int, default=10, help="изделий в упаковке")
+    parser.add_argument("--order-size", type=int, default=20, help="упаковок в заказе")
+    parser.add_argument("--inventories", type=int, default=12)
+    parser.add_argument("--inventory-items", type=int, default=2_000)
+    parser.add_argument("--batch", type=int, default=10_000, help="изделий в одном COPY")
+    parser.add_argument("--tag", default="syn", help="метка синтетических записей")
+    parser.add_argument("--password", default="loadtest")
+    parser.add_argument("--seed", type=int, default=1)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    asyncio.run(generate(_parse_args()))
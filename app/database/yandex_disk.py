@@ -1,13 +1,29 @@
+import asyncio
+import hashlib
 import logging
-import os
+import random
 import ssl
 from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable
 
 import aiohttp
 import certifi
 
 from app.core import settings
 
+# проверка sha256 после загрузки: диск считает хеш не сразу
+VERIFY_ATTEMPTS = 10
+VERIFY_DELAY_SECONDS = 3.0
+LIST_PAGE_SIZE = 1000
+
+# вызывается с числом уже отправленных байт
+ProgressCallback = Callable[[int], Awaitable[None]]
+
+
+class YaDiskUploadError(Exception):
+    """Файл не загружен на Яндекс.Диск или загружен не полностью."""
+
 
 class YaDisk:
     API_URL = "https://cloud-api.yandex.net/v1/disk/resources"
@@ -149,24 +165,199 @@ class YaDisk:
             logging.error(f"Ошибка при получении ссылки для загрузки файла: {e}")
             return None
 
-    async def copy_photos_to_disk(self, file_name: str) -> None:
+    async def _put(
+        self,
+        session: aiohttp.ClientSession,
+        file_name: str,
+        chunks: AsyncIterator[bytes],
+        progress: ProgressCallback | None,
+    ) -> tuple[str, int]:
+        """Один PUT потока порций; возвращает sha256 и размер отправленного."""
+        upload_url = await self.get_upload_url(session, file_name)
+        if not upload_url:
+            raise YaDiskUploadError(
+                f"Не удалось получить ссылку для загрузки файла {file_name}"
+            )
+        digest = hashlib.sha256()
+        sent = 0
+
+        async def counted() -> AsyncIterator[bytes]:
+            nonlocal sent
+            async for chunk in chunks:
+                digest.update(chunk)
+                sent += len(chunk)
+                if progress:
+                    await progress(sent)
+                yield chunk
+
+        async with session.put(
+            upload_url, data=counted(), ssl=self.ssl_context
+        ) as response:
+            if response.status not in (201, 202):
+                raise YaDiskUploadError(
+                    f"Загрузка {file_name}: статус {response.status}"
+                )
+        return digest.hexdigest(), sent
+
+    async def _verify(
+        self,
+        session: aiohttp.ClientSession,
+        file_name: str,
+        sha256: str,
+        size: int,
+    ) -> None:
+        """
+        Сверить sha256 и размер загруженного файла с метаданными ресурса.
+
+        После ответа 202 диск досчитывает хеш асинхронно, поэтому
+        метаданные без sha256 запрашиваются повторно.
+        """
+        for _ in range(VERIFY_ATTEMPTS):
+            async with session.get(
+                self.API_URL,
+                headers=self.headers,
+                params={
+                    "path": f"{self.folder_name}/{file_name}",
+                    "fields": "sha256,size",
+                },
+                ssl=self.ssl_context,
+            ) as response:
+                if response.status == 200:
+                    meta = await response.json()
+                    if meta.get("sha256"):
+                        if meta["sha256"] != sha256 or meta.get("size") != size:
+                            raise YaDiskUploadError(
+                                f"Файл {file_name} на диске не совпадает с "
+                                f"отправленным (sha256 {meta['sha256']}, "
+                                f"размер {meta.get('size')})"
+                            )
+                        return
+                elif response.status != 404:
+                    raise YaDiskUploadError(
+                        f"Метаданные {file_name}: статус {response.status}"
+                    )
+            await asyncio.sleep(VERIFY_DELAY_SECONDS)
+        raise YaDiskUploadError(f"Диск не вернул sha256 файла {file_name}")
+
+    async def upload_stream(
+        self,
+        file_name: str,
+        chunks: AsyncIterator[bytes],
+        progress: ProgressCallback | None = None,
+    ) -> None:
+        """
+        Выгрузить файл из потока порций одним PUT с chunked-кодированием.
+
+        Поток формируется на лету (дамп БД) и не может быть прочитан заново,
+        поэтому попытка одна; ошибка не глотается, чтобы вызывающий мог
+        повторить выгрузку из локальной копии (`upload_file`).
+        """
         async with aiohttp.ClientSession() as session:
             await self._create_folder(session)
-            upload_url = await self.get_upload_url(session, file_name)
-            if not upload_url:
-                return None
-            file_path = os.path.join(settings.db.backups_dir, file_name)
-            try:
-                with open(file_path, "rb") as f:
-                    async with session.put(
-                        upload_url, data=f, ssl=self.ssl_context
-                    ) as response:
-                        if response.status != 201:
-                            raise Exception(f"Статус:{response.status}")
-                        return None
-            except Exception as e:
-                logging.error(f"Ошибка при загрузке файла: {e}")
-                return None
+            sha256, size = await self._put(session, file_name, chunks, progress)
+            await self._verify(session, file_name, sha256, size)
+
+    async def upload_file(
+        self,
+        file_name: str,
+        path: Path,
+        progress: ProgressCallback | None = None,
+    ) -> None:
+        """
+        Выгрузить локальный файл порциями с повторами и проверкой sha256.
+
+        REST API Яндекс.Диска не умеет продолжать прерванную загрузку: каждая
+        попытка получает новую ссылку и отправляет файл заново. Паузы между
+        попытками растут вдвое (`settings.backup.upload_backoff_*`) со
+        случайным разбросом; после последней неудачи ошибка пробрасывается.
+        """
+        backup = settings.backup
+        async with aiohttp.ClientSession() as session:
+            await self._create_folder(session)
+            for attempt in range(1, backup.upload_attempts + 1):
+                try:
+                    sha256, size = await self._put(
+                        session, file_name, _file_chunks(path), progress
+                    )
+                    await self._verify(session, file_name, sha256, size)
+                    return
+                except (
+                    aiohttp.ClientError,
+                    asyncio.TimeoutError,
+                    YaDiskUploadError,
+                ) as e:
+                    if attempt == backup.upload_attempts:
+                        raise
+                    delay = min(
+                        backup.upload_backoff_seconds * 2 ** (attempt - 1),
+                        backup.upload_backoff_max_seconds,
+                    ) * random.uniform(0.5, 1.0)
+                    logging.warning(
+                        f"Загрузка {file_name}, попытка {attempt} не удалась: {e}; "
+                        f"повтор через {delay:.1f} с"
+                    )
+                    await asyncio.sleep(delay)
+
+    async def list_files(self) -> list[str]:
+        """Имена файлов в папке бэкапов на диске."""
+        names: list[str] = []
+        # смещение считается по всем элементам папки, включая подпапки
+        offset = 0
+        async with aiohttp.ClientSession() as session:
+            if not await self._check_token_valid(session):
+                raise YaDiskUploadError("Токен Яндекс.Диска невалиден")
+            while True:
+                async with session.get(
+                    self.API_URL,
+                    headers=self.headers,
+                    params={
+                        "path": self.folder_name,
+                        "limit": LIST_PAGE_SIZE,
+                        "offset": offset,
+                        "fields": "_embedded.items.name,_embedded.items.type",
+                    },
+                    ssl=self.ssl_context,
+                ) as response:
+                    if response.status == 404:
+                        return []
+                    if response.status != 200:
+                        raise YaDiskUploadError(
+                            f"Список файлов: статус {response.status}"
+                        )
+                    items = (await response.json())["_embedded"]["items"]
+                offset += len(items)
+                names += [item["name"] for item in items if item["type"] == "file"]
+                if len(items) < LIST_PAGE_SIZE:
+                    return names
+
+    async def delete_files(self, file_names: list[str]) -> None:
+        """Удалить файлы из папки бэкапов без корзины (отсутствующие пропускаются)."""
+        async with aiohttp.ClientSession() as session:
+            if not await self._check_token_valid(session):
+                raise YaDiskUploadError("Токен Яндекс.Диска невалиден")
+            for file_name in file_names:
+                async with session.delete(
+                    self.API_URL,
+                    headers=self.headers,
+                    params={
+                        "path": f"{self.folder_name}/{file_name}",
+                        "permanently": "true",
+                    },
+                    ssl=self.ssl_context,
+                ) as response:
+                    if response.status not in (202, 204, 404):
+                        raise YaDiskUploadError(
+                            f"Удаление {file_name}: статус {response.status}"
+                        )
+
+    async def copy_photos_to_disk(self, file_name: str) -> None:
+        await self.upload_file(file_name, Path(settings.db.backups_dir) / file_name)
+
+
+async def _file_chunks(path: Path) -> AsyncIterator[bytes]:
+    with open(path, "rb") as f:
+        while chunk := await asyncio.to_thread(f.read, settings.backup.chunk_size):
+            yield chunk
 
 
 async def create_yadisk_instance(tokens_repo) -> YaDisk:
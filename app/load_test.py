@@ -0,0 +1,361 @@
+"""
+Нагрузочный сценарий «смена» поверх HTTP API.
+
+Работает с данными `app.database.synthetic_data`: по метке (`--tag`)
+находит синтетических сотрудников, их планы на сегодня и изделия, ожидающие
+очередного этапа. Затем одновременно запускает терминалы:
+
+- работники: вход, план на день, сканирование изделия по серийному номеру,
+  закрытие следующего этапа из плана;
+- упаковщики: упаковка завершённых неупакованных изделий;
+- мастера: дашборды (сводка по этапам, статистика за период, планы,
+  синхронизация).
+
+Между действиями терминал «думает» случайное время со средним `--think`.
+По окончании выводятся по каждому маршруту число запросов, ошибки,
+пропускная способность и перцентили задержки p50/p95/p99.
+
+Сервер должен быть запущен отдельно (`--base-url`).
+
+Запуск: python -m app.load_test [--workers 40] [--duration 300]
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import time
+import uuid
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import select
+
+from app.core import settings
+from app.database import db_helper
+from app.database.models import (
+    DailyPlan,
+    DailyPlanStep,
+    Employee,
+    Product,
+    ProductProgress,
+    ProductStep,
+    StepDefinition,
+    User,
+)
+from app.database.models.employee import Role
+from app.database.models.product import ProductStatus
+from app.database.models.product_step import StepStatus
+from app.utils.dates import MOSCOW_TZ
+
+
+@dataclass
+class Route:
+    count: int = 0
+    errors: int = 0
+    latencies: list[float] = field(default_factory=list)
+
+
+@dataclass
+class Stats:
+    routes: dict[str, Route] = field(default_factory=lambda: defaultdict(Route))
+
+    def add(self, name: str, started: float, ok: bool) -> None:
+        route = self.routes[name]
+        route.count += 1
+        if ok:
+            route.latencies.append((time.perf_counter() - started) * 1000)
+        else:
+            route.errors += 1
+
+    def report(self, elapsed: float) -> None:
+        logging.info(HEADER)
+        for name, route in sorted(self.routes.items()):
+            if not route.latencies:
+                logging.info(f"{name:<40} все запросы с ошибкой ({route.errors})")
+                continue
+            p50, p95, p99 = _percentiles(route.latencies)
+            logging.info(
+                f"{name:<40} {route.count:>7} {route.errors:>6} "
+                f"{route.count / elapsed:>7.1f} "
+                f"{p50:>8.1f} {p95:>8.1f} {p99:>8.1f} {max(route.latencies):>9.1f}"
+            )
+
+
+HEADER = (
+    f"{'маршрут':<40} {'запросы':>7} {'ошибки':>6} {'rps':>7} "
+    f"{'p50 мс':>8} {'p95 мс':>8} {'p99 мс':>8} {'макс мс':>9}"
+)
+
+
+def _percentiles(values: list[float]) -> tuple[float, float, float]:
+    if len(values) < 2:
+        return values[0], values[0], values[0]
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return cuts[49], cuts[94], cuts[98]
+
+
+@dataclass
+class Terminal:
+    email: str
+    employee_id: int
+    # работник: (серийный номер, id этапа); упаковщик: списки id изделий
+    queue: deque = field(default_factory=deque)
+
+
+@dataclass
+class Shift:
+    workers: list[Terminal] = field(default_factory=list)
+    packers: list[Terminal] = field(default_factory=list)
+    masters: list[Terminal] = field(default_factory=list)
+
+
+async def _employees(session, tag: str, role: Role, limit: int) -> list[Terminal]:
+    rows = await session.execute(
+        select(User.email, Employee.id)
+        .join(Employee, Employee.user_id == User.id)
+        .where(Employee.role == role, User.email.like(f"{tag}-%"))
+        .order_by(Employee.id)
+    )
+    return [Terminal(email, employee_id) for email, employee_id in rows.all()][:limit]
+
+
+async def prepare_shift(args: argparse.Namespace) -> Shift:
+    """Выбрать сотрудников и очереди работы из синтетических данных."""
+    today = datetime.now(MOSCOW_TZ).date()
+    shift = Shift()
+    async with db_helper.async_session() as session:
+        workers = await _employees(session, args.tag, Role.worker, 10**9)
+        shift.masters = await _employees(session, args.tag, Role.master, args.masters)
+
+        planned = defaultdict(set)
+        rows = await session.execute(
+            select(DailyPlan.employee_id, DailyPlanStep.step_definition_id)
+            .join(DailyPlanStep, DailyPlanStep.daily_plan_id == DailyPlan.id)
+            .where(DailyPlan.date == today)
+        )
+        for employee_id, step_definition_id in rows.all():
+            planned[employee_id].add(step_definition_id)
+
+        # сотрудники без плана на сегодня — упаковщики
+        shift.workers = [t for t in workers if planned[t.employee_id]][: args.workers]
+        shift.packers = [t for t in workers if not planned[t.employee_id]][
+            : args.packers
+        ]
+
+        # следующие по порядку незакрытые этапы из плана работника
+        for terminal in shift.workers:
+            rows = await session.execute(
+                select(Product.serial_number, ProductStep.id)
+                .join(Product, Product.id == ProductStep.product_id)
+                .join(StepDefinition, StepDefinition.id == ProductStep.step_definition_id)
+                .join(ProductProgress, ProductProgress.product_id == Product.id)
+                .where(
+                    ProductStep.step_definition_id.in_(planned[terminal.employee_id]),
+                    ProductStep.status == StepStatus.pending,
+                    ProductProgress.done_count == StepDefinition.order - 1,
+                    Product.status == ProductStatus.normal,
+                )
+                .limit(args.queue)
+            )
+            terminal.queue.extend(rows.all())
+
+        # завершённые неупакованные изделия, по одной упаковке на процесс
+        if shift.packers:
+            rows = await session.execute(
+                select(Product.process_id, Product.id)
+                .join(ProductProgress, ProductProgress.product_id == Product.id)
+                .where(
+                    ProductProgress.is_finished.is_(True),
+                    Product.packaging_id.is_(None),
+                    Product.status == ProductStatus.normal,
+                )
+                .order_by(Product.process_id, Product.id)
+                .limit(args.queue * len(shift.packers) * args.box_size)
+            )
+            boxes = defaultdict(list)
+            for process_id, product_id in rows.all():
+                boxes[process_id].append(product_id)
+            chunks = [
+                ids[start : start + args.box_size]
+                for ids in boxes.values()
+                for start in range(0, len(ids), args.box_size)
+            ]
+            for index, chunk in enumerate(chunks):
+                shift.packers[index % len(shift.packers)].queue.append(chunk)
+    return shift
+
+
+class ShiftRunner:
+    def __init__(self, args: argparse.Namespace, shift: Shift) -> None:
+        self.args = args
+        self.shift = shift
+        self.stats = Stats()
+        self.api = f"{settings.api.prefix}{settings.api.v1.prefix}"
+        self.today = datetime.now(MOSCOW_TZ).date()
+        self.deadline = 0.0
+
+    async def _call(
+        self,
+        client: httpx.AsyncClient,
+        name: str,
+        method: str,
+        url: str,
+        **kwargs,
+    ) -> httpx.Response | None:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, f"{self.api}{url}", **kwargs)
+        except httpx.HTTPError:
+            self.stats.add(name, started, ok=False)
+            return None
+        self.stats.add(name, started, ok=response.is_success)
+        return response
+
+    async def _think(self) -> bool:
+        await asyncio.sleep(random.expovariate(1 / self.args.think))
+        return time.perf_counter() < self.deadline
+
+    async def _login(self, client: httpx.AsyncClient, terminal: Terminal) -> bool:
+        response = await self._call(
+            client,
+            "POST /auth/login_json",
+            "POST",
+            f"{settings.api.v1.auth}/login_json",
+            json={"username": terminal.email, "password": self.args.password},
+        )
+        if response is None or not response.is_success:
+            return False
+        client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+        return True
+
+    async def _worker(self, client: httpx.AsyncClient, terminal: Terminal) -> None:
+        v1 = settings.api.v1
+        await self._call(
+            client,
+            "GET /daily-plans",
+            "GET",
+            "/daily-plans",
+            params={"plan_date": self.today.isoformat()},
+        )
+        while terminal.queue and await self._think():
+            serial_number, step_id = terminal.queue.popleft()
+            await self._call(
+                client,
+                "GET /products/by-serial/{serial}",
+                "GET",
+                f"{v1.products}/by-serial/{serial_number}",
+                params={"view": "steps_summary"},
+            )
+            await self._call(
+                client,
+                "POST /products_steps/",
+                "POST",
+                f"{v1.products_steps}/",
+                params={"step_id": step_id, "plan_date": self.today.isoformat()},
+            )
+
+    async def _packer(self, client: httpx.AsyncClient, terminal: Terminal) -> None:
+        while terminal.queue and await self._think():
+            products = terminal.queue.popleft()
+            await self._call(
+                client,
+                "POST /packaging",
+                "POST",
+                settings.api.v1.packaging,
+                json={
+                    "serial_number": f"{self.args.tag.upper()}L{uuid.uuid4().hex[:12]}",
+                    "products": products,
+                },
+            )
+
+    async def _master(self, client: httpx.AsyncClient, terminal: Terminal) -> None:
+        v1 = settings.api.v1
+        week_ago = (self.today - timedelta(days=7)).isoformat()
+        sync_cursor = None
+        while await self._think():
+            await self._call(
+                client,
+                "GET /products/stats/by-last-done-step",
+                "GET",
+                f"{v1.products}/stats/by-last-done-step",
+            )
+            await self._call(
+                client,
+                "GET /products/statistics/period",
+                "GET",
+                f"{v1.products}/statistics/period",
+                params={"date_from": week_ago, "date_to": self.today.isoformat()},
+            )
+            await self._call(
+                client,
+                "GET /daily-plans",
+                "GET",
+                "/daily-plans",
+                params={"plan_date": self.today.isoformat()},
+            )
+            # планшет мастера догоняет изменения с прошлого опроса
+            params = {"since": sync_cursor} if sync_cursor else {}
+            response = await self._call(client, "GET /sync", "GET", v1.sync, params=params)
+            if response is not None and response.is_success:
+                sync_cursor = response.json()["cursor"]
+
+    async def _terminal(self, terminal: Terminal, role) -> None:
+        async with httpx.AsyncClient(
+            base_url=self.args.base_url, timeout=self.args.timeout
+        ) as client:
+            # терминалы приходят на смену не одновременно
+            await asyncio.sleep(random.uniform(0, self.args.ramp_up))
+            if await self._login(client, terminal):
+                await role(client, terminal)
+
+    async def run(self) -> None:
+        shift = self.shift
+        logging.info(
+            "работников %s (этапов в очередях %s), упаковщиков %s, мастеров %s",
+            len(shift.workers),
+            sum(len(t.queue) for t in shift.workers),
+            len(shift.packers),
+            len(shift.masters),
+        )
+        started = time.perf_counter()
+        self.deadline = started + self.args.duration
+        await asyncio.gather(
+            *(self._terminal(t, self._worker) for t in shift.workers),
+            *(self._terminal(t, self._packer) for t in shift.packers),
+            *(self._terminal(t, self._master) for t in shift.masters),
+        )
+        self.stats.report(time.perf_counter() - started)
+
+
+async def run_shift(args: argparse.Namespace) -> None:
+    random.seed(args.seed)
+    shift = await prepare_shift(args)
+    await db_helper.dispose()
+    await ShiftRunner(args, shift).run()
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--tag", default="syn", help="метка синтетических данных")
+    parser.add_argument("--password", default="loadtest")
+    parser.add_argument("--workers", type=int, default=40)
+    parser.add_argument("--packers", type=int, default=4)
+    parser.add_argument("--masters", type=int, default=3)
+    parser.add_argument("--queue", type=int, default=200, help="заданий на терминал")
+    parser.add_argument("--box-size", type=int, default=10, help="изделий в упаковке")
+    parser.add_argument("--duration", type=float, default=300, help="секунд")
+    parser.add_argument("--ramp-up", type=float, default=30, help="секунд")
+    parser.add_argument("--think", type=float, default=2.0, help="секунд в среднем")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=1)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    asyncio.run(run_shift(_parse_args()))
@@ -8,18 +8,25 @@ from starlette.staticfiles import StaticFiles
 from app.admin.init_admin import init_admin
 from app.api import router as api_router
 from app.core.logger_init import init_logger
+from app.core import settings
+from app.core.progress_events import progress_events
+from app.core.redis import redis_helper
 from app.database import db_helper
+from app.database.sql_metrics import SqlBudget, SqlMetricsMiddleware
 from scheduler import startup_scheduler
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+    redis_helper.connect()
     await db_helper.synch_backups()
     admin = await init_admin(app)
     await startup_scheduler()
     app.state.admin = admin
     yield
+    await progress_events.close()
     await db_helper.dispose()
+    await redis_helper.dispose()
 
 
 def init_main_app() -> FastAPI:
@@ -28,6 +35,15 @@ def init_main_app() -> FastAPI:
         default_response_class=ORJSONResponse,
     )
     init_logger()
+    main_app.add_middleware(
+        SqlMetricsMiddleware,
+        budget=SqlBudget(
+            max_statements=settings.db.max_statements_per_request,
+            max_rows=settings.db.max_rows_per_request,
+            max_db_time_ms=settings.db.max_db_time_ms_per_request,
+            strict=settings.db.strict_query_budget,
+        ),
+    )
     main_app.mount("/static", StaticFiles(directory="./static"), name="static")
 
     main_app.include_router(router=api_router)
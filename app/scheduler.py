@@ -1,14 +1,36 @@
+import asyncio
+import logging
+
 from apscheduler.schedulers.asyncio import AsyncIOScheduler  # type: ignore
 from apscheduler.triggers.cron import CronTrigger  # type: ignore
 from celery import chain  # type: ignore
 
+from app.core import settings
+from app.database import db_helper
+from app.database.crud.sync import SyncRepository
+from app.database.rollups import reconcile_rollups
 from app.tasks.create_backup import run_process_backup, backup_task
 
 scheduler = AsyncIOScheduler()
 
 
 async def backup_db() -> None:
-    run_process_backup.delay()
+    # публикация в брокер синхронная — выносим из event loop
+    await asyncio.to_thread(run_process_backup.delay)
+
+
+async def prune_sync_tombstones() -> None:
+    async for session in db_helper.get_maintenance_session():
+        try:
+            deleted = await SyncRepository(session).prune_tombstones(
+                settings.sync.tombstone_days
+            )
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            logging.exception("Ошибка при очистке sync_tombstones")
+            return
+    logging.info("Удалено отметок об удалении: %s", deleted)
 
 
 async def startup_scheduler() -> None:
@@ -22,6 +44,16 @@ async def startup_scheduler() -> None:
         ),
         misfire_grace_time=60,  # Допустимое время задержки (секунды)
     )
+    scheduler.add_job(
+        reconcile_rollups,
+        CronTrigger(hour=2, minute=30, timezone="Europe/Moscow"),
+        misfire_grace_time=600,
+    )
+    scheduler.add_job(
+        prune_sync_tombstones,
+        CronTrigger(hour=3, minute=30, timezone="Europe/Moscow"),
+        misfire_grace_time=600,
+    )
 
     # Запускаем планировщик
     scheduler.start()
@@ -0,0 +1,17 @@
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+MOSCOW_TZ = ZoneInfo("Europe/Moscow")
+
+
+def day_range(date_from: date, date_to: date | None = None) -> tuple[datetime, datetime]:
+    """
+    Полуинтервал [начало date_from, начало дня после date_to) по Москве.
+
+    Используется вместо `func.date(column)` в фильтрах: сравнение самой
+    колонки с границами позволяет использовать индекс по ней.
+    """
+    date_to = date_to or date_from
+    start = datetime.combine(date_from, time.min, tzinfo=MOSCOW_TZ)
+    end = datetime.combine(date_to + timedelta(days=1), time.min, tzinfo=MOSCOW_TZ)
+    return start, end
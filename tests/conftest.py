@@ -0,0 +1,29 @@
+import os
+
+# обязательные настройки приложения, если их нет в окружении;
+# тесты не обращаются ни к БД, ни к Redis
+for name, value in {
+    "SQL_ADMIN__JWT_SECRET": "test",
+    "SQL_ADMIN__SECRET": "test",
+    "ACCESS_TOKEN__RESET_PASSWORD_TOKEN_SECRET": "test",
+    "ACCESS_TOKEN__VERIFICATION_TOKEN_SECRET": "test",
+    "DB__USER": "test",
+    "DB__PASSWORD": "test",
+    "DB__HOST": "localhost",
+    "DB__PORT": "5432",
+    "DB__DATABASE": "test",
+    "DB__REDIS_HOST": "localhost",
+    "DB__REDIS_DB": "0",
+    "SUPER_USER__EMAIL": "admin@example.com",
+    "SUPER_USER__PASSWORD": "test",
+    "EMAIL__HOST": "localhost",
+    "EMAIL__PORT": "25",
+    "EMAIL__PASSWORD": "test",
+    "EMAIL__ADMIN_EMAIL": "admin@example.com",
+    "YANDEX_DISK__CLIENT_ID": "test",
+    "YANDEX_DISK__CLIENT_SECRET": "test",
+    "YANDEX_DISK__REFRESH_TOKEN": "test",
+    "RUN__HOST": "localhost",
+    "RUN__PORT": "8000",
+}.items():
+    os.environ.setdefault(f"APP_CONFIG__{name}", value)
@@ -0,0 +1,134 @@
+"""
+Локальный заменитель REST API Яндекс.Диска на aiohttp.web для тестов `YaDisk`.
+
+Поддерживает то, чем пользуется клиент: проверку токена, создание папки,
+получение ссылки для загрузки и сам PUT, метаданные ресурса, постраничный
+список папки и удаление. Сбои задаются полями экземпляра перед тестом.
+"""
+
+import hashlib
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator
+
+from aiohttp import web
+
+from app.database.yandex_disk import YaDisk
+
+
+@dataclass
+class FakeYandexDisk:
+    # сохранённые файлы: путь -> содержимое
+    files: dict[str, bytes] = field(default_factory=dict)
+    # подпапки (видны в списке папки как type=dir)
+    dirs: set[str] = field(default_factory=set)
+    # сколько первых PUT оборвать, прочитав часть тела
+    drop_puts: int = 0
+    # статус успешного PUT: 201 или 202 (хеш досчитывается позже)
+    put_status: int = 201
+    # сколько первых запросов метаданных ответить 404 / без sha256
+    meta_not_found: int = 0
+    meta_without_hash: int = 0
+    # отдавать заведомо неверный sha256
+    corrupt_hash: bool = False
+    puts: int = 0
+    meta_requests: int = 0
+    list_requests: int = 0
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/info", self._token_info)
+        app.router.add_put("/resources", self._create_folder)
+        app.router.add_get("/resources", self._resource)
+        app.router.add_delete("/resources", self._delete)
+        app.router.add_get("/resources/upload", self._upload_url)
+        app.router.add_put("/upload/{path:.+}", self._upload)
+        return app
+
+    async def _token_info(self, request: web.Request) -> web.Response:
+        return web.json_response({"login": "test"})
+
+    async def _create_folder(self, request: web.Request) -> web.Response:
+        return web.json_response({}, status=201)
+
+    async def _upload_url(self, request: web.Request) -> web.Response:
+        href = request.url.with_path(f"/upload/{request.query['path']}").with_query(
+            None
+        )
+        return web.json_response({"href": str(href)})
+
+    async def _upload(self, request: web.Request) -> web.StreamResponse:
+        self.puts += 1
+        if self.puts <= self.drop_puts:
+            # обрыв соединения посреди загрузки
+            await request.content.readany()
+            request.transport.close()
+            return web.Response(status=500)
+        self.files[request.match_info["path"]] = await request.read()
+        return web.Response(status=self.put_status)
+
+    async def _resource(self, request: web.Request) -> web.Response:
+        path = request.query["path"]
+        if path in self.files:
+            return self._meta(path)
+        if "/" not in path:
+            return self._listing(path, request)
+        return web.json_response({"error": "DiskNotFoundError"}, status=404)
+
+    def _meta(self, path: str) -> web.Response:
+        self.meta_requests += 1
+        content = self.files[path]
+        if self.meta_requests <= self.meta_not_found:
+            return web.json_response({"error": "DiskNotFoundError"}, status=404)
+        meta = {"size": len(content)}
+        if self.meta_requests > self.meta_not_found + self.meta_without_hash:
+            meta["sha256"] = (
+                "0" * 64 if self.corrupt_hash else hashlib.sha256(content).hexdigest()
+            )
+        return web.json_response(meta)
+
+    def _listing(self, folder: str, request: web.Request) -> web.Response:
+        self.list_requests += 1
+        entries = sorted(
+            [{"name": p.split("/", 1)[1], "type": "file"} for p in self.files]
+            + [{"name": d, "type": "dir"} for d in self.dirs],
+            key=lambda item: item["name"],
+        )
+        offset = int(request.query.get("offset", 0))
+        limit = int(request.query.get("limit", 20))
+        return web.json_response(
+            {"_embedded": {"items": entries[offset : offset + limit]}}
+        )
+
+    async def _delete(self, request: web.Request) -> web.Response:
+        if self.files.pop(request.query["path"], None) is None:
+            return web.json_response({"error": "DiskNotFoundError"}, status=404)
+        return web.Response(status=204)
+
+
+class FakeTokensRepo:
+    async def get_tokens(self):
+        return "access", "refresh", None
+
+    async def save_tokens(self, access_token, refresh_token, expires_at):
+        pass
+
+
+@asynccontextmanager
+async def running(fake: FakeYandexDisk) -> AsyncIterator[YaDisk]:
+    """Запустить заменитель на свободном порту и отдать настроенный на него клиент."""
+    runner = web.AppRunner(fake.app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+    yadisk = YaDisk(FakeTokensRepo())
+    yadisk.API_URL = f"{base_url}/resources"
+    yadisk.TOKEN_INFO_URL = f"{base_url}/info"
+    yadisk.folder_name = "db_backup"
+    try:
+        await yadisk.initialize()
+        yield yadisk
+    finally:
+        await runner.cleanup()
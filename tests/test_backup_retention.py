@@ -0,0 +1,149 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core import settings
+from app.core.config import BackupSettings
+from app.database.backup_retention import prune_backups, select_backups_to_keep
+from tests.fake_yandex_disk import FakeYandexDisk, running
+
+NOW = datetime(2026, 10, 18, 3, 0, 0)
+
+
+def name(moment: datetime, database: str = "test", suffix: str = ".dump") -> str:
+    return f"{database}_backup_{moment:%Y-%m-%d_%H-%M-%S}{suffix}"
+
+
+def policy(daily: int = 0, weekly: int = 0, monthly: int = 0) -> BackupSettings:
+    return BackupSettings(keep_daily=daily, keep_weekly=weekly, keep_monthly=monthly)
+
+
+def test_daily_keeps_latest_copy_of_each_recent_day():
+    names = {
+        name(NOW - timedelta(days=day, hours=hour))
+        for day in range(10)
+        for hour in (0, 2)
+    }
+    keep = select_backups_to_keep(names, policy(daily=3))
+    assert keep == {name(NOW - timedelta(days=day)) for day in range(3)}
+
+
+def test_weekly_tier_splits_on_iso_week_boundary():
+    sunday = datetime(2026, 10, 11, 23, 0, 0)
+    monday = datetime(2026, 10, 12, 1, 0, 0)
+    names = {
+        name(datetime(2026, 10, 4, 12, 0, 0)),
+        name(sunday),
+        name(monday),
+        name(datetime(2026, 10, 18, 10, 0, 0)),
+    }
+    keep = select_backups_to_keep(names, policy(weekly=2))
+    # понедельник открывает новую неделю: из неё остаётся копия от 18-го
+    assert keep == {name(datetime(2026, 10, 18, 10, 0, 0)), name(sunday)}
+
+
+def test_monthly_tier_splits_on_month_boundary():
+    last_of_september = datetime(2026, 9, 30, 23, 59, 59)
+    first_of_october = datetime(2026, 10, 1, 0, 0, 0)
+    names = {
+        name(datetime(2026, 8, 15, 3, 0, 0)),
+        name(datetime(2026, 9, 1, 3, 0, 0)),
+        name(last_of_september),
+        name(first_of_october),
+    }
+    keep = select_backups_to_keep(names, policy(monthly=2))
+    assert keep == {name(first_of_october), name(last_of_september)}
+
+
+def test_tiers_are_combined():
+    names = {name(NOW - timedelta(days=day)) for day in range(120)}
+    keep = select_backups_to_keep(names, policy(daily=7, weekly=4, monthly=3))
+    days = {name(NOW - timedelta(days=day)) for day in range(7)}
+    # последние копии недель 41, 40, 39 и месяцев сентябрь, август;
+    # текущие неделя и месяц уже учтены днями
+    weeks = {name(NOW.replace(day=day)) for day in (11, 4)} | {
+        name(NOW.replace(month=9, day=27))
+    }
+    months = {name(NOW.replace(month=9, day=30)), name(NOW.replace(month=8, day=31))}
+    assert keep == days | weeks | months
+
+
+def test_undated_and_unknown_names_are_kept():
+    undated = {"test_backup_manual.dump", "test_backup_2026-13-45_00-00-00.dump"}
+    unknown = {"notes.txt", name(NOW - timedelta(days=400), suffix=".sql")}
+    old = name(NOW - timedelta(days=400))
+    keep = select_backups_to_keep(undated | unknown | {old, name(NOW)}, policy(daily=1))
+    assert keep == undated | unknown | {name(NOW)}
+
+
+def test_all_zero_policy_keeps_only_undated_in_selector():
+    names = {name(NOW), "test_backup_manual.dump"}
+    assert select_backups_to_keep(names, policy()) == {"test_backup_manual.dump"}
+
+
+class FakeBackupRepo:
+    def __init__(self, names: set[str]) -> None:
+        self.names = set(names)
+
+    async def get_names(self) -> set[str]:
+        return set(self.names)
+
+    async def delete_by_names(self, names: set[str]) -> None:
+        self.names -= names
+
+
+@pytest.fixture
+def backups_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings.db, "backups_dir", tmp_path)
+    return tmp_path
+
+
+def prune(fake: FakeYandexDisk, repo: FakeBackupRepo) -> set[str]:
+    async def scenario() -> set[str]:
+        async with running(fake) as yadisk:
+            return await prune_backups(repo, yadisk)
+
+    return asyncio.run(scenario())
+
+
+def test_prune_backups_deletes_everywhere_but_only_this_database(
+    backups_dir, monkeypatch
+):
+    monkeypatch.setattr(settings.backup, "keep_daily", 2)
+    monkeypatch.setattr(settings.backup, "keep_weekly", 0)
+    monkeypatch.setattr(settings.backup, "keep_monthly", 0)
+    ours = [name(NOW - timedelta(days=day)) for day in range(4)]
+    foreign = [name(NOW - timedelta(days=day), database="other") for day in range(4)]
+    for file_name in ours + foreign:
+        (backups_dir / file_name).write_bytes(b"dump")
+    fake = FakeYandexDisk(
+        files={f"db_backup/{file_name}": b"dump" for file_name in ours + foreign}
+    )
+    repo = FakeBackupRepo(set(ours) | {foreign[-1]})
+
+    pruned = prune(fake, repo)
+
+    assert pruned == set(ours[2:])
+    kept = set(ours[:2]) | set(foreign)
+    assert {p.name for p in backups_dir.iterdir()} == kept
+    assert {p.split("/", 1)[1] for p in fake.files} == kept
+    assert repo.names == set(ours[:2]) | {foreign[-1]}
+
+
+def test_prune_backups_with_all_zero_policy_deletes_nothing(backups_dir, monkeypatch):
+    monkeypatch.setattr(settings.backup, "keep_daily", 0)
+    monkeypatch.setattr(settings.backup, "keep_weekly", 0)
+    monkeypatch.setattr(settings.backup, "keep_monthly", 0)
+    ours = [name(NOW - timedelta(days=day)) for day in range(3)]
+    for file_name in ours:
+        (backups_dir / file_name).write_bytes(b"dump")
+    fake = FakeYandexDisk(
+        files={f"db_backup/{file_name}": b"dump" for file_name in ours}
+    )
+    repo = FakeBackupRepo(set(ours))
+
+    assert prune(fake, repo) == set()
+    assert len(list(backups_dir.iterdir())) == 3
+    assert len(fake.files) == 3
+    assert repo.names == set(ours)
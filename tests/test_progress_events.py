@@ -0,0 +1,100 @@
+import asyncio
+from collections import Counter
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.core import progress_events as module
+from app.core.progress_events import ProgressEvents
+
+
+class FakeRedis:
+    """Канал Redis в памяти: publish раздаёт сообщение действующим подпискам."""
+
+    def __init__(self, subscribe_delay: float = 0.05) -> None:
+        self.subscribe_delay = subscribe_delay
+        self.subscribers: list[asyncio.Queue] = []
+
+    @property
+    def client(self) -> "FakeRedis":
+        return self
+
+    def pubsub(self) -> "FakePubSub":
+        return FakePubSub(self)
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        for queue in self.subscribers:
+            queue.put_nowait({"type": "message", "data": message})
+
+    def drop_connection(self) -> None:
+        for queue in self.subscribers:
+            queue.put_nowait(RedisConnectionError("connection lost"))
+        self.subscribers.clear()
+
+
+class FakePubSub:
+    def __init__(self, redis: FakeRedis) -> None:
+        self.redis = redis
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    async def __aenter__(self) -> "FakePubSub":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self.queue in self.redis.subscribers:
+            self.redis.subscribers.remove(self.queue)
+
+    async def subscribe(self, channel: str) -> None:
+        # SUBSCRIBE — сетевой запрос: до ответа сообщения не доходят
+        await asyncio.sleep(self.redis.subscribe_delay)
+        self.redis.subscribers.append(self.queue)
+
+    async def listen(self):
+        while True:
+            item = await self.queue.get()
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+
+@pytest.fixture(autouse=True)
+def fast_reconnect(monkeypatch):
+    monkeypatch.setattr(module, "RECONNECT_DELAY_SECONDS", 0)
+
+
+def test_first_client_gets_event_published_right_after_subscribe():
+    async def scenario() -> object:
+        redis = FakeRedis()
+        events = ProgressEvents(redis)
+        try:
+            async with events.subscribe() as queue:
+                # сразу после subscribe — как закрытие этапа сразу после снимка
+                await events.publish_last_done_step(Counter(), Counter({(1, 2): 1}), 42)
+                return await asyncio.wait_for(queue.get(), 1)
+        finally:
+            await events.close()
+
+    xact_id, frame = asyncio.run(scenario())
+    assert xact_id == 42
+    assert frame.startswith(b"event: last_done_step\n")
+
+
+def test_lost_subscription_disconnects_clients():
+    async def scenario() -> tuple[object, object]:
+        redis = FakeRedis(subscribe_delay=0)
+        events = ProgressEvents(redis)
+        try:
+            async with events.subscribe() as queue:
+                redis.drop_connection()
+                dropped = await asyncio.wait_for(queue.get(), 1)
+            # после переподключения новые клиенты снова получают события
+            async with events.subscribe() as queue:
+                await events.publish("order_closed", {"order_id": 1}, 7)
+                delivered = await asyncio.wait_for(queue.get(), 1)
+            return dropped, delivered
+        finally:
+            await events.close()
+
+    dropped, delivered = asyncio.run(scenario())
+    assert dropped is None
+    assert delivered[0] == 7
@@ -0,0 +1,109 @@
+import asyncio
+import hashlib
+
+import pytest
+
+from app.core import settings
+from app.database import yandex_disk
+from app.database.yandex_disk import YaDiskUploadError
+from tests.fake_yandex_disk import FakeYandexDisk, running
+
+FILE_NAME = "app_backup_2026-10-18_03-00-00.dump"
+CONTENT = bytes(range(256)) * 4096  # 1 МБ
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(yandex_disk, "VERIFY_DELAY_SECONDS", 0)
+    monkeypatch.setattr(settings.backup, "upload_backoff_seconds", 0)
+    monkeypatch.setattr(settings.backup, "upload_attempts", 3)
+    monkeypatch.setattr(settings.backup, "chunk_size", 64 * 1024)
+
+
+@pytest.fixture
+def dump(tmp_path):
+    path = tmp_path / FILE_NAME
+    path.write_bytes(CONTENT)
+    return path
+
+
+def upload(fake: FakeYandexDisk, path) -> list[int]:
+    sent: list[int] = []
+
+    async def progress(size: int) -> None:
+        sent.append(size)
+
+    async def scenario() -> None:
+        async with running(fake) as yadisk:
+            await yadisk.upload_file(FILE_NAME, path, progress)
+
+    asyncio.run(scenario())
+    return sent
+
+
+def test_upload_success(dump):
+    fake = FakeYandexDisk()
+    sent = upload(fake, dump)
+    assert fake.files[f"db_backup/{FILE_NAME}"] == CONTENT
+    assert fake.puts == 1
+    assert sent[-1] == len(CONTENT)
+
+
+def test_upload_retries_after_disconnect(dump):
+    fake = FakeYandexDisk(drop_puts=1)
+    upload(fake, dump)
+    assert fake.puts == 2
+    assert fake.files[f"db_backup/{FILE_NAME}"] == CONTENT
+
+
+def test_upload_waits_for_hash_after_202(dump):
+    fake = FakeYandexDisk(put_status=202, meta_without_hash=2)
+    upload(fake, dump)
+    assert fake.puts == 1
+    assert fake.meta_requests == 3
+
+
+def test_upload_tolerates_404_while_hash_is_computed(dump):
+    fake = FakeYandexDisk(put_status=202, meta_not_found=2)
+    upload(fake, dump)
+    assert fake.puts == 1
+    assert fake.meta_requests == 3
+
+
+def test_upload_fails_on_sha256_mismatch(dump):
+    fake = FakeYandexDisk(corrupt_hash=True)
+    with pytest.raises(YaDiskUploadError, match="не совпадает"):
+        upload(fake, dump)
+    assert fake.puts == settings.backup.upload_attempts
+
+
+def test_upload_stream_sends_chunks_once(dump):
+    fake = FakeYandexDisk()
+
+    async def chunks():
+        for start in range(0, len(CONTENT), 100_000):
+            yield CONTENT[start : start + 100_000]
+
+    async def scenario() -> None:
+        async with running(fake) as yadisk:
+            await yadisk.upload_stream(FILE_NAME, chunks())
+
+    asyncio.run(scenario())
+    stored = fake.files[f"db_backup/{FILE_NAME}"]
+    assert hashlib.sha256(stored).digest() == hashlib.sha256(CONTENT).digest()
+
+
+def test_list_files_pages_past_subfolders(monkeypatch):
+    monkeypatch.setattr(yandex_disk, "LIST_PAGE_SIZE", 2)
+    fake = FakeYandexDisk(
+        files={f"db_backup/app_backup_{day}.dump": b"" for day in range(3)},
+        dirs={"a-archive", "b-archive", "c-archive"},
+    )
+
+    async def scenario() -> list[str]:
+        async with running(fake) as yadisk:
+            return await yadisk.list_files()
+
+    names = asyncio.run(scenario())
+    assert sorted(names) == sorted(p.split("/", 1)[1] for p in fake.files)
+    assert fake.list_requests == 4